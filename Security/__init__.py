@@ -1,3 +1,4 @@
 from .audit_logger import log_event
+from .audit_store import iter_events, read_recent
 
-__all__ = ["log_event"]
+__all__ = ["log_event", "iter_events", "read_recent"]
@@ -0,0 +1,83 @@
+import json
+from functools import lru_cache
+from typing import Any
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Audit event encoding.
+#
+# Write path: an event is encoded once. The canonical form
+# json.dumps(event, sort_keys=True) is what the hash chain has always covered,
+# and the written line is that same string with current_log_hash appended as
+# the last key, so hashing and writing share one encode.
+#
+# Read path: lines are decoded with msgspec when installed (stdlib json
+# otherwise). project(fields) returns a decoder that keeps only the requested
+# top-level fields; with msgspec the other fields are skipped by the parser
+# instead of being built and thrown away. msgspec is stricter than the stdlib
+# (NaN, lone surrogates), so lines it rejects are retried with json.loads.
+#
+# The canonical encoder stays stdlib json: existing segments were hashed over
+# its exact output (separators, key order, ASCII escapes).
+
+def canonical(event: dict) -> str:
+    """The hashed form of an event (without current_log_hash)."""
+    return json.dumps(event, sort_keys=True)
+
+
+def sealed_line(canonical_form: str, current_hash: str) -> str:
+    """The written form: the canonical encoding with current_log_hash as the last key."""
+    return f'{canonical_form[:-1]}, "current_log_hash": "{current_hash}"}}'
+
+
+def dumps(obj) -> str:
+    """Non-hashed records (segment headers)."""
+    return json.dumps(obj)
+
+
+if msgspec is not None:
+    _decoder = msgspec.json.Decoder()
+
+    def loads(line: str | bytes) -> Any:
+        try:
+            return _decoder.decode(line)
+        except msgspec.DecodeError:
+            return json.loads(line)
+else:
+    loads = json.loads
+
+
+# Raised by the decoders on a malformed line
+DecodeError = (ValueError, msgspec.DecodeError) if msgspec is not None else ValueError
+
+
+@lru_cache(maxsize=64)
+def project(fields: tuple[str, ...]):
+    """decode(line) -> dict holding only `fields` that are present in the line."""
+    def decode_full(line):
+        entry = json.loads(line)
+        if not isinstance(entry, dict):
+            raise ValueError("audit line is not a JSON object")
+        return {f: entry[f] for f in fields if f in entry}
+
+    if msgspec is None:
+        return decode_full
+
+    struct = msgspec.defstruct(
+        "AuditProjection",
+        [(f, Any, msgspec.UNSET) for f in fields],
+        omit_defaults=True,
+    )
+    decoder = msgspec.json.Decoder(struct)
+
+    def decode(line):
+        try:
+            obj = decoder.decode(line)
+        except msgspec.DecodeError:
+            return decode_full(line)
+        return {f: v for f in fields if (v := getattr(obj, f)) is not msgspec.UNSET}
+
+    return decode
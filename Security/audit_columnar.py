@@ -0,0 +1,249 @@
+"""
+Columnar (Parquet) copy of the audit log for analytics.
+
+Sealed audit segments are exported once into a day-partitioned Parquet
+dataset (audit_columnar/date=YYYY-MM-DD/segment-<n>.parquet). Queries read
+that dataset through pyarrow with filters, column projection and
+aggregations pushed down to the reader; only the small active segment is
+parsed from JSONL.
+
+Usage:
+    python -m Security.audit_columnar export
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from . import audit_codec, audit_store
+
+COLUMNAR_DIR = audit_store.BASE_DIR / "audit_columnar"
+EXPORTED_PATH = COLUMNAR_DIR / "_exported.json"
+
+SCHEMA = pa.schema([
+    ("event_id", pa.string()),
+    ("timestamp_utc", pa.timestamp("us", tz="UTC")),
+    ("user_role", pa.string()),
+    ("detected_risk_level", pa.string()),
+    ("matched_pattern_ids", pa.list_(pa.string())),
+    ("policy_action", pa.string()),
+    ("routing_decision", pa.string()),
+    ("request_hash", pa.string()),
+    ("previous_log_hash", pa.string()),
+    ("current_log_hash", pa.string()),
+    ("processing_latency_ms", pa.float64()),
+    ("endpoint", pa.string()),
+    ("document_bytes", pa.int64()),
+    ("document_pages", pa.int32()),
+])
+
+# Nested event fields flattened into columns
+NESTED_COLUMNS = {
+    "document_bytes": ("document", "size_bytes"),
+    "document_pages": ("document", "pages"),
+}
+
+# Event fields read for export (projected; other fields are never decoded)
+EXPORT_FIELDS = tuple(
+    ["segment_header"]
+    + [n for n in SCHEMA.names if n not in NESTED_COLUMNS]
+    + sorted({outer for outer, _ in NESTED_COLUMNS.values()})
+)
+
+FILTER_COLUMNS = {
+    "endpoint": "endpoint",
+    "role": "user_role",
+    "risk_level": "detected_risk_level",
+    "action": "policy_action",
+    "route": "routing_decision",
+}
+
+GROUP_COLUMNS = {
+    "endpoint": "endpoint",
+    "role": "user_role",
+    "risk_level": "detected_risk_level",
+    "action": "policy_action",
+    "route": "routing_decision",
+    "date": "date",
+}
+
+
+def parse_ts(value: str) -> datetime:
+    """ISO-8601 timestamp in UTC ("Z" or any offset; naive times are UTC). Raises ValueError if malformed."""
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _events_to_table(events: list[dict]) -> pa.Table:
+    columns = {name: [] for name in SCHEMA.names}
+    for e in events:
+        for name in SCHEMA.names:
+            if name in NESTED_COLUMNS:
+                outer, inner = NESTED_COLUMNS[name]
+                value = (e.get(outer) or {}).get(inner)
+            else:
+                value = e.get(name)
+            if name == "timestamp_utc" and value:
+                value = parse_ts(value)
+            columns[name].append(value)
+    table = pa.Table.from_pydict(columns, schema=SCHEMA)
+    dates = pc.strftime(table["timestamp_utc"], format="%Y-%m-%d")
+    return table.append_column("date", dates)
+
+
+# --- Export ---
+
+def _load_exported() -> set[int]:
+    if not EXPORTED_PATH.exists():
+        return set()
+    with open(EXPORTED_PATH, "r") as f:
+        return set(json.load(f))
+
+
+def export_sealed_segments() -> int:
+    """Exports sealed segments not yet in the columnar dataset. Returns how many were exported."""
+    exported = _load_exported()
+    pending = [m for m in audit_store.sealed_segments() if m["index"] not in exported]
+    if not pending:
+        return 0
+
+    decode = audit_codec.project(EXPORT_FIELDS)
+    for meta in pending:
+        events = [
+            e for e in (decode(l) for l in audit_store.iter_segment_lines(audit_store.segment_path(meta)))
+            if not audit_store.is_header(e)
+        ]
+        if not events:
+            exported.add(meta["index"])
+            continue
+
+        table = _events_to_table(events)
+        for date in pc.unique(table["date"]).to_pylist():
+            part = table.filter(pc.equal(table["date"], date)).drop_columns(["date"])
+            part_dir = COLUMNAR_DIR / f"date={date}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            pq.write_table(part, part_dir / f"segment-{meta['index']:06d}.parquet", compression="zstd")
+
+        exported.add(meta["index"])
+
+    COLUMNAR_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = EXPORTED_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(sorted(exported), f)
+    os.replace(tmp, EXPORTED_PATH)
+    return len(pending)
+
+
+# --- Query ---
+
+def _filter_expression(filters: dict, start: str | None, end: str | None):
+    expr = None
+
+    def add(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    for key, value in filters.items():
+        if value:
+            add(ds.field(FILTER_COLUMNS[key]) == value)
+
+    if start:
+        start_ts = parse_ts(start)
+        add(ds.field("date") >= start_ts.strftime("%Y-%m-%d"))
+        add(ds.field("timestamp_utc") >= pa.scalar(start_ts, type=SCHEMA.field("timestamp_utc").type))
+    if end:
+        end_ts = parse_ts(end)
+        add(ds.field("date") <= end_ts.strftime("%Y-%m-%d"))
+        add(ds.field("timestamp_utc") <= pa.scalar(end_ts, type=SCHEMA.field("timestamp_utc").type))
+
+    return expr
+
+
+def _scan(filters: dict, start: str | None, end: str | None, columns: list[str] | None) -> pa.Table:
+    export_sealed_segments()
+    expr = _filter_expression(filters, start, end)
+    tables = []
+
+    if COLUMNAR_DIR.exists() and any(COLUMNAR_DIR.glob("date=*/*.parquet")):
+        dataset = ds.dataset(
+            COLUMNAR_DIR,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+            # Explicit schema: files exported before a column was added read it as null
+            schema=SCHEMA.append(pa.field("date", pa.string())),
+            exclude_invalid_files=True,
+        )
+        tables.append(dataset.to_table(columns=columns, filter=expr))
+
+    # Active (unsealed) segment is small: parse it and apply the same filter
+    active = [
+        e for e in (audit_codec.project(EXPORT_FIELDS)(l) for l in audit_store.iter_segment_lines(audit_store.LOG_PATH))
+        if not audit_store.is_header(e)
+    ]
+    if active:
+        live = ds.dataset(_events_to_table(active)).to_table(columns=columns, filter=expr)
+        tables.append(live)
+
+    if not tables:
+        return _events_to_table([]).select(columns) if columns else _events_to_table([])
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def query(
+    filters: dict | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    group_by: list[str] | None = None,
+    columns: list[str] | None = None,
+    limit: int = 1000,
+) -> dict:
+    """
+    filters: {"endpoint"|"role"|"risk_level"|"action"|"route": value}
+    start / end: ISO-8601 UTC timestamps
+    group_by: subset of endpoint, role, risk_level, action, route, date → counts + latency stats
+    """
+    filters = {k: v for k, v in (filters or {}).items() if k in FILTER_COLUMNS and v}
+
+    if group_by:
+        keys = [GROUP_COLUMNS[g] for g in group_by]
+        table = _scan(filters, start, end, columns=keys + ["processing_latency_ms"])
+        result = table.group_by(keys).aggregate([
+            ("processing_latency_ms", "count", pc.CountOptions(mode="all")),
+            ("processing_latency_ms", "mean"),
+            ("processing_latency_ms", "max"),
+        ]).rename_columns(keys + ["count", "latency_ms_mean", "latency_ms_max"])
+        rows = result.sort_by([("count", "descending")]).to_pylist()
+        return {"groups": rows[:limit], "total": sum(r["count"] for r in rows)}
+
+    if columns:
+        columns = [c for c in columns if c in SCHEMA.names or c == "date"]
+    table = _scan(filters, start, end, columns=columns or None)
+    total = table.num_rows
+    if "timestamp_utc" in table.column_names:
+        table = table.sort_by([("timestamp_utc", "descending")])
+    rows = table.slice(0, limit).to_pylist()
+    for r in rows:
+        if isinstance(r.get("timestamp_utc"), datetime):
+            r["timestamp_utc"] = r["timestamp_utc"].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return {"rows": rows, "total": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PrivGuard columnar audit export")
+    parser.add_argument("command", choices=["export"], help="Export sealed audit segments to Parquet")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"Exported {export_sealed_segments()} segment(s) to {COLUMNAR_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 import json
 import hashlib
+import os
 import time
 import uuid
 from pathlib import Path
 from datetime import datetime
 
+from . import audit_codec, audit_store
+
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
 POLICY_PATH = BASE_DIR / "audit_policy.json"
-LOG_PATH = BASE_DIR / "audit_log.jsonl"
+LOG_PATH = audit_store.LOG_PATH
 
 # Load audit policy
 with open(POLICY_PATH, "r") as f:
@@ -16,30 +19,160 @@ with open(POLICY_PATH, "r") as f:
 
 HASH_ALGO = hashlib.sha256
 
+# Where the hash chain lives: "file" (this node's segmented log, default) or
+# "redis" (one chain shared by every gateway node, see audit_redis.py)
+BACKEND = os.getenv("PRIVGUARD_AUDIT_BACKEND", AUDIT_POLICY.get("storage", {}).get("backend", "file")).lower()
+
+# All a chain-head lookup needs from the last line
+HEAD_FIELDS = ("segment_header", "previous_segment_final_hash", "current_log_hash")
+
+# Cached chain head: (hash, active file size it was read at)
+_chain_head: tuple[str, int] | None = None
+
+# Callbacks notified with each event after it is appended (e.g. live SSE stream)
+_listeners = []
+
+
+def add_listener(callback):
+    _listeners.append(callback)
+
 
 def _hash(data: str) -> str:
     return HASH_ALGO(data.encode("utf-8")).hexdigest()
 
 
+def _notify(event: dict):
+    for callback in _listeners:
+        try:
+            callback(event)
+        except Exception as e:
+            print("⚠️ Audit listener failed:", e)
+
+
+def encode_sealed(event: dict, previous_hash: str) -> tuple[str, str]:
+    """
+    Links `event` to `previous_hash`, sets its current_log_hash (hash of event +
+    previous hash) and returns (hash, line to write). The event is encoded once.
+    """
+    event.pop("current_log_hash", None)
+    event["previous_log_hash"] = previous_hash
+    event_serialized = audit_codec.canonical(event)
+    current_hash = _hash(previous_hash + event_serialized)
+    event["current_log_hash"] = current_hash
+    return current_hash, audit_codec.sealed_line(event_serialized, current_hash)
+
+
+def seal_event(event: dict, previous_hash: str) -> str:
+    """Links `event` to `previous_hash` and sets its current_log_hash (hash of event + previous hash)."""
+    return encode_sealed(event, previous_hash)[0]
+
+
+def _active_size() -> int:
+    return LOG_PATH.stat().st_size if LOG_PATH.exists() else -1
+
+
 def _get_last_log_hash() -> str:
     """
     Returns the hash of the last log entry.
     If no logs exist, return a genesis hash.
+    Uses the cached head unless the active segment changed underneath us;
+    otherwise reads only the tail of the active segment.
     """
-    if not LOG_PATH.exists():
-        return _hash("GENESIS")
+    if _chain_head is not None and _chain_head[1] == _active_size():
+        return _chain_head[0]
 
-    with open(LOG_PATH, "r") as f:
-        last_line = None
-        for line in f:
-            last_line = line
+    for line in reversed(audit_store.read_tail_lines(LOG_PATH, 2)):
+        entry = audit_codec.project(HEAD_FIELDS)(line)
+        if audit_store.is_header(entry):
+            return entry["previous_segment_final_hash"]
+        return entry["current_log_hash"]
 
-    if last_line:
-        return json.loads(last_line)["current_log_hash"]
+    # Active segment empty / missing: continue from the last sealed segment
+    segments = audit_store.sealed_segments()
+    if segments:
+        return segments[-1]["final_hash"]
 
     return _hash("GENESIS")
 
 
+def _rotate_if_needed(head: str):
+    """Seals the active segment by size/age and opens a new one chained to `head`."""
+    if not audit_store.needs_rotation():
+        return
+    meta = audit_store.seal_active_segment(head)
+    if meta is not None:
+        audit_store.write_active_header(meta["index"] + 1, head)
+
+
+def chain_head() -> str:
+    """Hash the next local event will chain from."""
+    return _get_last_log_hash()
+
+
+SEALED_FIELDS = ("event_id", "previous_log_hash", "current_log_hash")
+
+
+def append_sealed(lines: list[str]):
+    """
+    Appends already-sealed event lines (e.g. drained from a shared backend) to
+    the local segmented log, as written. Each must chain from the current head.
+    """
+    global _chain_head
+
+    links = audit_codec.project(SEALED_FIELDS)
+    for line in lines:
+        event = links(line)
+        head = _get_last_log_hash()
+        if event.get("previous_log_hash") != head:
+            raise ValueError(f"Chain discontinuity at event {event.get('event_id')}: expected previous hash {head}")
+        _rotate_if_needed(head)
+        with open(LOG_PATH, "a") as f:
+            f.write(line + "\n")
+        _chain_head = (event["current_log_hash"], _active_size())
+
+
+class FileAuditBackend:
+    """Hash chain in this node's segmented audit log (single writer: the audit executor)."""
+
+    def append(self, event: dict):
+        global _chain_head
+
+        previous_hash = _get_last_log_hash()
+        _rotate_if_needed(previous_hash)
+
+        current_hash, line = encode_sealed(event, previous_hash)
+
+        # Append-only write
+        with open(LOG_PATH, "a") as f:
+            f.write(line + "\n")
+
+        _chain_head = (current_hash, _active_size())
+        _notify(event)
+
+    def close(self):
+        pass
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if BACKEND == "redis":
+            from .audit_redis import RedisAuditBackend
+            _backend = RedisAuditBackend()
+        else:
+            _backend = FileAuditBackend()
+    return _backend
+
+
+def close_backend():
+    """Flushes pending appends (shared backends batch them)."""
+    if _backend is not None:
+        _backend.close()
+
+
 def log_event(
     *,
     user_role: str,
@@ -48,15 +181,20 @@ def log_event(
     action_taken: str,
     routing_decision: str,
     request_hash: str,
-    processing_latency_ms: int | None = None
+    processing_latency_ms: int | None = None,
+    endpoint: str | None = None,
+    stage_latency_ms: dict | None = None,
+    cache_hits: dict | None = None,
+    document: dict | None = None,
+    degraded: list | None = None
 ):
     """
     Writes a single audit log entry.
     Privacy-safe, append-only, hash-chained.
+    Optional fields (entry point, per-stage timings, cache hit flags,
+    document size / page count, degraded stages) are only written when given.
     """
 
-    previous_hash = _get_last_log_hash()
-
     event = {
         "event_id": str(uuid.uuid4()),
         "timestamp_utc": datetime.utcnow().isoformat() + "Z",
@@ -66,20 +204,20 @@ def log_event(
         "policy_action": action_taken,
         "routing_decision": routing_decision,
         "request_hash": request_hash,
-        "previous_log_hash": previous_hash
+        "previous_log_hash": None  # set when the event is chained
     }
 
     if processing_latency_ms is not None:
         event["processing_latency_ms"] = processing_latency_ms
-
-    # Create current hash (hash of event + previous hash)
-    event_serialized = json.dumps(event, sort_keys=True)
-    current_hash = _hash(previous_hash + event_serialized)
-
-    event["current_log_hash"] = current_hash
-
-    # Append-only write
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(event) + "\n")
-
-
+    if endpoint is not None:
+        event["endpoint"] = endpoint
+    if stage_latency_ms:
+        event["stage_latency_ms"] = stage_latency_ms
+    if cache_hits:
+        event["cache_hits"] = cache_hits
+    if document is not None:
+        event["document"] = document
+    if degraded:
+        event["degraded"] = degraded
+
+    get_backend().append(event)
@@ -0,0 +1,166 @@
+"""
+Shared audit chain on a Redis-compatible server.
+
+Every gateway node appends to one hash chain: events are buffered briefly
+and committed in batches with an optimistic transaction (WATCH the chain
+head, chain the batch from it, MULTI/EXEC head + list append; retry if
+another node committed first). The list is then drained, in order, into
+the segmented file log on one node, where verification, columnar export
+and the SOC readers work unchanged.
+
+Usage:
+    python -m Security.audit_redis init    # seed the shared head from the local log
+    python -m Security.audit_redis drain   # move committed events into the local log
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import redis
+
+from . import audit_codec, audit_logger
+
+REDIS_URL = os.getenv("PRIVGUARD_REDIS_URL", "redis://localhost:6379/0")
+KEY_PREFIX = os.getenv("PRIVGUARD_REDIS_PREFIX", "privguard")
+HEAD_KEY = f"{KEY_PREFIX}:audit:head"
+LOG_KEY = f"{KEY_PREFIX}:audit:log"
+
+BATCH_MAX = 100
+FLUSH_INTERVAL_S = 0.05
+RETRY_BACKOFF_S = 1.0
+DRAIN_BATCH = 1000
+
+# Set on exactly one node to keep its local log (and the SOC readers) current
+DRAIN_INTERVAL_S = float(os.getenv("PRIVGUARD_AUDIT_DRAIN_INTERVAL_S", "0"))
+
+
+def connect(url: str = REDIS_URL) -> redis.Redis:
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+class RedisAuditBackend:
+
+    def __init__(self, client: redis.Redis | None = None):
+        self.client = client or connect()
+        self._pending: list[dict] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-redis-flush", daemon=True)
+        self._thread.start()
+
+        if DRAIN_INTERVAL_S > 0:
+            threading.Thread(target=self._drain_loop, name="audit-redis-drain", daemon=True).start()
+
+    def _drain_loop(self):
+        while not self._closed:
+            try:
+                drain(self.client)
+            except (redis.RedisError, ValueError) as e:
+                print(f"⚠️ Audit drain failed: {e}")
+            time.sleep(DRAIN_INTERVAL_S)
+
+    def append(self, event: dict):
+        with self._cond:
+            self._pending.append(event)
+            if len(self._pending) >= BATCH_MAX:
+                self._cond.notify()
+
+    def _take(self) -> list[dict]:
+        with self._cond:
+            if not self._pending and not self._closed:
+                self._cond.wait(FLUSH_INTERVAL_S)
+            batch, self._pending = self._pending[:BATCH_MAX], self._pending[BATCH_MAX:]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                if self._closed:
+                    return
+                continue
+            try:
+                self.commit(batch)
+            except redis.RedisError as e:
+                print(f"⚠️ Audit commit to Redis failed, retrying: {e}")
+                with self._cond:
+                    self._pending[:0] = batch
+                time.sleep(RETRY_BACKOFF_S)
+
+    def commit(self, batch: list[dict]):
+        """Chains `batch` from the shared head and appends it atomically."""
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(HEAD_KEY)
+                    head = pipe.get(HEAD_KEY) or audit_logger.chain_head()
+                    lines = []
+                    for event in batch:
+                        head, line = audit_logger.encode_sealed(event, head)
+                        lines.append(line)
+                    pipe.multi()
+                    pipe.set(HEAD_KEY, head)
+                    pipe.rpush(LOG_KEY, *lines)
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue  # another node moved the head; re-chain the batch
+
+        for event in batch:
+            audit_logger._notify(event)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+
+def init(client: redis.Redis | None = None) -> str:
+    """Seeds the shared head from this node's log (no-op if already set)."""
+    client = client or connect()
+    client.setnx(HEAD_KEY, audit_logger.chain_head())
+    return client.get(HEAD_KEY)
+
+
+def drain(client: redis.Redis | None = None) -> int:
+    """
+    Moves committed events into the local segmented log, oldest first. Events
+    are trimmed from Redis only after they are written; events already in the
+    local log (a drain interrupted before trimming) are skipped.
+    """
+    client = client or connect()
+    drained = 0
+    while True:
+        lines = client.lrange(LOG_KEY, 0, DRAIN_BATCH - 1)
+        if not lines:
+            return drained
+
+        head = audit_logger.chain_head()
+        current = audit_codec.project(("current_log_hash",))
+        pending = lines
+        for i, line in enumerate(lines):
+            if current(line).get("current_log_hash") == head:
+                pending = lines[i + 1:]
+                break
+
+        audit_logger.append_sealed(pending)
+        client.ltrim(LOG_KEY, len(lines), -1)
+        drained += len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PrivGuard shared audit chain (Redis)")
+    parser.add_argument("command", choices=["init", "drain"])
+    args = parser.parse_args()
+
+    if args.command == "init":
+        print(f"Shared chain head: {init()}")
+    elif args.command == "drain":
+        print(f"Drained {drain()} event(s) into {audit_logger.LOG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
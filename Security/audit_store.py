@@ -0,0 +1,301 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from . import audit_codec
+
+# Segmented storage for the hash-chained audit log.
+#
+# - audit_log.jsonl is always the *active* segment (appends go here).
+# - When it grows past `segment_max_bytes` or older than `segment_max_age_hours`
+#   it is sealed into audit_segments/audit_log.<n>.jsonl[.gz].
+# - Every segment starts with a header line carrying the previous segment's
+#   final hash, so each segment can be verified on its own and the chain
+#   stays continuous across rotations.
+# - audit_segments/index.json records per-segment metadata (time range,
+#   event count, boundary hashes) so readers only open the segments they need.
+
+BASE_DIR = Path(__file__).resolve().parent
+POLICY_PATH = BASE_DIR / "audit_policy.json"
+LOG_PATH = BASE_DIR / "audit_log.jsonl"
+
+with open(POLICY_PATH, "r") as f:
+    STORAGE_POLICY = json.load(f).get("storage", {})
+
+SEGMENT_DIR = BASE_DIR / STORAGE_POLICY.get("segment_dir", "audit_segments")
+INDEX_PATH = SEGMENT_DIR / "index.json"
+SEGMENT_MAX_BYTES = int(STORAGE_POLICY.get("segment_max_bytes", 10 * 1024 * 1024))
+SEGMENT_MAX_AGE_HOURS = STORAGE_POLICY.get("segment_max_age_hours", 24)
+COMPRESS_SEALED = bool(STORAGE_POLICY.get("compress_sealed_segments", True))
+
+
+def _utc_now_iso() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def is_header(entry: dict) -> bool:
+    return entry.get("segment_header") is True
+
+
+# --- Segment index ---
+
+def load_index() -> dict:
+    if not INDEX_PATH.exists():
+        return {"segments": []}
+    with open(INDEX_PATH, "r") as f:
+        return json.load(f)
+
+
+def _save_index(index: dict):
+    SEGMENT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = INDEX_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, INDEX_PATH)
+
+
+def sealed_segments() -> list[dict]:
+    """Sealed segment metadata, oldest first."""
+    return load_index()["segments"]
+
+
+def segment_path(meta: dict) -> Path:
+    return SEGMENT_DIR / meta["file"]
+
+
+# --- Low-level line readers ---
+
+def _open_segment(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    return open(path, "r")
+
+
+def iter_segment_lines(path: Path):
+    """Raw non-empty lines of one segment, oldest first."""
+    if not path.exists():
+        return
+    with _open_segment(path) as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def read_tail_lines(path: Path, n: int, block_size: int = 64 * 1024) -> list[str]:
+    """Last `n` non-empty lines of an uncompressed file, read backwards from the end."""
+    if n <= 0 or not path.exists():
+        return []
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buffer = b""
+        lines: list[bytes] = []
+
+        while pos > 0 and len(lines) <= n:
+            read = min(block_size, pos)
+            pos -= read
+            f.seek(pos)
+            buffer = f.read(read) + buffer
+            lines = [l for l in buffer.split(b"\n") if l.strip()]
+
+    return [l.decode("utf-8") for l in lines[-n:]]
+
+
+def _parse(line: str, fields: tuple[str, ...] | None = None) -> dict | None:
+    """Decodes one line; with `fields`, only those top-level fields (see audit_codec.project)."""
+    try:
+        return audit_codec.project(fields)(line) if fields else audit_codec.loads(line)
+    except audit_codec.DecodeError:
+        return None
+
+
+def _reader_fields(fields) -> tuple[tuple[str, ...] | None, set]:
+    """Fields to decode for a projected read (plus what the reader itself needs), and the extras to drop."""
+    if fields is None:
+        return None, set()
+    wanted = tuple(fields)
+    extra = {"segment_header", "timestamp_utc"} - set(wanted)
+    return wanted + tuple(sorted(extra)), extra
+
+
+def _strip(entry: dict, extra: set) -> dict:
+    for key in extra:
+        entry.pop(key, None)
+    return entry
+
+
+# --- Active segment ---
+
+def active_header() -> dict | None:
+    """Header of the active segment (None for a legacy, header-less file)."""
+    if not LOG_PATH.exists():
+        return None
+    with open(LOG_PATH, "r") as f:
+        first = f.readline()
+    entry = _parse(first) if first.strip() else None
+    return entry if entry and is_header(entry) else None
+
+
+def write_active_header(segment_index: int, previous_final_hash: str):
+    header = {
+        "segment_header": True,
+        "segment_index": segment_index,
+        "created_utc": _utc_now_iso(),
+        "previous_segment_final_hash": previous_final_hash,
+    }
+    with open(LOG_PATH, "a") as f:
+        f.write(audit_codec.dumps(header) + "\n")
+
+
+def next_segment_index() -> int:
+    segments = sealed_segments()
+    return segments[-1]["index"] + 1 if segments else 1
+
+
+def _active_age(header: dict | None) -> timedelta | None:
+    created = header.get("created_utc") if header else None
+    if created is None:
+        # Legacy file: fall back to the first event's timestamp
+        for line in iter_segment_lines(LOG_PATH):
+            entry = _parse(line)
+            if entry and not is_header(entry):
+                created = entry.get("timestamp_utc")
+            break
+    if not created:
+        return None
+    return datetime.utcnow() - datetime.fromisoformat(created.rstrip("Z"))
+
+
+def needs_rotation() -> bool:
+    if not LOG_PATH.exists():
+        return False
+
+    if LOG_PATH.stat().st_size >= SEGMENT_MAX_BYTES:
+        return True
+
+    if SEGMENT_MAX_AGE_HOURS:
+        age = _active_age(active_header())
+        if age is not None and age >= timedelta(hours=SEGMENT_MAX_AGE_HOURS):
+            return True
+
+    return False
+
+
+def seal_active_segment(final_hash: str) -> dict | None:
+    """
+    Moves the active segment into audit_segments/ (optionally gzip-compressed)
+    and records it in the index. Returns the new segment metadata.
+    """
+    if not LOG_PATH.exists():
+        return None
+
+    header = active_header()
+    index_no = header["segment_index"] if header else next_segment_index()
+    previous_final_hash = header["previous_segment_final_hash"] if header else None
+
+    count = 0
+    first_ts = last_ts = None
+    for line in iter_segment_lines(LOG_PATH):
+        entry = _parse(line, ("segment_header", "previous_log_hash", "timestamp_utc"))
+        if not entry or is_header(entry):
+            continue
+        count += 1
+        if previous_final_hash is None:
+            previous_final_hash = entry.get("previous_log_hash")
+        first_ts = first_ts or entry.get("timestamp_utc")
+        last_ts = entry.get("timestamp_utc")
+
+    if count == 0:
+        # Nothing worth sealing (header only)
+        return None
+
+    SEGMENT_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"audit_log.{index_no:06d}.jsonl"
+
+    if COMPRESS_SEALED:
+        name += ".gz"
+        with open(LOG_PATH, "rb") as src, gzip.open(SEGMENT_DIR / name, "wb") as dst:
+            while chunk := src.read(1024 * 1024):
+                dst.write(chunk)
+        os.remove(LOG_PATH)
+    else:
+        os.replace(LOG_PATH, SEGMENT_DIR / name)
+
+    meta = {
+        "index": index_no,
+        "file": name,
+        "compressed": COMPRESS_SEALED,
+        "event_count": count,
+        "first_timestamp_utc": first_ts,
+        "last_timestamp_utc": last_ts,
+        "previous_segment_final_hash": previous_final_hash,
+        "final_hash": final_hash,
+        "sealed_utc": _utc_now_iso(),
+    }
+
+    index = load_index()
+    index["segments"].append(meta)
+    _save_index(index)
+    return meta
+
+
+# --- Readers ---
+
+def _segment_in_range(meta: dict, since: str | None, until: str | None) -> bool:
+    if since and meta.get("last_timestamp_utc") and meta["last_timestamp_utc"] < since:
+        return False
+    if until and meta.get("first_timestamp_utc") and meta["first_timestamp_utc"] > until:
+        return False
+    return True
+
+
+def iter_events(since: str | None = None, until: str | None = None, fields=None):
+    """
+    Audit events oldest first, skipping segment headers.
+    `since` / `until` are ISO-8601 UTC strings; sealed segments outside the
+    range are never opened. `fields` projects each event to those keys.
+    """
+    paths = [segment_path(m) for m in sealed_segments() if _segment_in_range(m, since, until)]
+    paths.append(LOG_PATH)
+    decode_fields, extra = _reader_fields(fields)
+
+    for path in paths:
+        for line in iter_segment_lines(path):
+            entry = _parse(line, decode_fields)
+            if not entry or is_header(entry):
+                continue
+            ts = entry.get("timestamp_utc", "")
+            if since and ts < since:
+                continue
+            if until and ts > until:
+                continue
+            yield _strip(entry, extra)
+
+
+def read_recent(limit: int = 50, fields=None) -> list[dict]:
+    """
+    Last `limit` events, newest first. Opens sealed segments only as needed.
+    `fields` projects each event to those keys.
+    """
+    decode_fields, extra = _reader_fields(fields)
+    entries = []
+    for line in reversed(read_tail_lines(LOG_PATH, limit + 1)):
+        entry = _parse(line, decode_fields)
+        if entry and not is_header(entry):
+            entries.append(entry)
+    entries = entries[:limit]
+
+    for meta in reversed(sealed_segments()):
+        if len(entries) >= limit:
+            break
+        older = [
+            e for e in (_parse(l, decode_fields) for l in iter_segment_lines(segment_path(meta)))
+            if e and not is_header(e)
+        ]
+        older.reverse()
+        entries.extend(older[:limit - len(entries)])
+
+    return [_strip(e, extra) for e in entries]
@@ -0,0 +1,298 @@
+"""
+PrivGuard Audit Chain Verifier
+
+Validates the hash chain of the segmented audit log:
+1. Each segment's internal links are verified in parallel (one process per segment).
+2. Segment boundaries are stitched: a segment's first `previous_log_hash`
+   (and its header) must equal the previous segment's final hash.
+3. A signed checkpoint records what has been verified, so later runs only
+   verify new segments / new entries of the active segment. Sealed segments
+   are trusted from the checkpoint only while their file's SHA-256 is unchanged.
+
+Checkpoints are HMAC-SHA256 signed with PRIVGUARD_CHECKPOINT_KEY; without the
+key they are neither written nor trusted (every run is a full verification).
+
+Usage:
+    python -m Security.audit_verifier [--full] [--workers N]
+"""
+
+import argparse
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from . import audit_codec, audit_store
+from .audit_logger import _hash
+
+CHECKPOINT_PATH = audit_store.SEGMENT_DIR / "checkpoint.json"
+GENESIS_HASH = _hash("GENESIS")
+
+
+def _checkpoint_key() -> bytes | None:
+    key = os.getenv("PRIVGUARD_CHECKPOINT_KEY")
+    return key.encode("utf-8") if key else None
+
+
+def _sign(body: dict, key: bytes) -> str:
+    payload = json.dumps(body, sort_keys=True).encode("utf-8")
+    return hmac.new(key, payload, hashlib.sha256).hexdigest()
+
+
+def load_checkpoint() -> dict | None:
+    """Returns the checkpoint body if present and its signature is valid."""
+    key = _checkpoint_key()
+    if key is None or not CHECKPOINT_PATH.exists():
+        return None
+
+    with open(CHECKPOINT_PATH, "r") as f:
+        stored = json.load(f)
+
+    body = stored.get("checkpoint", {})
+    if not hmac.compare_digest(stored.get("signature", ""), _sign(body, key)):
+        print("⚠️ Audit checkpoint signature invalid — ignoring checkpoint")
+        return None
+    return body
+
+
+def _save_checkpoint(body: dict):
+    key = _checkpoint_key()
+    if key is None:
+        return
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"checkpoint": body, "signature": _sign(body, key)}, f, indent=2)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+def file_digest(path) -> str:
+    """SHA-256 of the file as stored (compressed bytes for .gz segments)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Per-segment verification (runs in worker processes) ---
+
+def verify_segment(path: str, start_offset: int = 0, expected_prev: str | None = None, digest: bool = False) -> dict:
+    """
+    Verifies the internal links of one segment.
+    `start_offset` / `expected_prev` resume from a checkpoint (uncompressed files only).
+    `digest` also records the file's SHA-256 (sealed segments, for the checkpoint).
+    """
+    result = {
+        "path": path,
+        "count": 0,
+        "header_prev": None,
+        "first_prev": None,
+        "final_hash": expected_prev,
+        "end_offset": start_offset,
+        "sha256": None,
+        "broken": None,
+    }
+    if not os.path.exists(path):
+        return result
+    if digest:
+        result["sha256"] = file_digest(path)
+
+    opener = gzip.open if path.endswith(".gz") else open
+    prev = expected_prev
+    offset = start_offset
+    line_no = 0
+
+    with opener(path, "rb") as f:
+        if start_offset:
+            f.seek(start_offset)
+
+        for raw in f:
+            offset += len(raw)
+            line_no += 1
+            if not raw.strip():
+                continue
+
+            def broken(reason, event_id=None):
+                result["broken"] = {"segment": path, "line": line_no, "event_id": event_id, "reason": reason}
+
+            try:
+                entry = audit_codec.loads(raw)
+            except audit_codec.DecodeError:
+                broken("unparseable line")
+                break
+
+            if audit_store.is_header(entry):
+                result["header_prev"] = entry.get("previous_segment_final_hash")
+                if prev is not None and prev != result["header_prev"]:
+                    broken("segment header does not match preceding hash")
+                    break
+                prev = result["header_prev"]
+                continue
+
+            event_id = entry.get("event_id")
+            current = entry.pop("current_log_hash", None)
+
+            if result["first_prev"] is None:
+                result["first_prev"] = entry.get("previous_log_hash")
+
+            if prev is not None and entry.get("previous_log_hash") != prev:
+                broken("previous_log_hash does not match preceding entry", event_id)
+                break
+
+            if current != _hash(entry["previous_log_hash"] + audit_codec.canonical(entry)):
+                broken("current_log_hash does not match entry contents", event_id)
+                break
+
+            prev = current
+            result["count"] += 1
+            result["final_hash"] = current
+            result["end_offset"] = offset
+
+    return result
+
+
+# --- Whole-chain verification ---
+
+def verify_chain(full: bool = False, workers: int | None = None) -> dict:
+    started = time.perf_counter()
+    checkpoint = None if full else load_checkpoint()
+    checkpointed = {s["index"]: s for s in (checkpoint or {}).get("segments", [])}
+
+    header = audit_store.active_header()
+    active_index = header["segment_index"] if header else audit_store.next_segment_index()
+
+    # (index, job args | None, checkpointed meta | None)
+    plan = []
+    for meta in audit_store.sealed_segments():
+        path = audit_store.segment_path(meta)
+        cp = checkpointed.get(meta["index"])
+        # index.json alone proves nothing about the file: it must be byte-identical to what was verified
+        if cp and cp["final_hash"] == meta["final_hash"] and path.exists() and cp.get("sha256") == file_digest(path):
+            plan.append((meta["index"], None, cp))
+        else:
+            plan.append((meta["index"], (str(path), 0, None, True), None))
+
+    active_cp = (checkpoint or {}).get("active")
+    log_size = audit_store.LOG_PATH.stat().st_size if audit_store.LOG_PATH.exists() else 0
+    if active_cp and active_cp["index"] == active_index and active_cp["offset"] <= log_size:
+        active_job = (str(audit_store.LOG_PATH), active_cp["offset"], active_cp["final_hash"], False)
+    else:
+        active_cp = None
+        active_job = (str(audit_store.LOG_PATH), 0, None, False)
+    plan.append((active_index, active_job, None))
+
+    jobs = [job for _, job, _ in plan if job is not None]
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(verify_segment, *zip(*jobs)))
+    else:
+        results = [verify_segment(*job) for job in jobs]
+    results_iter = iter(results)
+
+    # Stitch segment boundaries in chain order
+    report = {
+        "ok": True,
+        "verified_events": 0,
+        "checkpointed_events": 0,
+        "segments": len(plan),
+        "chain_starts_at_genesis": None,
+        "first_broken": None,
+    }
+    sealed_final = {m["index"]: m["final_hash"] for m in audit_store.sealed_segments()}
+    prev_final = None
+    new_checkpoint = {"segments": [], "active": None}
+
+    for i, (index, job, cp) in enumerate(plan):
+        is_active = i == len(plan) - 1
+
+        if cp is not None:
+            report["checkpointed_events"] += cp["event_count"]
+            new_checkpoint["segments"].append(cp)
+            prev_final = cp["final_hash"]
+            continue
+
+        res = next(results_iter)
+        report["verified_events"] += res["count"]
+
+        if res["broken"]:
+            report["first_broken"] = res["broken"]
+            break
+
+        resumed = is_active and active_cp is not None
+        if resumed:
+            # Resumed mid-segment from the checkpoint hash: start already stitched
+            report["checkpointed_events"] += active_cp["event_count"]
+            segment_start = prev_final
+        else:
+            segment_start = res["header_prev"] or res["first_prev"]
+
+        if i == 0:
+            if not resumed:
+                report["chain_starts_at_genesis"] = segment_start in (None, GENESIS_HASH)
+        elif prev_final is not None and segment_start is not None and segment_start != prev_final:
+            report["first_broken"] = {
+                "segment": res["path"],
+                "line": 1,
+                "event_id": None,
+                "reason": "segment does not continue from the previous segment's final hash",
+            }
+            break
+
+        if not is_active and res["final_hash"] != sealed_final.get(index):
+            report["first_broken"] = {
+                "segment": res["path"],
+                "line": None,
+                "event_id": None,
+                "reason": "segment final hash does not match index.json",
+            }
+            break
+
+        if res["final_hash"] is not None:
+            prev_final = res["final_hash"]
+
+        if is_active:
+            new_checkpoint["active"] = {
+                "index": index,
+                "offset": res["end_offset"],
+                "final_hash": prev_final,
+                "event_count": res["count"] + (active_cp["event_count"] if active_cp else 0),
+            }
+        else:
+            new_checkpoint["segments"].append({
+                "index": index,
+                "final_hash": res["final_hash"],
+                "event_count": res["count"],
+                "sha256": res["sha256"],
+            })
+
+    report["ok"] = report["first_broken"] is None
+    report["head_hash"] = prev_final
+
+    if report["ok"]:
+        new_checkpoint["verified_utc"] = datetime.utcnow().isoformat() + "Z"
+        new_checkpoint["head_hash"] = prev_final
+        _save_checkpoint(new_checkpoint)
+        report["checkpoint_written"] = _checkpoint_key() is not None
+
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the PrivGuard audit hash chain")
+    parser.add_argument("--full", action="store_true", help="Ignore checkpoints and verify everything")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    report = verify_chain(full=args.full, workers=args.workers)
+    print(json.dumps(report, indent=2))
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+PrivGuard Load Generator
+
+Concurrent replay of the red-team dataset (attacks.csv) against a running
+gateway, for capacity planning before a rollout.
+
+- Role mix follows the distribution recorded in the audit log
+  (falls back to the roles in attacks.csv when the log is empty).
+- Concurrency and request rate are configurable.
+- Reports throughput, error rate, latency percentiles and the same
+  policy-compliance check the Streamlit "Vulnerability Scanner" uses.
+
+Usage:
+    python -m Security.load_generator --url http://127.0.0.1:8000 \
+        --requests 500 --concurrency 32 --rate 50
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from Security.audit_store import iter_events
+
+BASE_DIR = Path(__file__).resolve().parent
+ATTACKS_PATH = BASE_DIR / "attacks.csv"
+
+
+def load_attacks(path: Path = ATTACKS_PATH) -> list[dict]:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def load_role_mix(attacks: list[dict], since: str | None = None) -> Counter:
+    """
+    Role distribution taken from the audit log (optionally only events since `since`).
+    Falls back to the roles present in attacks.csv.
+    """
+    mix = Counter(e.get("user_role", "student").lower() for e in iter_events(since=since, fields=("user_role",)))
+
+    if not mix:
+        mix = Counter(a["role"].lower() for a in attacks)
+    return mix
+
+
+def is_compliant(expected: str, actual_action: str) -> bool:
+    """Same loose match as the Streamlit scanner (BLOCK ~ BLOCKED_BY_POLICY)."""
+    expected = expected.upper()
+    actual = actual_action.upper()
+    return expected in actual or (expected == "ALLOW" and "ROUTED" in actual)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class LoadGenerator:
+
+    def __init__(
+        self,
+        url: str,
+        attacks: list[dict],
+        role_mix: Counter,
+        concurrency: int = 16,
+        rate: float | None = None,
+        endpoint: str = "/proxy",
+        timeout: float = 30.0,
+        seed: int | None = None,
+    ):
+        self.url = url.rstrip("/")
+        self.endpoint = endpoint
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+        self.roles = list(role_mix.keys())
+        self.role_weights = list(role_mix.values())
+
+        self.attacks_by_role: dict[str, list[dict]] = {}
+        for a in attacks:
+            self.attacks_by_role.setdefault(a["role"].lower(), []).append(a)
+        self.attacks = attacks
+
+        self.results: list[dict] = []
+
+    def _pick(self) -> tuple[str, dict, bool]:
+        """
+        Pick (role, attack, checkable).
+        Compliance is only checked when the attack row was written for that role.
+        """
+        role = self.rng.choices(self.roles, weights=self.role_weights, k=1)[0]
+        candidates = self.attacks_by_role.get(role)
+        if candidates:
+            return role, self.rng.choice(candidates), True
+        return role, self.rng.choice(self.attacks), False
+
+    async def _send(self, client: httpx.AsyncClient, role: str, attack: dict, checkable: bool):
+        payload = {"text": attack["prompt"], "user_role": role}
+        headers = {"x-user-role": role}
+
+        start = time.perf_counter()
+        try:
+            resp = await client.post(f"{self.url}{self.endpoint}", json=payload, headers=headers)
+            latency_ms = (time.perf_counter() - start) * 1000
+            ok = resp.status_code < 400
+            actual = resp.json().get("action", "ERROR") if ok else "ERROR"
+            error = None if ok else f"HTTP {resp.status_code}"
+        except (httpx.HTTPError, ValueError) as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            ok, actual, error = False, "ERROR", type(e).__name__
+
+        compliant = None
+        if ok and checkable:
+            compliant = is_compliant(attack["expected_action"], actual)
+
+        self.results.append({
+            "attack_id": attack["attack_id"],
+            "role": role,
+            "ok": ok,
+            "error": error,
+            "latency_ms": latency_ms,
+            "actual": actual,
+            "compliant": compliant,
+        })
+
+    async def run(self, total_requests: int) -> dict:
+        sem = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        interval = 1.0 / self.rate if self.rate else 0.0
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+
+            async def worker(role, attack, checkable):
+                async with sem:
+                    await self._send(client, role, attack, checkable)
+
+            tasks = []
+            started = time.perf_counter()
+            for i in range(total_requests):
+                # Open-loop pacing: request i is scheduled at started + i * interval
+                if interval:
+                    delay = started + i * interval - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(worker(*self._pick())))
+
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        return self.summarize(elapsed)
+
+    def summarize(self, elapsed_s: float) -> dict:
+        total = len(self.results)
+        errors = [r for r in self.results if not r["ok"]]
+        latencies = sorted(r["latency_ms"] for r in self.results if r["ok"])
+        checked = [r for r in self.results if r["compliant"] is not None]
+        failed = sorted({r["attack_id"] for r in checked if not r["compliant"]})
+
+        return {
+            "requests": total,
+            "elapsed_s": round(elapsed_s, 3),
+            "throughput_rps": round(total / elapsed_s, 2) if elapsed_s else 0.0,
+            "error_rate": round(len(errors) / total, 4) if total else 0.0,
+            "errors": dict(Counter(r["error"] for r in errors)),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p90": round(percentile(latencies, 90), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+            "role_mix": dict(Counter(r["role"] for r in self.results)),
+            "compliance": {
+                "checked": len(checked),
+                "passed": sum(1 for r in checked if r["compliant"]),
+                "pass_rate": round(sum(1 for r in checked if r["compliant"]) / len(checked), 4) if checked else None,
+                "failed_attack_ids": failed,
+            },
+        }
+
+
+def print_report(summary: dict):
+    lat = summary["latency_ms"]
+    comp = summary["compliance"]
+    print("\n=== PrivGuard Load Test ===")
+    print(f"Requests:    {summary['requests']} in {summary['elapsed_s']}s")
+    print(f"Throughput:  {summary['throughput_rps']} req/s")
+    print(f"Error rate:  {summary['error_rate'] * 100:.2f}% {summary['errors'] or ''}")
+    print(f"Latency ms:  p50={lat['p50']} p90={lat['p90']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    print(f"Role mix:    {summary['role_mix']}")
+    if comp["checked"]:
+        print(f"Compliance:  {comp['passed']}/{comp['checked']} ({comp['pass_rate'] * 100:.0f}%)")
+        if comp["failed_attack_ids"]:
+            print(f"  Failing:   {', '.join(comp['failed_attack_ids'])}")
+    else:
+        print("Compliance:  no role-matched attacks were sent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PrivGuard concurrent load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Gateway base URL")
+    parser.add_argument("--endpoint", default="/proxy", help="Endpoint to target")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max in-flight requests")
+    parser.add_argument("--rate", type=float, default=None, help="Target request rate (req/s); unlimited if omitted")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    parser.add_argument("--attacks", type=Path, default=ATTACKS_PATH, help="Attack dataset CSV")
+    parser.add_argument("--role-mix-since", default=None, help="Only use audit events since this ISO timestamp for the role mix")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    attacks = load_attacks(args.attacks)
+    role_mix = load_role_mix(attacks, args.role_mix_since)
+
+    generator = LoadGenerator(
+        url=args.url,
+        attacks=attacks,
+        role_mix=role_mix,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        endpoint=args.endpoint,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+    summary = asyncio.run(generator.run(args.requests))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+
+
+if __name__ == "__main__":
+    main()
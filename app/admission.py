@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.policy import POLICY
+
+# Admission control for the gateway.
+# Bounds in-flight work per endpoint and per role (role_policies in policy.json),
+# queues excess requests for up to `queue_timeout_s`, and rejects with
+# 429 + Retry-After when saturated so interactive roles keep predictable latency.
+# The role slot is taken before the endpoint slot: a request queued behind its
+# own (saturated) role holds nothing other roles need. Roles without
+# max_concurrent_requests get `default_role_max_concurrent`; roles missing from
+# role_policies share one limiter of that size.
+
+DEFAULT_ADMISSION = {
+    "enabled": True,
+    "queue_timeout_s": 5,
+    "retry_after_s": 2,
+    "max_prompt_chars": 200_000,
+    "max_upload_bytes": 25 * 1024 * 1024,
+    "default_role_max_concurrent": 8,
+    "endpoints": {},
+}
+
+# Queue-wait samples kept per limiter for percentile metrics
+WAIT_SAMPLES = 1024
+
+
+class Limiter:
+    """Concurrency slot pool with a bounded wait queue and wait-time metrics."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int | None = None):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waits_ms: deque = deque(maxlen=WAIT_SAMPLES)
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.max_queue is not None and self._sem.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        start = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.queued -= 1
+
+        self._waits_ms.append((time.perf_counter() - start) * 1000)
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._sem.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits_ms)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_wait_ms": {
+                "p50": round(waits[len(waits) // 2], 2) if waits else 0.0,
+                "p95": round(waits[int(len(waits) * 0.95)], 2) if waits else 0.0,
+                "max": round(waits[-1], 2) if waits else 0.0,
+            },
+        }
+
+
+class AdmissionController:
+
+    def __init__(self, policy: dict = POLICY):
+        config = {**DEFAULT_ADMISSION, **policy.get("admission_control", {})}
+        self.enabled = config["enabled"]
+        self.queue_timeout_s = float(config["queue_timeout_s"])
+        self.retry_after_s = int(config["retry_after_s"])
+        self.max_prompt_chars = config["max_prompt_chars"]
+        self.max_upload_bytes = config["max_upload_bytes"]
+
+        self.endpoint_limits = {
+            endpoint: Limiter(endpoint, cfg["max_concurrent"], cfg.get("max_queue"))
+            for endpoint, cfg in config["endpoints"].items()
+        }
+        default_role_limit = config["default_role_max_concurrent"]
+        self.role_limits = {
+            role: Limiter(role, rp.get("max_concurrent_requests", default_role_limit))
+            for role, rp in policy.get("role_policies", {}).items()
+        }
+        # Shared by every role name not in role_policies (the header is client-supplied)
+        self.default_role_limit = Limiter("default", default_role_limit)
+
+    def _reject(self, detail: str):
+        raise HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after_s)},
+        )
+
+    def role_limiter(self, role: str) -> Limiter:
+        return self.role_limits.get((role or "student").lower(), self.default_role_limit)
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str, role: str):
+        """Holds a role slot, then an endpoint slot, for the duration of the request."""
+        if not self.enabled:
+            yield
+            return
+
+        deadline = time.monotonic() + self.queue_timeout_s
+        acquired = []
+        try:
+            for limiter in (self.role_limiter(role), self.endpoint_limits.get(endpoint)):
+                if limiter is None:
+                    continue
+                if not await limiter.acquire(deadline - time.monotonic()):
+                    self._reject(f"Gateway saturated ({limiter.name}); retry later")
+                acquired.append(limiter)
+
+            yield
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    def check_prompt_size(self, text: str):
+        if self.enabled and self.max_prompt_chars and len(text) > self.max_prompt_chars:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Prompt exceeds {self.max_prompt_chars} characters",
+            )
+
+    @property
+    def upload_limit(self) -> int | None:
+        """Max upload bytes, enforced while the body streams (app/uploads.py)."""
+        return self.max_upload_bytes if self.enabled and self.max_upload_bytes else None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "endpoints": {name: l.stats() for name, l in self.endpoint_limits.items()},
+            "roles": {
+                **{name: l.stats() for name, l in self.role_limits.items()},
+                self.default_role_limit.name: self.default_role_limit.stats(),
+            },
+        }
+
+
+admission = AdmissionController()
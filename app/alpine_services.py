@@ -1,4 +1,6 @@
+import asyncio
 import requests
+import httpx
 import time
 import os
 from dotenv import load_dotenv  # pip install python-dotenv
@@ -6,6 +8,10 @@ from typing import Dict, List, Literal, Optional
 
 load_dotenv()
 
+class AlpineUnavailable(Exception):
+    pass
+
+
 class PrivGuardGateway:
     
     '''
@@ -23,6 +29,9 @@ class PrivGuardGateway:
             "Content-Type": "application/json"
         })
 
+        # Async client for the gateway's event loop (created lazily, see aclose)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
         # Print status for your own sanity during the demo
         mode_msg = "DEMO_MODE (Simulated)" if self.api_key == "DEMO_MODE" else "LIVE MODE (Real API)"
         print(f"[Gateway] Initialized in {mode_msg}")
@@ -70,6 +79,71 @@ class PrivGuardGateway:
             print(f"[PrivGuard Error] Upstream API failed: {e}")
             return {"error": str(e), "private_phrases": []}
 
+    async def detect_pii_async(self, text: str, constitution: str = "HEALTH") -> Dict:
+
+        '''
+        Awaitable version of detect_pii for the async gateway pipeline
+        '''
+
+        if self.api_key == "DEMO_MODE":
+            print("   [Gateway] Simulating upstream API latency (1.0s)...")
+            await asyncio.sleep(1.0)
+            return {
+                "private_phrases": ["John Doe", "01/15/1980"],
+                "request_id": "demo_req_12345"
+            }
+
+        client = self._get_async_client()
+
+        endpoint = f"{self.base_url}/extract"
+        payload = {
+            "document": text,
+            "type": constitution
+        }
+
+        try:
+            response = await client.post(endpoint, json=payload)
+
+            if response.status_code == 429:
+                print("[!] Rate Limit Hit.")
+                return {"error": "RATE_LIMIT", "private_phrases": []}
+
+            if response.status_code == 401:
+                print("[!] Error: Invalid API Key.")
+                return {"error": "AUTH_ERROR", "private_phrases": []}
+
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPError as e:
+            print(f"[PrivGuard Error] Upstream API failed: {e}")
+            return {"error": str(e), "private_phrases": []}
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers={"X-API-KEY": self.api_key, "Content-Type": "application/json"},
+                timeout=8
+            )
+        return self._async_client
+
+    async def warm_up(self) -> bool:
+
+        '''
+        Opens the pooled connection to the API before the first request (deploy warm-up)
+        Any HTTP response counts; False in DEMO_MODE
+        '''
+
+        if self.api_key == "DEMO_MODE":
+            return False
+        await self._get_async_client().head(self.base_url)
+        return True
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def redact_text(self, text: str, phrases: List[str]) -> str:
         
         '''
@@ -94,7 +168,29 @@ class PrivGuardGateway:
         
         # 1. Detect
         scan_result = self.detect_pii(prompt)
-        
+
+        # 2. Enforce
+        return self.apply_policy(prompt, scan_result, policy)
+
+    async def route_request_async(self, prompt: str, policy: Literal["STRICT_BLOCK", "REDACT_CLOUD", "ROUTE_LOCAL"] = "REDACT_CLOUD", fail_open: bool = True) -> Dict:
+
+        '''
+        Awaitable version of route_request (same policy logic)
+        With fail_open=False a scanner error raises AlpineUnavailable instead of FAIL_OPEN
+        '''
+
+        print(f"--- Processing Request (Policy: {policy}) ---")
+        scan_result = await self.detect_pii_async(prompt)
+        if not fail_open and "error" in scan_result:
+            raise AlpineUnavailable(scan_result["error"])
+        return self.apply_policy(prompt, scan_result, policy)
+
+    def apply_policy(self, prompt: str, scan_result: Dict, policy: str) -> Dict:
+
+        '''
+        Policy enforcement on a DocumentPrivacy scan result
+        '''
+
         # Fail Open Logic: If scanner breaks, we default to ALLOW (or BLOCK depending on risk)
         if "error" in scan_result:
             return {"action": "FAIL_OPEN", "reason": f"Scanner error{scan_result['error']}", "payload": prompt}
@@ -102,7 +198,7 @@ class PrivGuardGateway:
         pii_found = scan_result.get("private_phrases", [])
         has_pii = len(pii_found) > 0
 
-        # 2. Policy Enforcement
+        # Policy Enforcement
         if not has_pii:
             return {
                 "action": "ALLOW_CLOUD", 
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.pattern_registry import Detection
+
+# Incremental re-analysis for interactive clients.
+# A session keeps the last analyzed text split into sentence windows together
+# with the detections found in each. The client sends edits against the
+# version it last saw; a window whose text and both neighbours are unchanged
+# reuses its detections (shifted to its new offset), and the rest are
+# re-analyzed, one detector call per run of adjacent changed windows, so a
+# match reaching into a neighbouring window is still found. A detection that
+# crosses a window boundary ties those windows into one unit, reused only while
+# all of them are unchanged. Sessions are in-process (LRU, idle TTL); a
+# pattern-set change re-analyzes the whole text.
+
+SESSION_TTL_S = int(os.getenv("PRIVGUARD_SESSION_TTL_S", "900"))
+MAX_SESSIONS = int(os.getenv("PRIVGUARD_SESSION_MAX", "1000"))
+
+# Window boundaries: after sentence-ending punctuation followed by whitespace, and after line breaks
+BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n\s*")
+
+
+class EditError(ValueError):
+    pass
+
+
+def split_windows(text: str) -> list[tuple[int, int]]:
+    """(start, end) of each sentence window; windows tile the text, trailing whitespace included."""
+    if not text:
+        return []
+    bounds = [0]
+    for m in BOUNDARY_RE.finditer(text):
+        if bounds[-1] < m.end() < len(text):
+            bounds.append(m.end())
+    bounds.append(len(text))
+    return list(zip(bounds, bounds[1:]))
+
+
+def apply_edits(text: str, edits: list[tuple[int, int, str]]) -> str:
+    """Applies (start, end, replacement) edits in order, each against the result of the previous one."""
+    for start, end, replacement in edits:
+        if not 0 <= start <= end <= len(text):
+            raise EditError(f"Edit [{start}, {end}) is outside the text (length {len(text)})")
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def _shift(d: Detection, offset: int) -> Detection:
+    return Detection(d.entity_type, d.start + offset, d.end + offset, d.score, d.risk_level, d.partial, d.spec)
+
+
+class AnalysisSession:
+
+    def __init__(self, tenant_id: str | None):
+        self.id = uuid.uuid4().hex
+        self.tenant_id = tenant_id
+        self.version = 0
+        self.text = ""
+        self.detections: list[Detection] = []
+        self.lock = asyncio.Lock()  # updates apply one at a time, in order
+        self.touched = time.monotonic()
+        self._fingerprint: str | None = None
+        self._units: dict[str, list[Detection]] = {}  # unit text -> detections relative to the unit
+        self._multi: dict[str, list[str]] = {}        # first window text -> multi-window units starting with it
+
+    def analyze(self, detector, text: str) -> dict:
+        """
+        Brings the session to `text`, re-running `detector` only where the text
+        changed. CPU-bound (run on the executor); returns reuse statistics.
+        """
+        if detector.fingerprint != self._fingerprint:
+            self._units, self._multi = {}, {}
+
+        windows = split_windows(text)
+        window_at_end = {end: i for i, (_, end) in enumerate(windows)}
+
+        def window_text(i: int) -> str:
+            return text[windows[i][0]:windows[i][1]] if 0 <= i < len(windows) else ""
+
+        def unit_key(first_window: int, past_window: int) -> tuple[str, str, str]:
+            unit = text[windows[first_window][0]:windows[past_window - 1][1]]
+            return window_text(first_window - 1), unit, window_text(past_window)
+
+        # 1. Cover the text with units: cached ones where the unit and its neighbours
+        #    are unchanged, single windows (to be re-analyzed) elsewhere
+        plan = []  # [first window index, window index past the end, cached detections or None]
+        i = 0
+        while i < len(windows):
+            entry = None
+            for unit in self._multi.get(window_text(i), ()):
+                j = window_at_end.get(windows[i][0] + len(unit))
+                if j is not None and text.startswith(unit, windows[i][0]):
+                    cached = self._units.get(unit_key(i, j + 1))
+                    if cached is not None:
+                        entry = [i, j + 1, cached]
+                        break
+            if entry is None:
+                entry = [i, i + 1, self._units.get(unit_key(i, i + 1))]
+            plan.append(entry)
+            i = entry[1]
+
+        units: dict[tuple[str, str, str], list[Detection]] = {}
+        multi: dict[str, list[str]] = {}
+        detections: list[Detection] = []
+        reused_windows = analyzed_chars = 0
+
+        def keep(first_window: int, past_window: int, relative: list[Detection]):
+            key = unit_key(first_window, past_window)
+            units[key] = relative
+            if past_window - first_window > 1:
+                first = window_text(first_window)
+                if key[1] not in multi.setdefault(first, []):
+                    multi[first].append(key[1])
+
+        # 2. Reuse cached units; re-analyze each run of adjacent changed units in one call
+        k = 0
+        while k < len(plan):
+            first_window, past_window, cached = plan[k]
+            if cached is not None:
+                detections.extend(_shift(d, windows[first_window][0]) for d in cached)
+                keep(first_window, past_window, cached)
+                reused_windows += past_window - first_window
+                k += 1
+                continue
+
+            run_end = k
+            while run_end < len(plan) and plan[run_end][2] is None:
+                run_end += 1
+            past_window = plan[run_end - 1][1]
+            start, end = windows[first_window][0], windows[past_window - 1][1]
+            found = [_shift(d, start) for d in detector.analyze_text(text[start:end])]
+            detections.extend(found)
+            analyzed_chars += end - start
+
+            # Cache the run per window, except where a detection ties windows together
+            unit_first = first_window
+            for w in range(first_window + 1, past_window + 1):
+                boundary = windows[w][0] if w < past_window else end
+                if w < past_window and any(d.start < boundary < d.end for d in found):
+                    continue
+                unit_start = windows[unit_first][0]
+                keep(unit_first, w, [_shift(d, -unit_start) for d in found if unit_start <= d.start < boundary])
+                unit_first = w
+            k = run_end
+
+        detections.sort(key=lambda d: (d.start, d.end))
+        self.text = text
+        self.detections = detections
+        self.version += 1
+        self._fingerprint = detector.fingerprint
+        self._units, self._multi = units, multi
+        return {
+            "windows": len(windows),
+            "reused_windows": reused_windows,
+            "reanalyzed_chars": analyzed_chars,
+            "text_chars": len(text),
+        }
+
+
+class SessionStore:
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_s: int = SESSION_TTL_S):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions: OrderedDict[str, AnalysisSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def create(self, tenant_id: str | None) -> AnalysisSession:
+        session = AnalysisSession(tenant_id)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self.created += 1
+        return session
+
+    def get(self, session_id: str, tenant_id: str | None) -> AnalysisSession | None:
+        """The live session, if it belongs to `tenant_id`."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.tenant_id != tenant_id:
+                return None
+            if session.touched + self.ttl_s < time.monotonic():
+                del self._sessions[session_id]
+                self.evicted += 1
+                return None
+            session.touched = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str, tenant_id: str | None) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.tenant_id != tenant_id:
+                return False
+            del self._sessions[session_id]
+            return True
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_s
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.touched >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_s": self.ttl_s,
+            "created": self.created,
+            "evicted": self.evicted,
+        }
+
+
+sessions = SessionStore()
@@ -3,6 +3,7 @@ import os
 import logging
 from dotenv import load_dotenv
 from azure.ai.contentsafety import ContentSafetyClient
+from azure.ai.contentsafety.aio import ContentSafetyClient as AsyncContentSafetyClient
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import HttpResponseError
 from azure.ai.contentsafety.models import AnalyzeTextOptions
@@ -22,6 +23,43 @@ def get_client():
 
     return ContentSafetyClient(endpoint, AzureKeyCredential(key))
 
+# Async client is reused across requests (connection pool stays warm)
+_async_client = None
+
+def get_async_client():
+    global _async_client
+    if _async_client is not None:
+        return _async_client
+
+    endpoint = os.getenv("AZURE_CONTENT_SAFETY_ENDPOINT")
+    key = os.getenv("AZURE_CONTENT_SAFETY_KEY")
+
+    if not endpoint or not key:
+        logger.warning("Azure Content Safety credentials not found. Skipping cloud check.")
+        return None
+
+    _async_client = AsyncContentSafetyClient(endpoint, AzureKeyCredential(key))
+    return _async_client
+
+async def warm_async_client() -> bool:
+    """Opens the async client's connection with one tiny request (deploy warm-up); False if unconfigured."""
+    client = get_async_client()
+    if not client:
+        return False
+    await client.analyze_text(AnalyzeTextOptions(text="warm-up"))
+    return True
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+def _max_severity(result) -> int:
+    # Get the highest severity found across all categories (Hate, SelfHarm, Sexual, Violence)
+    severities = [c.severity for c in result.categories_analysis if c.severity is not None]
+    return max(severities) if severities else 0
+
 def check_content_risk(text: str) -> int:
     """
     Returns a severity score (0, 2, 4, 6).
@@ -35,14 +73,36 @@ def check_content_risk(text: str) -> int:
     try:
         request = AnalyzeTextOptions(text=text)
         result = client.analyze_text(request)
+        return _max_severity(result)
         
-        # Get the highest severity found across all categories (Hate, SelfHarm, Sexual, Violence)
-        severities = [c.severity for c in result.categories_analysis if c.severity is not None]
-        return max(severities) if severities else 0
-        
     except HttpResponseError as e:
         logger.error(f"Azure Content Safety Error: {e}")
         return 0
     except Exception as e:
         logger.error(f"Unexpected Error: {e}")
+        return 0
+
+async def check_content_risk_async(text: str, fail_open: bool = True) -> int:
+    """
+    Awaitable version of check_content_risk (same severity scale and fail-open behaviour).
+    With fail_open=False errors are raised, so the caller can degrade per policy
+    (see app/deadline.py); an unconfigured client still returns 0.
+    """
+    client = get_async_client()
+    if not client:
+        return 0
+
+    try:
+        result = await client.analyze_text(AnalyzeTextOptions(text=text))
+        return _max_severity(result)
+
+    except HttpResponseError as e:
+        logger.error(f"Azure Content Safety Error: {e}")
+        if not fail_open:
+            raise
+        return 0
+    except Exception as e:
+        logger.error(f"Unexpected Error: {e}")
+        if not fail_open:
+            raise
         return 0
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import inspect
+import time
+
+from app.policy import POLICY
+
+# Per-request deadline budget.
+# A request gets a budget when it enters the gateway (policy.json "deadlines",
+# optionally tightened by the X-Deadline-Ms header). Every external stage
+# (Azure Content Safety, Alpine, Gemini) is awaited with whatever is left of
+# it, so a brownout upstream costs one budget, not the sum of every stage's
+# own timeout. A stage that times out or fails raises StageUnavailable; the
+# caller then degrades per role (role_policies.on_upstream_failure,
+# PolicyEngine.degrade):
+# - "fail_closed": block the request
+# - "local_only": continue on local detection, never route to the cloud
+# - "fail_open": continue as if the stage had found nothing
+
+DEFAULT_DEADLINES = {
+    "default_budget_ms": 10_000,
+    "min_stage_ms": 50,
+    "budget_ms": {},
+}
+
+CONFIG = {**DEFAULT_DEADLINES, **POLICY.get("deadlines", {})}
+
+
+class StageUnavailable(Exception):
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage} unavailable ({reason})")
+        self.stage = stage
+        self.reason = reason
+
+
+class Deadline:
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires = time.monotonic() + budget_ms / 1000
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, requested_ms: int | None = None) -> "Deadline":
+        """Configured budget for `endpoint`; a client may ask for less, never more."""
+        budget = CONFIG["budget_ms"].get(endpoint, CONFIG["default_budget_ms"])
+        if requested_ms and requested_ms > 0:
+            budget = min(budget, requested_ms)
+        return cls(budget)
+
+    def remaining_s(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    async def run(self, stage: str, awaitable):
+        """
+        Awaits an external stage within the remaining budget.
+        Raises StageUnavailable on timeout, on an exhausted budget, or if the stage fails.
+        """
+        remaining = self.remaining_s()
+        if remaining * 1000 < CONFIG["min_stage_ms"]:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise StageUnavailable(stage, "deadline exhausted")
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise StageUnavailable(stage, "timeout")
+        except Exception as e:
+            raise StageUnavailable(stage, f"error: {e}")
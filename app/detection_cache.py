@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Detection result cache, keyed by (pattern-set fingerprint, SHA-256 of the text).
+# - "local": in-process LRU with TTL (default)
+# - "redis": shared by every gateway node (Redis-compatible server)
+# - "none": disabled
+# Values are the JSON form of the detections (types and offsets, no text); a
+# pattern-set change yields a new fingerprint, so stale results are never
+# served across rule updates.
+# OCR text of uploaded documents is raw document content, so it is only
+# cached with PRIVGUARD_CACHE_DOCUMENT_TEXT=1 (off by default), and then only
+# in-process, never in the shared backend.
+
+BACKEND = os.getenv("PRIVGUARD_CACHE_BACKEND", "local").lower()
+TTL_S = int(os.getenv("PRIVGUARD_CACHE_TTL_S", "600"))
+LOCAL_MAX_ENTRIES = int(os.getenv("PRIVGUARD_CACHE_MAX_ENTRIES", "4096"))
+REDIS_URL = os.getenv("PRIVGUARD_REDIS_URL", "redis://localhost:6379/0")
+KEY_PREFIX = os.getenv("PRIVGUARD_REDIS_PREFIX", "privguard")
+CACHE_DOCUMENT_TEXT = os.getenv("PRIVGUARD_CACHE_DOCUMENT_TEXT", "0").lower() in ("1", "true", "yes")
+DOCUMENT_MAX_ENTRIES = int(os.getenv("PRIVGUARD_CACHE_DOCUMENT_MAX_ENTRIES", "64"))
+
+
+def text_key(fingerprint: str, text: str) -> str:
+    return f"{KEY_PREFIX}:det:{fingerprint}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+class LocalCache:
+
+    def __init__(self, max_entries: int = LOCAL_MAX_ENTRIES, ttl_s: int = TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class RedisCache:
+
+    def __init__(self, url: str = REDIS_URL, ttl_s: int = TTL_S):
+        import redis
+        self._errors = (redis.RedisError,)
+        self.client = redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.2)
+        self.ttl_s = ttl_s
+
+    # A cache outage must never fail a request: errors read as misses
+    def get(self, key: str) -> str | None:
+        try:
+            return self.client.get(key)
+        except self._errors:
+            return None
+
+    def set(self, key: str, value: str):
+        try:
+            self.client.set(key, value, ex=self.ttl_s)
+        except self._errors:
+            pass
+
+
+class DetectionCache:
+
+    def __init__(self, backend=None, document_backend=None):
+        self.backend = backend
+        self.document_backend = document_backend  # in-process only (raw document text)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, fingerprint: str, text: str) -> list | None:
+        if self.backend is None:
+            return None
+        value = self.backend.get(text_key(fingerprint, text))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, fingerprint: str, text: str, detections: list[dict]):
+        if self.backend is not None:
+            self.backend.set(text_key(fingerprint, text), json.dumps(detections))
+
+    # OCR text of uploaded documents, keyed by the upload's SHA-256 (opt-in, in-process)
+    @property
+    def documents_enabled(self) -> bool:
+        return self.document_backend is not None
+
+    def get_document_text(self, sha256: str) -> str | None:
+        if self.document_backend is None:
+            return None
+        return self.document_backend.get(f"ocr:{sha256}")
+
+    def set_document_text(self, sha256: str, text: str):
+        if self.document_backend is not None:
+            self.document_backend.set(f"ocr:{sha256}", text)
+
+    def stats(self) -> dict:
+        return {"backend": BACKEND, "hits": self.hits, "misses": self.misses}
+
+
+def _make_backend():
+    if BACKEND == "redis":
+        return RedisCache()
+    if BACKEND == "local":
+        return LocalCache()
+    return None
+
+
+detection_cache = DetectionCache(
+    _make_backend(),
+    LocalCache(max_entries=DOCUMENT_MAX_ENTRIES) if CACHE_DOCUMENT_TEXT else None,
+)
@@ -1,8 +1,17 @@
+import hashlib
 import json
 import os
-from presidio_analyzer import AnalyzerEngine, PatternRecognizer, Pattern
+import time
+from presidio_analyzer import AnalyzerEngine, PatternRecognizer, Pattern, RecognizerResult
 from presidio_analyzer.nlp_engine import NlpEngineProvider
 
+from app.detection_cache import detection_cache
+from app.pipeline import note_cache
+from app.pattern_registry import Detection, build_registry, to_dicts
+from app.pattern_stats import pattern_stats
+from app.safe_regex import UnsafePatternError, compile_pattern
+from app.span_resolver import CONFIG as SPAN_CONFIG, resolve_spans
+
 # 1. Setup NLP engine (spaCy)
 provider = NlpEngineProvider(nlp_configuration={
     "nlp_engine_name": "spacy",
@@ -11,10 +20,9 @@ provider = NlpEngineProvider(nlp_configuration={
 nlp_engine = provider.create_engine()
 
 # 2. Load Custom Patterns from JSON
-def load_patterns_from_json():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    pattern_path = os.path.join(base_dir, "..", "Security", "patterns.json")
-    
+DEFAULT_PATTERN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Security", "patterns.json")
+
+def load_patterns_from_json(pattern_path: str = DEFAULT_PATTERN_PATH):
     try:
         with open(pattern_path, 'r') as f:
             data = json.load(f)
@@ -28,74 +36,225 @@ def load_patterns_from_json():
         print(f"❌ ERROR: patterns.json is not valid JSON.")
         return []
 
-# 3. Initialize Analyzer
-analyzer = AnalyzerEngine(nlp_engine = nlp_engine, supported_languages = ["en"])
+# Custom recognizer backed by a vetted, time-budgeted SafePattern (see app/safe_regex.py)
+# instead of Presidio's own unbounded regex matching. Also records per-pattern
+# evaluation time and match count.
+class SafePatternRecognizer(PatternRecognizer):
 
-# 4. Register Custom Recognizers
-custom_patterns_data = load_patterns_from_json()
+    def __init__(self, safe_pattern, score, **kwargs):
+        self.safe_pattern = safe_pattern
+        self.score = score
+        super().__init__(**kwargs)
 
-for p in custom_patterns_data:
-    score_map = {"CRITICAL": 0.95, "HIGH": 0.85, "MEDIUM": 0.6, "LOW": 0.4}
-    confidence = score_map.get(p.get("risk_level", "MEDIUM"), 0.6)
+    def analyze(self, text, entities, nlp_artifacts=None, regex_flags=None):
+        start = time.perf_counter()
+        spans, timed_out = self.safe_pattern.spans(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
 
-    regex_pattern = f"(?i){p['regex']}"
+        entity = self.supported_entities[0]
+        pattern_stats.record_eval(entity, elapsed_ms, len(spans), len(text), timed_out=timed_out)
 
-    # The Presidio Pattern object
-    pattern_obj = Pattern(
-        name = p["id"], 
-        regex = regex_pattern, 
-        score = confidence
-    )
+        return [
+            RecognizerResult(
+                entity_type=entity,
+                start=s,
+                end=e,
+                score=self.score,
+                recognition_metadata={
+                    RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                },
+            )
+            for s, e in spans
+        ]
 
-    # Create the Recognizer
-    recognizer = PatternRecognizer(
-        supported_entity = p["id"],     # This becomes the 'entity_type' in results
-        patterns = [pattern_obj],
-        name = f"{p['id']}_recognizer"
-    )
+# 3. Prompt-size-aware detection with early exit
+# Large inputs are first scanned with the custom patterns only, tier by tier
+# (attack patterns, then CRITICAL → LOW), segment by segment. As soon as
+# `stop_when(detections)` says the outcome is decided (e.g. a certain BLOCK),
+# the partial detections are returned and the NLP pass is skipped entirely.
+# Otherwise the pre-pass matches are kept and the full pass runs only
+# Presidio's built-in recognizers, so custom patterns are never run twice.
+# Presidio's built-in entities carry no risk level, so they cannot change a
+# BLOCK decision; only the custom patterns need to run before deciding.
 
-    # Add to the analyzer's registry
-    analyzer.registry.add_recognizer(recognizer)
+EARLY_EXIT_MIN_CHARS = int(os.getenv("PRIVGUARD_EARLY_EXIT_MIN_CHARS", "20000"))
+SEGMENT_CHARS = int(os.getenv("PRIVGUARD_SEGMENT_CHARS", "8192"))
+SEGMENT_OVERLAP = 256  # keeps matches that straddle a segment boundary
 
-# 5. Analysis Function
-def analyze_text(text: str):
-    '''
-    Analyzes text using both default Presidio recognizers 
-    AND the custom patterns loaded from JSON.
-    '''
-    results = analyzer.analyze(text=text, language="en")
-
-    # Filter out low-score noise from default recognizers
-    filtered_results = []
-    for r in results:
-        # Check if this result matches one of our custom IDs
-        custom_match = next((item for item in custom_patterns_data if item["id"] == r.entity_type), None)
-
-        if custom_match:
-            # It is a custom match
-            filtered_results.append({
-                "entity_type": r.entity_type,
-                "start": r.start,
-                "end": r.end,
-                "score": r.score,
-                "risk_level": custom_match['risk_level']
-            })
+RISK_PRIORITY = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+
+
+# 4. Detector: one compiled pattern set on top of the shared NLP engine.
+# The default detector uses Security/patterns.json; tenants with their own
+# pattern sets get their own instance (see app/tenants.py).
+class PatternDetector:
+
+    def __init__(self, patterns: list, span_config: dict = SPAN_CONFIG):
+        self.span_config = span_config
+        self.analyzer = AnalyzerEngine(nlp_engine = nlp_engine, supported_languages = ["en"])
+
+        # Typed registry: id → PatternSpec (risk level, weight, category, confidence, redaction token)
+        self.pattern_registry = build_registry(patterns)
+
+        # Vetted custom patterns for the prioritized pre-pass (see analyze_text_with_early_exit)
+        self.prepass_patterns = []
+
+        for spec in list(self.pattern_registry.values()):
+            try:
+                safe_pattern = compile_pattern(spec.id, spec.regex)
+            except UnsafePatternError as e:
+                print(f"❌ ERROR: Rejected unsafe pattern {e}")
+                del self.pattern_registry[spec.id]
+                continue
+
+            regex_pattern = f"(?i){spec.regex}"
+
+            # The Presidio Pattern object
+            pattern_obj = Pattern(
+                name = spec.id, 
+                regex = regex_pattern, 
+                score = spec.confidence
+            )
+
+            # Create the Recognizer
+            recognizer = SafePatternRecognizer(
+                safe_pattern = safe_pattern,
+                score = spec.confidence,
+                supported_entity = spec.id,     # This becomes the 'entity_type' in results
+                patterns = [pattern_obj],
+                name = f"{spec.id}_recognizer"
+            )
+
+            # Add to the analyzer's registry
+            self.analyzer.registry.add_recognizer(recognizer)
+
+            self.prepass_patterns.append((spec, safe_pattern))
+
+        self.priority_tiers = self._priority_tiers()
+
+        # Presidio's own entities: what a full pass adds once the pre-pass has run every custom pattern
+        self.builtin_entities = [
+            e for e in self.analyzer.get_supported_entities(language="en") if e not in self.pattern_registry
+        ]
+
+        # Detection cache namespace: changes whenever the rules change
+        self.fingerprint = hashlib.sha256(
+            json.dumps([patterns, span_config], sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+    def _priority_tiers(self):
+        attacks = [p for p in self.prepass_patterns if p[0].category == "Attack"]
+        tiers = [attacks] if attacks else []
+        for level in RISK_PRIORITY:
+            tier = [p for p in self.prepass_patterns if p[0].category != "Attack" and p[0].risk_level == level]
+            if tier:
+                tiers.append(tier)
+        return tiers
+
+    def _analyze(self, text: str, entities=None, seed=()):
+        '''
+        Presidio pass (restricted to `entities` if given) merged with `seed`
+        detections already found by the pre-pass.
+        '''
+        results = self.analyzer.analyze(text=text, language="en", entities=entities)
+
+        # Filter out low-score noise from default recognizers
+        filtered_results = list(seed)
+        for r in results:
+            # Check if this result matches one of our custom IDs
+            spec = self.pattern_registry.get(r.entity_type)
+
+            if spec:
+                # It is a custom match
+                filtered_results.append(Detection.from_spec(spec, r.start, r.end, r.score))
+            elif r.score > 0.4:
+                # It is a default Presidio match (like that False Positive Bank Number)
+                # Only keep if score is very high, otherwise ignore noise
+                filtered_results.append(Detection(r.entity_type, r.start, r.end, r.score, "UNKNOWN"))
+
+        # Merge overlapping / duplicate detections (custom over built-in, higher risk wins)
+        return resolve_spans(filtered_results, self.span_config)
+
+    def analyze_text(self, text: str, use_cache: bool = True):
+        '''
+        Analyzes text using both default Presidio recognizers 
+        AND the custom patterns loaded from JSON.
+        Results are cached per pattern set (see app/detection_cache.py);
+        use_cache=False always runs the analyzer (warm-up).
+        '''
+        cached = detection_cache.get(self.fingerprint, text) if use_cache else None
+        if use_cache and detection_cache.enabled:
+            note_cache("detection", cached is not None)
+        if cached is not None:
+            return [Detection.from_dict(d, self.pattern_registry) for d in cached]
+
+        detections = self._analyze(text)
+        if use_cache:
+            detection_cache.set(self.fingerprint, text, to_dicts(detections))
+        return detections
+
+    def analyze_text_with_early_exit(self, text: str, stop_when=None):
+        '''
+        Returns (detections, partial).
+        Small inputs (or no stop_when) go straight to analyze_text.
+        partial=True means detection stopped early and the list is incomplete.
+        '''
+        if stop_when is None or len(text) < EARLY_EXIT_MIN_CHARS:
+            return self.analyze_text(text), False
+
+        detections = []
+        seen = set()
+
+        for tier in self.priority_tiers:
+            for seg_start in range(0, len(text), SEGMENT_CHARS):
+                window = text[seg_start:seg_start + SEGMENT_CHARS + SEGMENT_OVERLAP]
+
+                for spec, safe_pattern in tier:
+                    eval_start = time.perf_counter()
+                    spans, timed_out = safe_pattern.spans(window)
+                    pattern_stats.record_eval(spec.id, (time.perf_counter() - eval_start) * 1000, len(spans), len(window), timed_out=timed_out)
+
+                    for m_start, m_end in spans:
+                        start, end = seg_start + m_start, seg_start + m_end
+                        if (spec.id, start, end) in seen:
+                            continue
+                        seen.add((spec.id, start, end))
+                        detections.append(Detection.from_spec(spec, start, end))
+
+                if detections and stop_when(detections):
+                    for d in detections:
+                        d.partial = True
+                    return resolve_spans(detections, self.span_config), True
+
+        # Outcome not decided: every custom pattern has already run on the whole
+        # text, so the full pass only adds Presidio's built-in entities (and NLP)
+        if self.builtin_entities:
+            detections = self._analyze(text, entities=self.builtin_entities, seed=detections)
         else:
-            # It is a default Presidio match (like that False Positive Bank Number)
-            # Only keep if score is very high, otherwise ignore noise
-            if r.score > 0.4:
-                filtered_results.append({
-                    "entity_type": r.entity_type,
-                    "start": r.start,
-                    "end": r.end,
-                    "score": r.score,
-                    "risk_level": "UNKNOWN" 
-                })
-
-    return filtered_results
+            detections = resolve_spans(detections, self.span_config)
+        detection_cache.set(self.fingerprint, text, to_dicts(detections))
+        return detections, False
+
+
+# 5. Default detector (global Security/patterns.json)
+custom_patterns_data = load_patterns_from_json()
+default_detector = PatternDetector(custom_patterns_data)
+
+pattern_registry = default_detector.pattern_registry
+prepass_patterns = default_detector.prepass_patterns
+analyzer = default_detector.analyzer
+
+
+def analyze_text(text: str):
+    return default_detector.analyze_text(text)
+
+
+def analyze_text_with_early_exit(text: str, stop_when=None):
+    return default_detector.analyze_text_with_early_exit(text, stop_when)
 
 # Quick test block (only runs if this file is executed directly)
 if __name__ == "__main__":
     test_prompt = "Here is our API key: sk-test-123456789, store it safely"
     print(f"Testing: {test_prompt}")
-    print(analyze_text(test_prompt))
\ No newline at end of file
+    print(analyze_text(test_prompt))
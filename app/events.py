@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+
+from Security.audit_logger import add_listener
+
+# Live audit event stream (Server-Sent Events).
+# log_event notifies the broker after each append; the broker fans the event
+# and its stat delta out to every subscriber on the event loop. Each
+# subscriber has a bounded buffer; a consumer that falls behind is dropped
+# instead of slowing everyone else down.
+
+SUBSCRIBER_BUFFER = int(os.getenv("PRIVGUARD_SSE_BUFFER", "256"))
+MAX_SUBSCRIBERS = int(os.getenv("PRIVGUARD_SSE_MAX_SUBSCRIBERS", "100"))
+KEEPALIVE_S = 15
+
+SOVEREIGN_ROUTES = ("SAFE_MODE", "LOCAL")
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def stats_delta(event: dict) -> dict:
+    """Increment to apply to the /stats counters for one audit event."""
+    risk = (event.get("detected_risk_level") or "").upper()
+    return {
+        "total_requests": 1,
+        "blocked_count": int(event.get("policy_action") == "BLOCK"),
+        "sovereign_count": int(event.get("routing_decision") in SOVEREIGN_ROUTES),
+        "risk_distribution": {risk: 1} if risk in RISK_LEVELS else {},
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscriber:
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self.dropped = False
+
+
+class EventBroker:
+
+    def __init__(self):
+        self._subscribers: set[Subscriber] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.dropped_total = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Binds the broker to the gateway loop and starts listening to the audit logger."""
+        self._loop = loop
+        add_listener(self._on_audit_event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # Called from the audit executor thread
+    def _on_audit_event(self, event: dict):
+        if self._loop is not None and self._subscribers:
+            self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event: dict):
+        delta = stats_delta(event)
+        for sub in list(self._subscribers):
+            if sub.queue.maxsize - sub.queue.qsize() < 2:
+                # Slow consumer: drop it rather than buffering without bound
+                sub.dropped = True
+                self._subscribers.discard(sub)
+                self.dropped_total += 1
+                continue
+            event_id = event.get("event_id")
+            sub.queue.put_nowait(("log", event, event_id))
+            sub.queue.put_nowait(("stats_delta", delta, event_id))
+
+    def subscribe(self) -> Subscriber | None:
+        if len(self._subscribers) >= MAX_SUBSCRIBERS:
+            return None
+        sub = Subscriber()
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+
+    async def stream(self, sub: Subscriber, snapshot: dict | None = None, seen: dict | None = None):
+        """
+        SSE body: optional snapshot, then live events until disconnect or drop.
+        The subscription starts before the snapshot is read, so events already
+        counted in it are skipped: `seen` maps an event kind to those event ids.
+        """
+        try:
+            if snapshot is not None:
+                yield _sse("stats", snapshot)
+
+            while True:
+                if sub.dropped and sub.queue.empty():
+                    yield _sse("dropped", {"reason": "subscriber too slow; reconnect to resume"})
+                    return
+                try:
+                    kind, data, event_id = await asyncio.wait_for(sub.queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if seen and event_id in seen.get(kind, ()):
+                    continue
+                yield _sse(kind, data)
+        finally:
+            self.unsubscribe(sub)
+
+
+broker = EventBroker()
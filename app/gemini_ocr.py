@@ -1,3 +1,4 @@
+import asyncio
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
@@ -11,6 +12,10 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 # (gemini-1.5-flash was deprecated and returns 404)
 GEMINI_MODEL = "gemini-2.5-flash-lite"
 
+# Uploads above this size go through the Gemini File API (streamed from the
+# spooled temp file) instead of being inlined into the request
+INLINE_MAX_BYTES = int(os.getenv("PRIVGUARD_GEMINI_INLINE_MAX_BYTES", str(16 * 1024 * 1024)))
+
 # Mime types supported by Gemini for document/image input
 VALID_MIME_TYPES = [
     "application/pdf",
@@ -37,39 +42,96 @@ def _normalize_mime_type(mime_type: str | None) -> str:
     return "application/pdf"
 
 
-def scan_document(file_bytes, mime_type="application/pdf"):
-    """
-    Uses Gemini 2.5 Flash-Lite to extract text from a scanned PDF/Image.
-    Supports PDF and common image formats.
-    """
+# The prompt tells Gemini to act as an OCR engine
+OCR_PROMPT = """
+You are a high-precision OCR engine for scanned documents used in regulated environments (healthcare, legal, government).
+
+TASK: Extract every word and character verbatim. Do not summarize, paraphrase, or interpret.
+
+RULES:
+- Preserve layout: headings, paragraphs, lists, tables, indentations.
+- Handle rotation: read text at any orientation and present it correctly.
+- Ignore artifacts: coffee stains, creases, marks, shadows—extract only actual text.
+- Preserve formatting: line breaks, spacing, bullet points, numbered lists.
+- Accuracy is critical: medical terms, legal phrasing, dates, and numbers must be exact.
+
+OUTPUT: Raw extracted text only. No commentary, no explanations, no "I extracted..."."""
+
+
+def _build_request(mime_type):
     mime_type = _normalize_mime_type(mime_type)
     if mime_type not in VALID_MIME_TYPES and mime_type != "application/pdf":
         print(f"Warning: Unsupported mime type {mime_type}, defaulting to application/pdf")
         mime_type = "application/pdf"
 
     model = genai.GenerativeModel(GEMINI_MODEL)
-    
-    # The prompt tells Gemini to act as an OCR engine
-    prompt = """
-    You are a high-precision OCR engine for scanned documents used in regulated environments (healthcare, legal, government).
-
-    TASK: Extract every word and character verbatim. Do not summarize, paraphrase, or interpret.
-
-    RULES:
-    - Preserve layout: headings, paragraphs, lists, tables, indentations.
-    - Handle rotation: read text at any orientation and present it correctly.
-    - Ignore artifacts: coffee stains, creases, marks, shadows—extract only actual text.
-    - Preserve formatting: line breaks, spacing, bullet points, numbered lists.
-    - Accuracy is critical: medical terms, legal phrasing, dates, and numbers must be exact.
-
-    OUTPUT: Raw extracted text only. No commentary, no explanations, no "I extracted..."."""
-    
+    return model, mime_type
+
+
+def scan_document(file_bytes, mime_type="application/pdf"):
+    """
+    Uses Gemini 2.5 Flash-Lite to extract text from a scanned PDF/Image.
+    Supports PDF and common image formats.
+    """
+    model, mime_type = _build_request(mime_type)
+
     try:
         response = model.generate_content([
             {'mime_type': mime_type, 'data': file_bytes},
-            prompt
+            OCR_PROMPT
         ])
         return response.text
     except Exception as e:
         print(f"Gemini OCR Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+async def scan_document_async(file_bytes, mime_type="application/pdf"):
+    """
+    Awaitable version of scan_document, used by the async gateway pipeline.
+    """
+    model, mime_type = _build_request(mime_type)
+
+    try:
+        response = await model.generate_content_async([
+            {'mime_type': mime_type, 'data': file_bytes},
+            OCR_PROMPT
+        ])
+        return response.text
+    except Exception as e:
+        print(f"Gemini OCR Error: {e}")
+        return None
+
+
+async def scan_upload_async(upload, mime_type="application/pdf"):
+    """
+    OCR for a spooled upload (app/uploads.py). Small files are sent inline;
+    large ones are streamed from disk via the File API, so the document is
+    never held in memory as a whole.
+    """
+    if upload.size <= INLINE_MAX_BYTES:
+        return await scan_document_async(upload.read_bytes(), mime_type=mime_type)
+
+    model, mime_type = _build_request(mime_type)
+    remote = None
+    try:
+        remote = await asyncio.to_thread(genai.upload_file, upload.path(), mime_type=mime_type)
+        response = await model.generate_content_async([remote, OCR_PROMPT])
+        return response.text
+    except Exception as e:
+        print(f"Gemini OCR Error: {e}")
+        return None
+    finally:
+        if remote is not None:
+            try:
+                await asyncio.to_thread(genai.delete_file, remote.name)
+            except Exception as e:
+                print(f"Gemini file cleanup failed: {e}")
+
+
+async def warm_up() -> bool:
+    """Sets up the Gemini client and connection with a model lookup (deploy warm-up); False without a key."""
+    if not os.getenv("GEMINI_API_KEY"):
+        return False
+    await asyncio.to_thread(genai.get_model, f"models/{GEMINI_MODEL}")
+    return True
@@ -0,0 +1,245 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+
+# Background jobs for long document scans.
+# POST /jobs/upload_scan stores the upload and returns a job id at once; a
+# fixed pool of worker tasks on the gateway loop drains a priority queue, so
+# at most WORKERS scans run concurrently regardless of how many are submitted.
+# Clients poll GET /jobs/{id} or follow GET /jobs/{id}/events (SSE). Finished
+# jobs keep their result for RESULT_TTL_S. A resubmission of the same document
+# with the same options returns the existing job instead of scanning it again.
+# A job belongs to the role that submitted it: other roles cannot read,
+# follow or cancel it.
+
+WORKERS = int(os.getenv("PRIVGUARD_JOB_WORKERS", "4"))
+MAX_PENDING = int(os.getenv("PRIVGUARD_JOB_MAX_PENDING", "64"))
+RESULT_TTL_S = int(os.getenv("PRIVGUARD_JOB_RESULT_TTL_S", "900"))
+SWEEP_INTERVAL_S = 30
+KEEPALIVE_S = 15
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, kind: str, run, priority: str, key: str | None, cleanup=None, owner: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner         # submitting role; only it may read or cancel the job
+        self.priority = priority
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error: str | None = None
+        self.submitted_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._run = run            # coroutine function, called once by a worker
+        self._cleanup = cleanup    # releases held inputs (spooled upload) once the job ends
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def _set(self, status: str, result=None, error: str | None = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        if status == RUNNING:
+            self.started_at = time.time()
+        elif status in FINISHED:
+            self.finished_at = time.time()
+            if self._cleanup is not None:
+                self._cleanup()
+                self._cleanup = None
+        # Wake everyone waiting on this job, then re-arm for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        d = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            d["result"] = self.result
+        elif self.error is not None:
+            d["error"] = self.error
+        return d
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobQueue:
+
+    def __init__(self, workers: int = WORKERS, max_pending: int = MAX_PENDING, result_ttl_s: int = RESULT_TTL_S):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl_s = result_ttl_s
+        self._jobs: dict[str, Job] = {}
+        self._by_key: dict[str, Job] = {}
+        self._queue: asyncio.PriorityQueue | None = None
+        self._seq = itertools.count()  # FIFO within a priority
+        self._tasks: list[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    # --- Lifecycle (gateway startup / shutdown) ---
+
+    def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self.cancel(job.id)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- Client API ---
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == QUEUED)
+
+    def submit(self, kind: str, run, priority: str = "normal", key: str | None = None, cleanup=None,
+               owner: str | None = None) -> tuple[Job, bool]:
+        """
+        Queues `run` (a coroutine function). Returns (job, created); with a `key`
+        matching a live or successful job, that job is returned instead and
+        `cleanup` is called right away.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (expected one of: {', '.join(PRIORITIES)})")
+
+        existing = self._by_key.get(key) if key else None
+        if existing is not None and existing.status in (QUEUED, RUNNING, SUCCEEDED):
+            if cleanup is not None:
+                cleanup()
+            return existing, False
+
+        if self.pending >= self.max_pending:
+            raise QueueFull(f"{self.max_pending} jobs already queued")
+
+        job = Job(kind, run, priority, key, cleanup, owner)
+        self._jobs[job.id] = job
+        if key:
+            self._by_key[key] = job
+        self._queue.put_nowait((PRIORITIES[priority], next(self._seq), job))
+        return job, True
+
+    def get(self, job_id: str, owner: str | None = None) -> Job | None:
+        """The job, if it exists and belongs to `owner`."""
+        job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Cancels a queued or running job; finished jobs are left as they are."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job._task is not None:
+            job._task.cancel()  # the worker records the cancellation
+        else:
+            job._set(CANCELLED)  # still queued: the worker skips it
+            self.cancelled += 1
+        return job
+
+    async def stream(self, job: Job):
+        """SSE body: the job's state on every change until it finishes."""
+        while True:
+            changed = job._changed
+            yield _sse("status", job.to_dict())
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+    def stats(self) -> dict:
+        by_status = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "result_ttl_s": self.result_ttl_s,
+            "jobs": by_status,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    # --- Workers ---
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status != QUEUED:
+                continue  # cancelled while queued
+            job._task = asyncio.create_task(job._run(), name=f"job-{job.id}")
+            job._set(RUNNING)
+            try:
+                result = await asyncio.shield(job._task)
+            except asyncio.CancelledError:
+                if not job._task.cancelled():
+                    # The worker itself is being stopped
+                    job._task.cancel()
+                    job._set(CANCELLED)
+                    raise
+                job._set(CANCELLED)
+                self.cancelled += 1
+            except Exception as e:
+                job._set(FAILED, error=getattr(e, "detail", None) or str(e) or type(e).__name__)
+                self.failed += 1
+            else:
+                job._set(SUCCEEDED, result=result)
+                self.completed += 1
+            finally:
+                job._task = None
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_S)
+            self.expire()
+
+    def expire(self) -> int:
+        """Drops finished jobs older than the result TTL."""
+        cutoff = time.time() - self.result_ttl_s
+        expired = [j for j in self._jobs.values() if j.finished and j.finished_at < cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if job.key and self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+        return len(expired)
+
+
+jobs = JobQueue()
@@ -0,0 +1,102 @@
+from collections import deque
+from typing import Iterable
+
+try:
+    import ahocorasick  # pyahocorasick: C implementation of the same automaton
+except ImportError:
+    ahocorasick = None
+
+# Multi-keyword matcher (Aho-Corasick) for policy marker lists such as data
+# sovereignty labels and project codenames. The automaton is built once per
+# marker list; a scan is a single pass over the text regardless of how many
+# markers there are. Matching is case-insensitive; with whole_words, a match
+# must not be preceded or followed by a letter or digit ("internal" does not
+# fire on "international").
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class _PyAutomaton:
+    """Pure-Python fallback: goto / fail / output tables over a trie."""
+
+    def __init__(self, keywords: list[str]):
+        self.goto: list[dict] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[str]] = [[]]
+
+        for kw in keywords:
+            node = 0
+            for ch in kw:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(kw)
+
+        # Breadth-first failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text: str):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for kw in out[node]:
+                yield i, kw
+
+
+class KeywordAutomaton:
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = True):
+        self.keywords = sorted({k.strip().lower() for k in keywords if k and k.strip()})
+        self.whole_words = whole_words
+
+        if not self.keywords:
+            self._automaton = None
+        elif ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = _PyAutomaton(self.keywords)
+
+    @property
+    def engine(self) -> str:
+        if self._automaton is None:
+            return "none"
+        return "pyahocorasick" if ahocorasick is not None else "python"
+
+    def find(self, text: str) -> set[str]:
+        """Distinct keywords present in `text`."""
+        if self._automaton is None or not text:
+            return set()
+
+        lowered = text.lower()
+        found = set()
+        for end, kw in self._automaton.iter(lowered):
+            if kw in found:
+                continue
+            start = end - len(kw) + 1
+            if not self.whole_words or _is_boundary(lowered, start, end + 1):
+                found.add(kw)
+                if len(found) == len(self.keywords):
+                    break
+        return found
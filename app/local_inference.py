@@ -0,0 +1,336 @@
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import httpx
+
+from app import pipeline
+
+# Local model backend for SAFE_MODE / LOCAL routes.
+# - "stub": in-process, CPU-only stand-in model (default; tests and demos)
+# - "openai": a local OpenAI-compatible server (vLLM, llama.cpp server, Ollama)
+#   on the internal network; the server runs the model and its own batching
+# - "none": disabled (/proxy returns the placeholder response)
+# In-process models are driven by BatchingBackend: sequences join and leave the
+# running batch between decode steps (continuous batching), so a long answer
+# never holds the batch hostage. Both backends bound the number of waiting
+# requests and stream tokens back as they are produced.
+
+BACKEND = os.getenv("PRIVGUARD_LOCAL_BACKEND", "stub").lower()
+MODEL = os.getenv("PRIVGUARD_LOCAL_MODEL", "local-llama-3.3-70b")
+BASE_URL = os.getenv("PRIVGUARD_LOCAL_URL", "http://localhost:8000/v1")
+MAX_BATCH = int(os.getenv("PRIVGUARD_LOCAL_MAX_BATCH", "8"))
+MAX_QUEUE = int(os.getenv("PRIVGUARD_LOCAL_MAX_QUEUE", "64"))
+MAX_NEW_TOKENS = int(os.getenv("PRIVGUARD_LOCAL_MAX_TOKENS", "256"))
+STUB_STEP_MS = float(os.getenv("PRIVGUARD_LOCAL_STUB_STEP_MS", "20"))
+REQUEST_TIMEOUT_S = 120.0
+
+_END = object()
+
+
+class LocalQueueFull(Exception):
+    pass
+
+
+class LocalBackendError(Exception):
+    pass
+
+
+class Generation:
+    """One request's output: tokens are consumed with `async for` (streaming) or text()."""
+
+    def __init__(self, prompt: str, max_new_tokens: int):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.generated = 0
+        self.cancelled = False
+        self.finished = False
+        self.state = None           # model decoding state (in-process backends)
+        self.task: asyncio.Task | None = None  # producer task (server backends)
+        self._tokens: asyncio.Queue = asyncio.Queue()
+
+    def emit(self, token: str):
+        self.generated += 1
+        self._tokens.put_nowait(token)
+
+    def finish(self, error: Exception | None = None):
+        if not self.finished:
+            self.finished = True
+            self._tokens.put_nowait(error or _END)
+
+    def cancel(self):
+        """Stops generation (client disconnected); frees the batch slot at the next step."""
+        self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+
+    async def __aiter__(self):
+        try:
+            while True:
+                item = await self._tokens.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not self.finished:
+                self.cancel()
+
+    async def text(self) -> str:
+        return "".join([token async for token in self])
+
+
+# --- In-process models ---
+
+class StepModel(ABC):
+    """
+    Interface for in-process models driven by BatchingBackend. Both methods
+    are called on the CPU executor with the whole current batch.
+    """
+    name = "model"
+
+    @abstractmethod
+    def prefill(self, prompts: list[str]) -> list:
+        """Per-prompt decoding state for newly admitted sequences."""
+
+    @abstractmethod
+    def step(self, states: list) -> list[str | None]:
+        """One decode step for the batch: the next token per state, None when it is finished."""
+
+
+class StubModel(StepModel):
+    """
+    CPU stand-in: streams a fixed on-prem acknowledgement word by word. Each
+    step costs `step_ms` for the whole batch, like one batched forward pass.
+    """
+    name = "privguard-stub"
+
+    def __init__(self, step_ms: float = STUB_STEP_MS):
+        self.step_s = step_ms / 1000
+
+    def prefill(self, prompts: list[str]) -> list:
+        return [
+            iter(f"[LOCAL] Processed on-prem ({len(p.split())} words). No data left the network.".split(" "))
+            for p in prompts
+        ]
+
+    def step(self, states: list) -> list[str | None]:
+        time.sleep(self.step_s)
+        out = []
+        for words in states:
+            word = next(words, None)
+            out.append(None if word is None else word + " ")
+        return out
+
+
+class BatchingBackend:
+    """Continuous batching scheduler for an in-process StepModel."""
+
+    def __init__(self, model: StepModel, max_batch: int = MAX_BATCH, max_queue: int = MAX_QUEUE):
+        self.model = model
+        self.name = model.name
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._waiting: deque[Generation] = deque()
+        self._active: list[Generation] = []
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.steps = 0
+        self.batched_tokens = 0
+        self.completed = 0
+
+    def submit(self, prompt: str, max_new_tokens: int | None = None) -> Generation:
+        """Queues a request; raises LocalQueueFull when max_queue requests are already waiting."""
+        if len(self._waiting) >= self.max_queue:
+            raise LocalQueueFull(f"{self.max_queue} local requests already waiting")
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="local-inference")
+
+        gen = Generation(prompt, min(max_new_tokens or MAX_NEW_TOKENS, MAX_NEW_TOKENS))
+        self._waiting.append(gen)
+        self._wake.set()
+        return gen
+
+    async def _run(self):
+        while True:
+            if not self._active and not self._waiting:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            # Admit waiting requests into free batch slots, then drop cancelled ones
+            admitted = []
+            while self._waiting and len(self._active) + len(admitted) < self.max_batch:
+                gen = self._waiting.popleft()
+                if not gen.cancelled:
+                    admitted.append(gen)
+            try:
+                if admitted:
+                    states = await pipeline.run_cpu("local_prefill", self.model.prefill, [g.prompt for g in admitted])
+                    for gen, state in zip(admitted, states):
+                        gen.state = state
+                    self._active.extend(admitted)
+
+                self._active = [g for g in self._active if not g.cancelled]
+                if not self._active:
+                    continue
+                tokens = await pipeline.run_cpu("local_infer", self.model.step, [g.state for g in self._active])
+            except Exception as e:
+                for gen in self._active + admitted:
+                    gen.finish(LocalBackendError(f"Local model failed: {e}"))
+                self._active = []
+                continue
+
+            self.steps += 1
+            self.batched_tokens += len(self._active)
+            still_running = []
+            for gen, token in zip(self._active, tokens):
+                if token is not None:
+                    gen.emit(token)
+                if token is None or gen.generated >= gen.max_new_tokens:
+                    gen.finish()
+                    self.completed += 1
+                else:
+                    still_running.append(gen)
+            self._active = still_running
+
+    def stats(self) -> dict:
+        return {
+            "backend": "in-process",
+            "model": self.name,
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "waiting": len(self._waiting),
+            "active": len(self._active),
+            "steps": self.steps,
+            "completed": self.completed,
+            "mean_batch_size": round(self.batched_tokens / self.steps, 2) if self.steps else 0.0,
+        }
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+        for gen in list(self._waiting) + self._active:
+            gen.finish(LocalBackendError("Local inference shutting down"))
+
+
+# --- Local inference server ---
+
+class OpenAICompatibleBackend:
+    """
+    Streams chat completions from a local OpenAI-compatible server. The server
+    batches concurrent requests itself; up to `max_batch` are kept in flight
+    and at most `max_queue` wait behind them.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, model: str = MODEL,
+                 max_batch: int = MAX_BATCH, max_queue: int = MAX_QUEUE):
+        self.base_url = base_url.rstrip("/")
+        self.name = model
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._slots: asyncio.Semaphore | None = None
+        self._client: httpx.AsyncClient | None = None
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+
+    def submit(self, prompt: str, max_new_tokens: int | None = None) -> Generation:
+        if self.waiting >= self.max_queue:
+            raise LocalQueueFull(f"{self.max_queue} local requests already waiting")
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=REQUEST_TIMEOUT_S)
+            self._slots = asyncio.Semaphore(self.max_batch)
+
+        gen = Generation(prompt, min(max_new_tokens or MAX_NEW_TOKENS, MAX_NEW_TOKENS))
+        self.waiting += 1
+        gen.task = asyncio.create_task(self._run(gen))
+        return gen
+
+    async def _run(self, gen: Generation):
+        queued = True
+        try:
+            async with self._slots:
+                queued = False
+                self.waiting -= 1
+                self.active += 1
+                try:
+                    await self._stream(gen)
+                finally:
+                    self.active -= 1
+            self.completed += 1
+            gen.finish()
+        except asyncio.CancelledError:
+            gen.finish()
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            gen.finish(LocalBackendError(f"Local model failed: {e}"))
+        finally:
+            if queued:
+                self.waiting -= 1  # cancelled before getting a slot
+
+    async def _stream(self, gen: Generation):
+        body = {
+            "model": self.name,
+            "messages": [{"role": "user", "content": gen.prompt}],
+            "max_tokens": gen.max_new_tokens,
+            "stream": True,
+        }
+        async with self._client.stream("POST", "/chat/completions", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    gen.emit(delta)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "openai-compatible",
+            "model": self.name,
+            "url": self.base_url,
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_sse(gen: Generation, head: dict):
+    """SSE body for a streamed /proxy response: `decision`, then `token`s, then `done` (or `error`)."""
+    yield _sse("decision", head)
+    try:
+        async for token in gen:
+            yield _sse("token", {"text": token})
+    except LocalBackendError as e:
+        yield _sse("error", {"detail": str(e)})
+        return
+    yield _sse("done", {"tokens": gen.generated})
+
+
+def _make_backend():
+    if BACKEND == "stub":
+        return BatchingBackend(StubModel())
+    if BACKEND == "openai":
+        return OpenAICompatibleBackend()
+    return None
+
+
+local_backend = _make_backend()
@@ -1,22 +1,41 @@
+import asyncio
 import hashlib
-import json
 import os
-from pathlib import Path
+from contextlib import AsyncExitStack
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Header, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional
 
 
-from app.detector import analyze_text
 from app.redactor import redact_text
-from app.content_safety import check_content_risk
-from app.gemini_ocr import scan_document
+from app.pattern_registry import to_dicts
+from app.content_safety import check_content_risk_async, close_async_client, warm_async_client
+from app.gemini_ocr import scan_upload_async, warm_up as warm_up_gemini
 from app.alpine_services import PrivGuardGateway
-from app.policy import PolicyEngine
-from Security import log_event
+from app.deadline import Deadline, StageUnavailable
+from app.policy import FAIL_OPEN, LOCAL_ONLY
+from app.tenants import tenants, UnknownTenantError
+from app.profiler import profiler
+from app.admission import admission
+from app.uploads import SpooledUpload, receive_upload
+from app.detection_cache import detection_cache
+from app.jobs import jobs, QueueFull
+from app.local_inference import local_backend, LocalQueueFull, LocalBackendError, stream_sse
+from app.analysis_sessions import sessions as analysis_sessions, apply_edits, EditError
+from app.warmup import warmup
+from app.pattern_stats import pattern_stats
+from app.events import broker, SUBSCRIBER_BUFFER
+from app import rollups
+from app import pipeline
+from Security import log_event, read_recent
+from Security.audit_logger import AUDIT_POLICY, close_backend as close_audit_backend
+from Security.audit_verifier import verify_chain
+from Security import audit_columnar
 
 load_dotenv()
 
@@ -28,11 +47,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-policy = PolicyEngine()
 
 alpine_api_key = os.getenv("ALPINE_API_KEY")
 alpine_gateway = PrivGuardGateway(api_key=alpine_api_key)
 
+
+@app.on_event("startup")
+async def startup():
+    broker.attach(asyncio.get_running_loop())
+    jobs.start()
+    await asyncio.to_thread(rollups.attach)
+    # Warm the pipeline and upstream pools in the background; /ready reports 503 until done
+    app.state.warmup_task = asyncio.create_task(warmup.run({
+        "content_safety": warm_async_client,
+        "alpine": alpine_gateway.warm_up,
+        "gemini": warm_up_gemini,
+    }))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.warmup_task.cancel()
+    await jobs.stop()
+    if local_backend is not None:
+        await local_backend.aclose()
+    rollups.rollups.save()
+    await alpine_gateway.aclose()
+    await close_async_client()
+    pipeline.shutdown()
+    close_audit_backend()
+
 # Since, visiting "/" Returns 404 error
 @app.get("/")
 def index():
@@ -46,27 +90,21 @@ def index():
 def health_check():
     return {"status": "ok", "alpine_connected": bool(alpine_api_key)}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 503 until the deploy warm-up has finished (see app/warmup.py)."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 # --- SOC DASHBOARD: Audit Log ---
 
-AUDIT_LOG_PATH = Path(__file__).resolve().parent.parent / "Security" / "audit_log.jsonl"
+# Only the fields _compute_stats reads are decoded
+STATS_FIELDS = ("policy_action", "routing_decision", "detected_risk_level")
 
 
-def _read_audit_logs(limit: int = 50) -> list[dict]:
-    """Read and parse audit log JSONL. Returns last `limit` entries, newest first."""
-    if not AUDIT_LOG_PATH.exists():
-        return []
-    entries = []
-    with open(AUDIT_LOG_PATH, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entries.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-    entries.reverse()
-    return entries[:limit]
+def _read_audit_logs(limit: int = 50, fields=None) -> list[dict]:
+    """Returns last `limit` audit entries, newest first (only opens the segments needed)."""
+    return read_recent(limit, fields)
 
 
 @app.get("/logs")
@@ -75,10 +113,7 @@ def get_logs():
     return {"logs": _read_audit_logs(50)}
 
 
-@app.get("/stats")
-def get_stats():
-    """Calculate SOC metrics from audit logs."""
-    entries = _read_audit_logs(limit=10_000)
+def _compute_stats(entries: list[dict]) -> dict:
     total = len(entries)
     blocked = sum(1 for e in entries if e.get("policy_action") == "BLOCK")
     sovereign = sum(
@@ -99,39 +134,348 @@ def get_stats():
     }
 
 
+@app.get("/stats")
+def get_stats():
+    """Calculate SOC metrics from audit logs."""
+    return _compute_stats(_read_audit_logs(limit=10_000, fields=STATS_FIELDS))
+
+
+@app.get("/stats/timeseries")
+def get_stats_timeseries(window: str = "24h", step: str = "1h"):
+    """
+    Pre-aggregated SOC metrics per time step (requests, blocks, sovereign routes,
+    risk / role / pattern counts, latency percentiles). No log scan involved.
+    """
+    try:
+        series = rollups.rollups.timeseries(rollups.parse_duration(window), rollups.parse_duration(step))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"window": window, "step": step, "points": series}
+
+
+def _events_snapshot() -> tuple[dict, dict]:
+    """(snapshot, ids of the events it already includes per SSE event kind)."""
+    entries = _read_audit_logs(limit=10_000, fields=STATS_FIELDS + ("event_id",))
+    logs = _read_audit_logs(50)
+    # Only events written after subscribing can also be queued: the newest ones
+    seen = {
+        "stats_delta": {e.get("event_id") for e in entries[:SUBSCRIBER_BUFFER]},
+        "log": {e.get("event_id") for e in logs},
+    }
+    return {**_compute_stats(entries), "logs": logs}, seen
+
+
+@app.get("/events")
+async def stream_events(snapshot: bool = True):
+    """
+    Server-Sent Events stream of new audit events.
+    Emits `stats` (initial snapshot: the /stats counters plus the /logs entries
+    under "logs"), then `log` + `stats_delta` per event. Subscribing with the
+    snapshot is gap-free: events are neither missed nor counted twice.
+    Slow consumers receive `dropped` and are disconnected.
+    """
+    sub = broker.subscribe()
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many event subscribers")
+
+    initial = seen = None
+    if snapshot:
+        try:
+            initial, seen = await asyncio.to_thread(_events_snapshot)
+        except Exception:
+            broker.unsubscribe(sub)
+            raise
+
+    return StreamingResponse(
+        broker.stream(sub, initial, seen),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _require_audit_reader(x_user_role: str):
+    read_roles = AUDIT_POLICY.get("access_controls", {}).get("log_read_roles", ["admin"])
+    if (x_user_role or "").lower() not in read_roles:
+        raise HTTPException(status_code=403, detail="Audit read role required")
+
+
+@app.get("/audit/verify")
+async def verify_audit_chain(full: bool = False, x_user_role: str = Header(default="student")):
+    """
+    Verifies the audit hash chain (parallel per segment, resuming from the
+    signed checkpoint unless `full`). Reports the first broken link, if any.
+    """
+    _require_audit_reader(x_user_role)
+    return await asyncio.to_thread(verify_chain, full)
+
+
+@app.get("/audit/query")
+async def query_audit_logs(
+    endpoint: Optional[str] = None,
+    role: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    action: Optional[str] = None,
+    route: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    group_by: Optional[str] = None,
+    columns: Optional[str] = None,
+    limit: int = 1000,
+    x_user_role: str = Header(default="student")
+):
+    """
+    Queries the columnar (Parquet) audit dataset.
+    Filters, time range and projection are pushed down to the reader;
+    `group_by` (comma-separated: endpoint, role, risk_level, action, route, date)
+    returns counts and latency stats per group instead of rows.
+    """
+    _require_audit_reader(x_user_role)
+
+    group_keys = [g.strip() for g in group_by.split(",") if g.strip()] if group_by else None
+    unknown = [g for g in group_keys or [] if g not in audit_columnar.GROUP_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by field(s): {', '.join(unknown)}")
+    for name, value in (("start", start), ("end", end)):
+        if value:
+            try:
+                audit_columnar.parse_ts(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp '{value}' (expected ISO-8601)")
+
+    return await asyncio.to_thread(
+        audit_columnar.query,
+        filters={"endpoint": endpoint, "role": role, "risk_level": risk_level, "action": action, "route": route},
+        start=start,
+        end=end,
+        group_by=group_keys,
+        columns=[c.strip() for c in columns.split(",")] if columns else None,
+        limit=limit,
+    )
+
+
+@app.get("/admission/stats")
+def get_admission_stats():
+    """In-flight, queued and rejected counts plus queue-wait percentiles."""
+    return admission.stats()
+
+
+@app.get("/analyze/sessions/stats")
+def get_analysis_session_stats():
+    """Incremental analysis sessions: live count, evictions."""
+    return analysis_sessions.stats()
+
+
+@app.get("/local/stats")
+def get_local_inference_stats():
+    """Local model backend: waiting / active requests, batch sizes."""
+    return local_backend.stats() if local_backend is not None else {"backend": "none"}
+
+
+# --- ADMIN: Sampling Profiler ---
+
+class ProfileRequest(BaseModel):
+    seconds: float = 10.0
+    sample_one_in: int = 1
+    wait: bool = True
+
+
+def _require_admin(x_user_role: str):
+    if (x_user_role or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+
+@app.post("/admin/profile")
+async def start_profile(req: ProfileRequest, x_user_role: str = Header(default="student")):
+    """
+    Turns on the sampling profiler for `seconds` (1 in `sample_one_in` requests
+    on /proxy and /upload_scan). With `wait`, returns the collapsed-stack dump
+    once the window closes; otherwise fetch it later from GET /admin/profile.
+    """
+    _require_admin(x_user_role)
+    if not profiler.start(req.seconds, req.sample_one_in):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+
+    if not req.wait:
+        return profiler.status()
+
+    await asyncio.to_thread(profiler.wait)
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/admin/profile")
+def get_profile(x_user_role: str = Header(default="student")):
+    """Collapsed-stack dump of the current/last profiling session."""
+    _require_admin(x_user_role)
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/admin/profile/status")
+def get_profile_status(x_user_role: str = Header(default="student")):
+    _require_admin(x_user_role)
+    return profiler.status()
+
+
+# --- ADMIN: Pattern Cost Profiler ---
+
+@app.get("/patterns/stats")
+def get_pattern_stats(reset: bool = False, x_user_role: str = Header(default="student")):
+    """
+    Per-pattern cost and hit-rate: evaluations, time, matches, slow
+    evaluations (backtracking suspects) and decisive share of policy outcomes
+    (sampled live traffic, PRIVGUARD_PATTERN_ATTRIBUTION_SAMPLE; see app/pattern_report.py for a full corpus run).
+    """
+    _require_admin(x_user_role)
+    snapshot = pattern_stats.snapshot()
+    if reset:
+        pattern_stats.reset()
+    return snapshot
+
+
+# --- ADMIN: Tenants ---
+
+@app.get("/tenants/stats")
+def get_tenant_stats(x_user_role: str = Header(default="student")):
+    """Compiled tenant cache: cached tenants, hits, misses, evictions."""
+    _require_admin(x_user_role)
+    return tenants.stats()
+
+
+@app.post("/tenants/reload")
+def reload_tenants(tenant_id: Optional[str] = None, x_user_role: str = Header(default="student")):
+    """Drops one tenant (or all) from the cache; it is recompiled from disk on next use."""
+    _require_admin(x_user_role)
+    tenants.invalidate(tenant_id)
+    return tenants.stats()
+
+
 # --- NEW V2 ENDPOINT: DOCUMENT SCANNER ---
 # This is the "Killer Feature" for TII/Government usage
 
-@app.post("/upload_scan")
+# multipart/form-data body, parsed while it streams (see app/uploads.py)
+UPLOAD_SCAN_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "policy_mode": {"type": "string", "default": "REDACT_CLOUD"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@app.post("/upload_scan", openapi_extra=UPLOAD_SCAN_BODY)
 async def upload_scan(
-    file: UploadFile = File(...), 
-    policy_mode: str = Form("REDACT_CLOUD")
+    request: Request,
+    x_user_role: str = Header(default="student"),
+    x_deadline_ms: Optional[int] = Header(default=None)
 ):
     """
     PrivGuard v2: The Sovereign Document Scanner (Sovereign Mode)
-    1. Receives a raw PDF/Image (Messy, scanned).
+    1. Receives a raw PDF/Image (Messy, scanned), streamed to a spool with a size limit.
     2. Uses Gemini 1.5 Flash to 'see' the text (OCR).
     3. Uses Alpine Privacy API to detect & redact PII contextually.
     4. Returns safe, clean text.
     """
+    deadline = Deadline.for_endpoint("/upload_scan", x_deadline_ms)
+    async with admission.admit("/upload_scan", x_user_role):
+        upload, fields = await receive_upload(request, admission.upload_limit)
+        try:
+            return await _upload_scan_pipeline(upload, fields.get("policy_mode", "REDACT_CLOUD"), x_user_role, deadline)
+        finally:
+            upload.close()
+
+
+# Alpine DocumentPrivacy action → (audit action, route); PII was found unless ALLOW_CLOUD without "meta"
+ALPINE_AUDIT_ACTIONS = {
+    "BLOCK": ("BLOCK", "NONE"),
+    "ROUTE_PREM": ("LOCAL", "LOCAL"),
+    "ALLOW_CLOUD": ("ALLOW", "CLOUD_LLM"),
+    "FAIL_OPEN": ("FAIL_OPEN", "CLOUD_LLM"),
+}
+
+
+def _document_outcome(result: dict | None) -> tuple[str, str, str]:
+    """(risk level, action, route) for the audit event of a document scan."""
+    if result is None:
+        return "UNKNOWN", "OCR_FAILED", "NONE"
+    action, route = ALPINE_AUDIT_ACTIONS.get(result.get("action"), (result.get("action") or "UNKNOWN", "UNKNOWN"))
+    if action == "FAIL_OPEN":
+        return "UNKNOWN", action, route
+    if action == "ALLOW" and result.get("meta"):
+        action = "REDACT"  # sanitized before going to the cloud
+    return ("LOW" if action == "ALLOW" else "HIGH"), action, route
+
+
+async def _degraded_privacy_scan(text: str, role: str, error: StageUnavailable) -> dict:
+    """Stands in for the Alpine result when the privacy scan is unavailable, per the role's failure mode."""
+    tenant = await _resolve_tenant(None)
+    mode = tenant.policy.failure_mode(role)
+    pipeline.note_degraded(error.stage, error.reason, mode)
+
+    if mode == FAIL_OPEN:
+        return {"action": "FAIL_OPEN", "reason": str(error), "payload": text}
+    if mode == LOCAL_ONLY:
+        entities = await pipeline.run_cpu("detect", tenant.detector.analyze_text, text)
+        redacted = await pipeline.run_cpu("redact", redact_text, text, entities)
+        return {
+            "action": "ROUTE_PREM",
+            "target": local_backend.name if local_backend is not None else None,
+            "payload": redacted,
+            "meta": "Local-only detection (privacy scan unavailable)"
+        }
+    return {"action": "BLOCK", "target": None, "payload": "[BLOCKED: privacy scan unavailable]"}
+
+
+async def _upload_scan_pipeline(upload: SpooledUpload, policy_mode: str, role: str, deadline: Deadline,
+                                endpoint: str = "/upload_scan"):
+    trace = pipeline.start_trace()
+    result = None
+    error_action = None
     try:
-        # 1. Read bytes
-        content_bytes = await file.read()
-        
-        # 2. Get the Mime Type (gemini_ocr normalizes None/empty/PDF variants)
-        content_type = file.content_type or "application/pdf"
-
-        # 3. Pass BOTH to Gemini
-        raw_text = scan_document(content_bytes, mime_type=content_type)
-        
-        if not raw_text:
-            return {"error": "OCR Failed. Could not extract text from document."}
-            
-        # 4. Privacy Scan
-        result = alpine_gateway.route_request(raw_text, policy=policy_mode)
-        
+        with profiler.request(endpoint):
+            # 1. Get the Mime Type (gemini_ocr normalizes None/empty/PDF variants)
+            content_type = upload.content_type or "application/pdf"
+
+            # 2. OCR via Gemini (awaited — never blocks the event loop);
+            # identical documents (same SHA-256) reuse the cached text if opted in
+            raw_text = detection_cache.get_document_text(upload.sha256)
+            if detection_cache.documents_enabled:
+                pipeline.note_cache("ocr", raw_text is not None)
+            if raw_text is None:
+                try:
+                    with pipeline.timed("ocr"):
+                        raw_text = await deadline.run("ocr", scan_upload_async(upload, mime_type=content_type))
+                except StageUnavailable as e:
+                    # No local OCR to fall back on
+                    error_action = "OCR_UNAVAILABLE"
+                    raise HTTPException(status_code=504, detail=str(e))
+                if raw_text:
+                    detection_cache.set_document_text(upload.sha256, raw_text)
+
+            if not raw_text:
+                return {"error": "OCR Failed. Could not extract text from document."}
+
+            # 3. Privacy Scan (within the remaining budget; degrades per role when unavailable)
+            try:
+                with pipeline.timed("privacy_scan"):
+                    result = await deadline.run(
+                        "privacy_scan", alpine_gateway.route_request_async(raw_text, policy=policy_mode, fail_open=False)
+                    )
+            except StageUnavailable as e:
+                result = await _degraded_privacy_scan(raw_text, role, e)
+
         return {
             "status": "success",
+            "document_sha256": upload.sha256,
+            "document_bytes": upload.size,
             "original_snippet": raw_text[:200] + "...",
             "privacy_action": result["action"],
             "safe_output": result.get("payload", ""),
@@ -139,112 +483,505 @@ async def upload_scan(
             "decision_source": "PrivGuard Policy Engine"
         }
 
+    except asyncio.CancelledError:
+        error_action = "CANCELLED"  # job cancelled mid-scan
+        raise
+
+    except HTTPException:
+        raise
+
     except Exception as e:
+        error_action = "ERROR"
         print(f"Upload Scan Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        # Every scan is audited, including OCR failures, errors and cancellations
+        risk, action, route = ("UNKNOWN", error_action, "NONE") if error_action else _document_outcome(result)
+        pages = await pipeline.run_cpu("page_count", upload.page_count)
+        await _audit(
+            trace, endpoint, role, action,
+            risk_level=risk,
+            route=route,
+            request_hash=upload.sha256,
+            document={"size_bytes": upload.size, "pages": pages, "content_type": upload.content_type},
+        )
+
+# --- DOCUMENT SCAN JOBS (async /upload_scan) ---
+
+UPLOAD_SCAN_JOB_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "policy_mode": {"type": "string", "default": "REDACT_CLOUD"},
+                        "priority": {"type": "string", "enum": ["high", "normal", "low"], "default": "normal"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@app.post("/jobs/upload_scan", status_code=202, openapi_extra=UPLOAD_SCAN_JOB_BODY)
+async def submit_upload_scan(
+    request: Request,
+    x_user_role: str = Header(default="student")
+):
+    """
+    Queues a document scan and returns its job id immediately.
+    Poll GET /jobs/{job_id} or follow GET /jobs/{job_id}/events for the result.
+    Resubmitting the same document with the same policy_mode and role returns the existing job.
+    """
+    async with admission.admit("/jobs", x_user_role):
+        upload, fields = await receive_upload(request, admission.upload_limit)
+
+    policy_mode = fields.get("policy_mode", "REDACT_CLOUD")
+    # The result depends on the role (failure mode, audited role): never share it across roles
+    role = (x_user_role or "student").lower()
+    try:
+        job, created = jobs.submit(
+            "upload_scan",
+            # The budget starts when a worker picks the job up
+            lambda: _upload_scan_pipeline(
+                upload, policy_mode, x_user_role, Deadline.for_endpoint("/jobs/upload_scan"), endpoint="/jobs/upload_scan"
+            ),
+            priority=fields.get("priority", "normal"),
+            key=f"upload_scan:{upload.sha256}:{policy_mode}:{role}",
+            cleanup=upload.close,
+            owner=role,
+        )
+    except ValueError as e:
+        upload.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        upload.close()
+        raise HTTPException(
+            status_code=429,
+            detail=f"Job queue full ({e}); retry later",
+            headers={"Retry-After": str(admission.retry_after_s)},
+        )
+
+    return JSONResponse(
+        status_code=202 if created else 200,
+        content={**job.to_dict(), "deduplicated": not created},
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+@app.get("/jobs/stats")
+def get_job_stats():
+    """Jobs per status, worker count and completion counters."""
+    return jobs.stats()
+
+
+def _get_job(job_id: str, x_user_role: str):
+    # Jobs are scoped to the submitting role; other roles get the same 404 as an unknown id
+    job = jobs.get(job_id, (x_user_role or "student").lower())
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, x_user_role: str = Header(default="student")):
+    """Job status; includes `result` once succeeded, `error` if failed."""
+    return _get_job(job_id, x_user_role).to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+def stream_job(job_id: str, x_user_role: str = Header(default="student")):
+    """Server-Sent Events: a `status` event per state change until the job finishes."""
+    job = _get_job(job_id, x_user_role)
+    return StreamingResponse(
+        jobs.stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str, x_user_role: str = Header(default="student")):
+    """Cancels a queued or running job (no effect once finished)."""
+    job = _get_job(job_id, x_user_role)
+    return jobs.cancel(job.id).to_dict()
+
 # --- EXISTING V1 ENDPOINTS (Still supported for legacy use) ---
 
+async def _resolve_tenant(tenant_id: Optional[str]):
+    """Compiled policy + detector for the X-Tenant-ID header (global config when absent)."""
+    try:
+        tenant = tenants.peek(tenant_id)
+        if tenant is None:
+            # First request for this tenant: compile off the event loop
+            tenant = await pipeline.run_cpu("tenant_load", tenants.get, tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant '{tenant_id}'")
+    return tenant
+
 # Analyze Endpoint
 class AnalyzeRequest(BaseModel):
     text: str
 
 @app.post("/analyze")
-def analyze(req: AnalyzeRequest):
-    entities = analyze_text(req.text)
-    return {"entities": entities}
+async def analyze(
+    req: AnalyzeRequest,
+    x_user_role: str = Header(default="student"),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    admission.check_prompt_size(req.text)
+    tenant = await _resolve_tenant(x_tenant_id)
+    async with admission.admit("/analyze", x_user_role):
+        trace = pipeline.start_trace()
+        entities = await pipeline.run_cpu("detect", tenant.detector.analyze_text, req.text)
+        await _audit(
+            trace, "/analyze", x_user_role, "ANALYZE",
+            risk_level=_highest_risk(entities), route="CLIENT", detections=entities, text=req.text,
+        )
+    return {"entities": to_dicts(entities)}
 
 class RedactRequest(BaseModel):
     text: str
 
 @app.post("/redact")
-def redact(req: RedactRequest):
-    entities = analyze_text(req.text)
-    redacted = redact_text(req.text, entities)
+async def redact(
+    req: RedactRequest,
+    x_user_role: str = Header(default="student"),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    admission.check_prompt_size(req.text)
+    tenant = await _resolve_tenant(x_tenant_id)
+    async with admission.admit("/redact", x_user_role):
+        trace = pipeline.start_trace()
+        entities = await pipeline.run_cpu("detect", tenant.detector.analyze_text, req.text)
+        redacted = await pipeline.run_cpu("redact", redact_text, req.text, entities)
+        await _audit(
+            trace, "/redact", x_user_role, "REDACT" if entities else "ALLOW",
+            risk_level=_highest_risk(entities), route="CLIENT", detections=entities, text=req.text,
+        )
     return {
         "original_text": req.text,
-        "entities": entities,
+        "entities": to_dicts(entities),
         "redacted_text": redacted
     }
 
+# Incremental analysis sessions (interactive editors: analyze as the user types)
+class TextEdit(BaseModel):
+    start: int
+    end: int
+    text: str = ""
+
+class SessionCreateRequest(BaseModel):
+    text: str = ""
+
+class SessionUpdateRequest(BaseModel):
+    version: int       # version the edits were made against (from the last response)
+    edits: list[TextEdit]
+
+
+async def _session_analysis(session, text: str, x_user_role: str):
+    """Re-analyzes the changed windows of `session` and returns the updated detections + redaction."""
+    tenant = await _resolve_tenant(session.tenant_id)
+    async with admission.admit("/analyze", x_user_role):
+        trace = pipeline.start_trace()
+        incremental = await pipeline.run_cpu("detect", session.analyze, tenant.detector, text)
+        redacted = await pipeline.run_cpu("redact", redact_text, session.text, session.detections)
+        await _audit(
+            trace, "/analyze/sessions", x_user_role, "ANALYZE",
+            risk_level=_highest_risk(session.detections), route="CLIENT",
+            detections=session.detections, text=session.text,
+        )
+    return {
+        "session_id": session.id,
+        "version": session.version,
+        "entities": to_dicts(session.detections),
+        "redacted_text": redacted,
+        "incremental": incremental,
+    }
+
+
+def _get_session(session_id: str, tenant_id: Optional[str]):
+    session = analysis_sessions.get(session_id, tenant_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+    return session
+
+
+@app.post("/analyze/sessions", status_code=201)
+async def create_analysis_session(
+    req: SessionCreateRequest,
+    x_user_role: str = Header(default="student"),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    """Opens an incremental analysis session with the initial text (fully analyzed)."""
+    admission.check_prompt_size(req.text)
+    await _resolve_tenant(x_tenant_id)
+    session = analysis_sessions.create(x_tenant_id)
+    async with session.lock:
+        return await _session_analysis(session, req.text, x_user_role)
+
+
+@app.patch("/analyze/sessions/{session_id}")
+async def update_analysis_session(
+    session_id: str,
+    req: SessionUpdateRequest,
+    x_user_role: str = Header(default="student"),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    """
+    Applies edits ({start, end, text} replacements, in order) to the session text
+    and re-analyzes only the sentence windows they touched.
+    409 if the edits were made against an older version: reopen the session with the full text.
+    """
+    session = _get_session(session_id, x_tenant_id)
+    async with session.lock:
+        if req.version != session.version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Session is at version {session.version}, edits were made against {req.version}"
+            )
+        try:
+            text = apply_edits(session.text, [(e.start, e.end, e.text) for e in req.edits])
+        except EditError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        admission.check_prompt_size(text)
+        return await _session_analysis(session, text, x_user_role)
+
+
+@app.delete("/analyze/sessions/{session_id}", status_code=204)
+def close_analysis_session(session_id: str, x_tenant_id: Optional[str] = Header(default=None)):
+    if not analysis_sessions.delete(session_id, x_tenant_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+
+
 class ProxyRequest(BaseModel):
     text: str
     user_role: str = "Student"
+    stream: bool = False  # SAFE_MODE / LOCAL answers as Server-Sent Events (decision, token..., done)
+    max_tokens: Optional[int] = None
 
 @app.post("/proxy")
-def proxy(req: ProxyRequest, x_user_role: str = Header(default="student")):
+async def proxy(
+    req: ProxyRequest,
+    x_user_role: str = Header(default="student"),
+    x_tenant_id: Optional[str] = Header(default=None),
+    x_deadline_ms: Optional[int] = Header(default=None)
+):
+    deadline = Deadline.for_endpoint("/proxy", x_deadline_ms)
+    # Admission / tenant errors (400 / 404 / 413 / 429) are raised before the pipeline's 500 handler
+    admission.check_prompt_size(req.text)
+    tenant = await _resolve_tenant(x_tenant_id)
+    effective_role = (x_user_role or req.user_role or "student").lower()
+
+    async with AsyncExitStack() as slots:
+        await slots.enter_async_context(admission.admit("/proxy", effective_role))
+        try:
+            with profiler.request("/proxy"):
+                response = await _proxy_pipeline(req, x_user_role, tenant, deadline)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        if isinstance(response, StreamingResponse):
+            # A streamed local answer keeps its admission slots until the stream
+            # ends (background tasks also run when the client disconnects)
+            response.background = BackgroundTask(slots.pop_all().aclose)
+        return response
+
+
+def _audit_event(endpoint: str, role: str, action: str, risk_level: str, route: str, detections: list,
+                 text: str | None, request_hash: str | None, latency_ms: float, stages: dict, cache_hits: dict,
+                 degraded: list, document: dict | None):
+    """Runs on the audit executor: hashing + hash-chained append."""
+    if request_hash is None:
+        request_hash = hashlib.sha256(text.encode()).hexdigest()
+
+    log_event(
+        user_role=role,
+        detected_risk=risk_level,
+        matched_patterns=[d.entity_type for d in detections],
+        action_taken=action,
+        routing_decision=route,
+        request_hash=request_hash,
+        processing_latency_ms=latency_ms,
+        endpoint=endpoint,
+        stage_latency_ms=stages,
+        cache_hits=cache_hits,
+        document=document,
+        degraded=degraded
+    )
+
+
+async def _audit(trace, endpoint: str, role: str, action: str, *, risk_level: str, route: str,
+                 detections: list = (), text: str | None = None, request_hash: str | None = None,
+                 document: dict | None = None):
+    """Audits one request with its timings so far (safe — never breaks the API)."""
     try:
-        effective_role = (x_user_role or req.user_role or "student").lower()
-        
-        # 1) AZURE SAFETY CHECK
-        azure_severity = check_content_risk(req.text)
-
-        # 2) Detects PII / Secrets contextually
-        detections = analyze_text(req.text)
-
-        # 3) Uses Policy Engine to decide on the action to take (BLOCK / LOCAL / REDACT / ALLOW)
-        decision = policy.evaluate(
-            role=effective_role,
-            detections=detections,
-            azure_severity=azure_severity
+        await pipeline.run_audit(
+            _audit_event, endpoint, (role or "student").lower(), action, risk_level, route, detections,
+            text, request_hash, trace.elapsed_ms(), dict(trace.stages), dict(trace.cache), list(trace.degraded),
+            document
+        )
+    except Exception as log_error:
+        # Never interrupt gateway execution if logging fails
+        print("⚠️ Audit log failed but request continued:", log_error)
+
+
+def _highest_risk(detections: list) -> str:
+    top = max(detections, key=lambda d: d.weight, default=None)
+    return top.risk_level if top is not None else "LOW"
+
+
+def _detect(tenant, role: str, text: str):
+    """
+    Sovereignty marker scan + detection: (detections, partial, markers).
+    Huge prompts stop detecting once a BLOCK is certain for this role and
+    these markers (partial detections).
+    """
+    policy = tenant.policy
+    markers = policy.find_markers(text)
+    detections, partial = tenant.detector.analyze_text_with_early_exit(
+        text, stop_when=lambda found: policy.block_certain(role, found, markers)
+    )
+    return detections, partial, markers
+
+
+def _evaluate_policy(policy, role: str, markers: set, detections: list, azure_severity: int) -> dict:
+    """
+    Policy decision. Sampled requests are also attributed per pattern
+    (pattern_stats), off the request path.
+    """
+    decision = policy.evaluate(role=role, detections=detections, azure_severity=azure_severity, markers=markers)
+    if pattern_stats.sample_outcome():
+        pipeline.background_executor.submit(
+            pattern_stats.record_outcome, policy, role, list(detections), dict(decision), azure_severity, markers
         )
+    return decision
+
 
-        # 4) Logs the event to the audit log (safe — never breaks API)
+async def _content_safety(text: str, deadline: Deadline):
+    """(severity, None), or (0, StageUnavailable) if Azure timed out or failed within the budget."""
+    with pipeline.timed("content_safety"):
         try:
-            request_hash = hashlib.sha256(req.text.encode()).hexdigest()
-            matched_patterns = [
-                d.get("entity_type", "UNKNOWN")
-                for d in detections
-            ]
-
-            log_event(
-                user_role=effective_role,
-                detected_risk=decision["risk_level"],
-                matched_patterns=matched_patterns,
-                action_taken=decision["action"],
-                routing_decision=decision.get("route", "UNKNOWN"),
-                request_hash=request_hash,
-                processing_latency_ms=None
-            )
-        except Exception as log_error:
-            # Never interrupt gateway execution if logging fails
-            print("⚠️ Audit log failed but request continued:", log_error)
-
-        # 5) ENFORCEMENT
-        
-        # BLOCKED BY POLICY
-        if decision["action"] == "BLOCK":
-            return {
-                "status": "blocked",
-                "action": "BLOCKED_BY_POLICY",
-                "risk_level": decision["risk_level"],
-                "risk_score": decision["risk_score"],
-                "message": decision.get("reason", "Request blocked due to security policy.")
-            }
+            return await deadline.run("content_safety", check_content_risk_async(text, fail_open=False)), None
+        except StageUnavailable as e:
+            return 0, e
+
+
+async def _proxy_pipeline(req: ProxyRequest, x_user_role: str, tenant, deadline: Deadline):
+    trace = pipeline.start_trace()
+    effective_role = (x_user_role or req.user_role or "student").lower()
+    policy = tenant.policy
+
+    # 1) AZURE SAFETY CHECK (awaited) and 2) PII / Secrets detection (CPU executor)
+    # are independent, so they run concurrently.
+    # Huge prompts stop detecting as soon as a BLOCK is certain (partial detections).
+    (azure_severity, safety_error), (detections, detection_partial, markers) = await asyncio.gather(
+        _content_safety(req.text, deadline),
+        pipeline.run_cpu("detect", _detect, tenant, effective_role, req.text),
+    )
 
-        # ROUTED TO LOCAL / SAFE MODE (Redaction only)
-        if decision.get("route") == "SAFE_MODE" or decision["action"] == "LOCAL":
-            sanitized = redact_text(req.text, detections)
-            return {
-                "status": "success",
-                "action": "ROUTED_TO_LOCAL_MODEL",
-                "risk_level": decision["risk_level"],
-                "risk_score": decision["risk_score"],
-                "sanitized_prompt": sanitized,
-                "llm_response": "[LOCAL] Processed on-prem. No data left the network."
-            }
+    # 3) Uses Policy Engine to decide on the action to take (BLOCK / LOCAL / REDACT / ALLOW)
+    decision = await pipeline.run_cpu(
+        "policy",
+        _evaluate_policy,
+        policy,
+        effective_role,
+        markers,
+        detections,
+        azure_severity
+    )
 
-        # ROUTED TO CLOUD LLM (default)
-        sanitized = redact_text(req.text, detections)
+    # Stopping early is only sound for a BLOCK: anything redacted or forwarded
+    # needs every detection (guards block_certain() against policy drift)
+    if detection_partial and decision["action"] != "BLOCK":
+        detections = await pipeline.run_cpu("detect", tenant.detector.analyze_text, req.text)
+        detection_partial = False
+        decision = await pipeline.run_cpu(
+            "policy", _evaluate_policy, policy, effective_role, markers, detections, azure_severity
+        )
+
+    # Content safety unavailable: degrade per role (fail-closed / local-only / fail-open)
+    if safety_error is not None:
+        mode = policy.failure_mode(effective_role)
+        pipeline.note_degraded(safety_error.stage, safety_error.reason, mode)
+        decision = policy.degrade(decision, mode, safety_error.stage)
+
+    # 4) Logs the event to the audit log (safe — never breaks API)
+    await _audit(
+        trace, "/proxy", effective_role, decision["action"],
+        risk_level=decision["risk_level"], route=decision.get("route", "UNKNOWN"),
+        detections=detections, text=req.text,
+    )
+
+    # 5) ENFORCEMENT
+
+    # BLOCKED BY POLICY
+    if decision["action"] == "BLOCK":
         return {
+            "status": "blocked",
+            "action": "BLOCKED_BY_POLICY",
+            "risk_level": decision["risk_level"],
+            "risk_score": decision["risk_score"],
+            "message": decision.get("reason", "Request blocked due to security policy."),
+            "detection_partial": detection_partial
+        }
+
+    sanitized = await pipeline.run_cpu("redact", redact_text, req.text, detections)
+
+    # ROUTED TO LOCAL / SAFE MODE (on-prem model, see app/local_inference.py)
+    if decision.get("route") == "SAFE_MODE" or decision["action"] == "LOCAL":
+        response = {
             "status": "success",
-            "action": "ROUTED_TO_CLOUD_OPENAI",
+            "action": "ROUTED_TO_LOCAL_MODEL",
             "risk_level": decision["risk_level"],
             "risk_score": decision["risk_score"],
-            "entities_detected": detections,
             "sanitized_prompt": sanitized,
-            "llm_response": "[CLOUD] Safe request processed via Azure OpenAI."
         }
+        if local_backend is None:
+            return {**response, "llm_response": "[LOCAL] Processed on-prem. No data left the network."}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            generation = local_backend.submit(sanitized, req.max_tokens)
+        except LocalQueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Local model saturated ({e}); retry later",
+                headers={"Retry-After": str(admission.retry_after_s)},
+            )
+
+        response["local_model"] = local_backend.name
+        if req.stream:
+            return StreamingResponse(
+                stream_sse(generation, response),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        try:
+            with pipeline.timed("local_infer"):
+                response["llm_response"] = await generation.text()
+        except LocalBackendError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return response
+
+    # ROUTED TO CLOUD LLM (default)
+    return {
+        "status": "success",
+        "action": "ROUTED_TO_CLOUD_OPENAI",
+        "risk_level": decision["risk_level"],
+        "risk_score": decision["risk_score"],
+        "entities_detected": to_dicts(detections),
+        "sanitized_prompt": sanitized,
+        "llm_response": "[CLOUD] Safe request processed via Azure OpenAI."
+    }
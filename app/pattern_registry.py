@@ -0,0 +1,85 @@
+from typing import Dict, List
+
+# Typed view of Security/patterns.json and the detection results that flow
+# through detector → PolicyEngine → redactor. Everything a later stage needs
+# (risk level, weight, category, redaction token) is resolved once when the
+# patterns are loaded, so per-result bookkeeping is an attribute read rather
+# than a scan of the raw pattern list. Results are slots objects; they are
+# converted to dicts only at the API / JSON boundary (to_dicts).
+
+# Risk Weights (used only for scoring)
+RISK_WEIGHT = {
+    "CRITICAL": 100,
+    "HIGH": 75,
+    "MEDIUM": 40,
+    "LOW": 10,
+    "UNKNOWN": 0,
+}
+
+# Presidio confidence assigned to custom pattern matches, by risk level
+SCORE_MAP = {"CRITICAL": 0.95, "HIGH": 0.85, "MEDIUM": 0.6, "LOW": 0.4}
+
+
+class PatternSpec:
+    __slots__ = ("id", "regex", "category", "risk_level", "weight", "confidence", "redaction_token", "description")
+
+    def __init__(self, data: dict):
+        self.id = data["id"]
+        self.regex = data["regex"]
+        self.category = data.get("category")
+        self.risk_level = data.get("risk_level", "MEDIUM")
+        self.weight = RISK_WEIGHT.get(self.risk_level, 0)
+        self.confidence = SCORE_MAP.get(self.risk_level, 0.6)
+        self.redaction_token = data.get("redaction_token")  # None → redactor default
+        self.description = data.get("description", "")
+
+    def __repr__(self):
+        return f"PatternSpec({self.id!r}, {self.risk_level!r})"
+
+
+class Detection:
+    __slots__ = ("entity_type", "start", "end", "score", "risk_level", "weight", "partial", "spec")
+
+    def __init__(self, entity_type: str, start: int, end: int, score: float,
+                 risk_level: str = "UNKNOWN", partial: bool = False, spec: PatternSpec | None = None):
+        self.entity_type = entity_type
+        self.start = start
+        self.end = end
+        self.score = score
+        self.risk_level = risk_level
+        self.weight = spec.weight if spec else RISK_WEIGHT.get(risk_level, 0)
+        self.partial = partial
+        self.spec = spec
+
+    @classmethod
+    def from_spec(cls, spec: PatternSpec, start: int, end: int, score: float | None = None, partial: bool = False):
+        return cls(spec.id, start, end, spec.confidence if score is None else score, spec.risk_level, partial, spec)
+
+    @classmethod
+    def from_dict(cls, d: dict, registry: Dict[str, PatternSpec]):
+        return cls(d["entity_type"], d["start"], d["end"], d["score"], d.get("risk_level", "UNKNOWN"),
+                   d.get("partial", False), registry.get(d["entity_type"]))
+
+    def to_dict(self) -> dict:
+        d = {
+            "entity_type": self.entity_type,
+            "start": self.start,
+            "end": self.end,
+            "score": self.score,
+            "risk_level": self.risk_level,
+        }
+        if self.partial:
+            d["partial"] = True
+        return d
+
+    def __repr__(self):
+        return f"Detection({self.entity_type!r}, {self.start}, {self.end}, {self.score}, {self.risk_level!r})"
+
+
+def build_registry(patterns: List[dict]) -> Dict[str, PatternSpec]:
+    """id → PatternSpec, in patterns.json order."""
+    return {p["id"]: PatternSpec(p) for p in patterns}
+
+
+def to_dicts(detections: List[Detection]) -> List[dict]:
+    return [d.to_dict() for d in detections]
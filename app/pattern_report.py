@@ -0,0 +1,151 @@
+"""
+PrivGuard Pattern Cost Report
+
+Runs a corpus through the detector + policy engine and reports, per pattern in
+Security/patterns.json: evaluation time, match count, decisive share of policy
+outcomes, and a backtracking probe (timing growth on adversarial inputs).
+
+Usage:
+    python -m app.pattern_report --corpus Security/attacks.csv
+    python -m app.pattern_report --probe-only
+"""
+
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+
+import regex
+
+from app.safe_regex import REGEX_FLAGS, SafePattern
+
+PATTERNS_PATH = Path(__file__).resolve().parent.parent / "Security" / "patterns.json"
+
+# Adversarial input shapes; each is repeated and followed by a non-matching tail
+PROBE_UNITS = ["1", "a", "1 ", "1-", "a.", "a@", " ", "-"]
+PROBE_SIZES = [2_000, 4_000, 8_000]
+PROBE_TIMEOUT_S = 2.0
+SUPERLINEAR_RATIO = 3.0  # doubling the input should roughly double the time
+
+
+def load_corpus(path: Path) -> list[tuple[str, str]]:
+    """(prompt, role) pairs from a CSV (prompt/role columns), JSONL (text/role) or plain text file."""
+    if path.suffix == ".csv":
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return [(row["prompt"], row.get("role") or "student") for row in csv.DictReader(f)]
+
+    if path.suffix == ".jsonl":
+        corpus = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    corpus.append((item["text"], item.get("role", "student")))
+        return corpus
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [(line.rstrip("\n"), "student") for line in f if line.strip()]
+
+
+def _time_search(compiled, text: str) -> float | None:
+    start = time.perf_counter()
+    try:
+        compiled.search(text, timeout=PROBE_TIMEOUT_S)
+    except TimeoutError:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def probe_backtracking(pattern: dict) -> dict:
+    """
+    Times the pattern (on the backtracking engine, without a budget) on growing
+    adversarial inputs. Flags it when time grows superlinearly with input size,
+    a probe hits the timeout, or static vetting finds a dangerous construct.
+    """
+    safe = SafePattern(pattern["id"], pattern["regex"])
+    static = {"engine": safe.engine, "findings": safe.findings}
+    compiled = regex.compile(pattern["regex"], flags=REGEX_FLAGS)
+    worst = {"unit": None, "ratio": 0.0, "max_ms": 0.0, "timed_out": False}
+
+    for unit in PROBE_UNITS:
+        timings = []
+        for size in PROBE_SIZES:
+            text = unit * (size // len(unit)) + "!\x00"
+            elapsed = _time_search(compiled, text)
+            if elapsed is None:
+                return {"suspect": True, "unit": unit, "ratio": None, "max_ms": PROBE_TIMEOUT_S * 1000, "timed_out": True, **static}
+            timings.append(elapsed)
+
+        # Ignore sub-millisecond noise
+        ratio = timings[-1] / timings[-2] if timings[-2] > 0.5 else 1.0
+        if ratio > worst["ratio"] or timings[-1] > worst["max_ms"]:
+            worst = {"unit": unit, "ratio": round(ratio, 2), "max_ms": round(timings[-1], 3), "timed_out": False}
+
+    worst["suspect"] = worst["ratio"] >= SUPERLINEAR_RATIO or bool(safe.findings)
+    return {**worst, **static}
+
+
+def run_corpus(corpus: list[tuple[str, str]]) -> dict:
+    # Heavy imports (spaCy model) only when a corpus is actually profiled
+    from app.detector import analyze_text
+    from app.pattern_stats import pattern_stats
+    from app.policy import PolicyEngine
+
+    engine = PolicyEngine()
+    pattern_stats.reset()
+
+    start = time.perf_counter()
+    for text, role in corpus:
+        detections = analyze_text(text)
+        markers = engine.find_markers(text)
+        decision = engine.evaluate(role=role, detections=detections, azure_severity=0, markers=markers)
+        pattern_stats.record_outcome(engine, role, detections, decision, 0, markers)
+
+    report = pattern_stats.snapshot()
+    report["corpus_size"] = len(corpus)
+    report["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def print_report(report: dict | None, probes: dict):
+    if report:
+        print(f"\n=== Pattern cost over {report['corpus_size']} prompts ({report['elapsed_s']}s) ===")
+        print(f"{'pattern':28} {'evals':>6} {'total ms':>10} {'max ms':>8} {'matches':>8} {'decisive':>9}")
+        for p in report["patterns"]:
+            share = f"{p['decisive_share'] * 100:.0f}%" if p["decisive_share"] is not None else "-"
+            print(f"{p['pattern_id']:28} {p['evaluations']:>6} {p['total_ms']:>10.2f} {p['max_ms']:>8.2f} {p['matches']:>8} {share:>9}")
+
+    print("\n=== Backtracking probe ===")
+    for pattern_id, probe in probes.items():
+        flag = "⚠️ SUSPECT" if probe["suspect"] else "ok"
+        detail = "timeout" if probe["timed_out"] else f"x{probe['ratio']} growth, {probe['max_ms']} ms"
+        findings = f" [{', '.join(probe['findings'])}]" if probe["findings"] else ""
+        print(f"{pattern_id:28} {flag:10} {probe['engine']:6} worst input {probe['unit']!r}: {detail}{findings}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-pattern cost / hit-rate report for patterns.json")
+    parser.add_argument("--corpus", type=Path, default=None, help="CSV / JSONL / text corpus of prompts")
+    parser.add_argument("--patterns", type=Path, default=PATTERNS_PATH, help="patterns.json to probe")
+    parser.add_argument("--probe-only", action="store_true", help="Only run the backtracking probe (no NLP model needed)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.patterns, "r") as f:
+        patterns = json.load(f).get("patterns", [])
+
+    probes = {p["id"]: probe_backtracking(p) for p in patterns}
+
+    report = None
+    if not args.probe_only and args.corpus:
+        report = run_corpus(load_corpus(args.corpus))
+
+    if args.json:
+        print(json.dumps({"corpus": report, "backtracking_probe": probes}, indent=2))
+    else:
+        print_report(report, probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Per-pattern instrumentation for Security/patterns.json rules.
+# - evaluation count / time (total, max) and match count per pattern
+# - slow evaluations and match-budget timeouts (possible catastrophic
+#   backtracking) with the worst case seen
+# - how often a pattern's detections were decisive, i.e. removing them would
+#   have changed the policy outcome (action or route)
+# Evaluation counters are per thread (no shared lock on the detection path)
+# and merged on read. Outcome attribution re-evaluates the policy once per
+# matched pattern, so live traffic only attributes 1 in ATTRIBUTION_SAMPLE
+# requests (0 = off, the default), off the request path; the offline report
+# (app/pattern_report.py) attributes every corpus prompt.
+
+SLOW_EVAL_MS = float(os.getenv("PRIVGUARD_SLOW_PATTERN_MS", "50"))
+ATTRIBUTION_SAMPLE = int(os.getenv("PRIVGUARD_PATTERN_ATTRIBUTION_SAMPLE", "0"))
+
+# Set while running work that must not count (deploy warm-up: cold compile times)
+_paused: ContextVar[bool] = ContextVar("privguard_pattern_stats_paused", default=False)
+
+
+def _empty_entry() -> dict:
+    return {
+        "evaluations": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "matches": 0,
+        "requests_matched": 0,
+        "decisive": 0,
+        "slow_evaluations": 0,
+        "timeouts": 0,
+        "worst_text_chars": 0,
+    }
+
+
+class PatternStats:
+
+    def __init__(self, attribution_sample: int = ATTRIBUTION_SAMPLE):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}    # outcome attribution (requests_matched, decisive)
+        self._local = threading.local()
+        self._shards: list[dict] = []        # per-thread evaluation counters
+        self._sample_counter = itertools.count()
+        self.attribution_sample = attribution_sample
+        self.requests = 0
+
+    def _entry(self, pattern_id: str) -> dict:
+        return self._stats.setdefault(pattern_id, _empty_entry())
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "stats", None)
+        if shard is None:
+            shard = self._local.stats = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    # --- Recording ---
+
+    @contextmanager
+    def paused(self):
+        """Evaluations in this context (and work it hands to executors) are not recorded."""
+        token = _paused.set(True)
+        try:
+            yield
+        finally:
+            _paused.reset(token)
+
+    def record_eval(self, pattern_id: str, elapsed_ms: float, matches: int, text_chars: int, timed_out: bool = False):
+        if _paused.get():
+            return
+        # Only the calling thread writes its shard: no lock
+        shard = self._shard()
+        s = shard.get(pattern_id)
+        if s is None:
+            s = shard[pattern_id] = _empty_entry()
+        s["evaluations"] += 1
+        s["total_ms"] += elapsed_ms
+        s["matches"] += matches
+        if elapsed_ms > s["max_ms"]:
+            s["max_ms"] = elapsed_ms
+            s["worst_text_chars"] = text_chars
+        if elapsed_ms >= SLOW_EVAL_MS:
+            s["slow_evaluations"] += 1
+        if timed_out:
+            s["timeouts"] += 1
+
+    def sample_outcome(self) -> bool:
+        """Whether this live request should be attributed (1 in attribution_sample)."""
+        return self.attribution_sample > 0 and next(self._sample_counter) % self.attribution_sample == 0
+
+    def record_outcome(self, engine, role: str, detections: list, decision: dict, azure_severity: int, markers: set = frozenset()):
+        """
+        Counts, per matched pattern, whether its detections were decisive:
+        re-evaluates the policy without that pattern and compares the outcome.
+        """
+        ids = {d.entity_type for d in detections}
+        outcome = (decision["action"], decision.get("route"))
+
+        decisive = set()
+        for pattern_id in ids:
+            remaining = [d for d in detections if d.entity_type != pattern_id]
+            alt = engine.evaluate(role=role, detections=remaining, azure_severity=azure_severity, markers=markers)
+            if (alt["action"], alt.get("route")) != outcome:
+                decisive.add(pattern_id)
+
+        with self._lock:
+            self.requests += 1
+            for pattern_id in ids:
+                s = self._entry(pattern_id)
+                s["requests_matched"] += 1
+                s["decisive"] += int(pattern_id in decisive)
+
+    # --- Reporting ---
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            merged = {pattern_id: dict(s) for pattern_id, s in self._stats.items()}
+            shards = [dict(shard) for shard in self._shards]
+            requests = self.requests
+
+        for shard in shards:
+            for pattern_id, e in shard.items():
+                s = merged.setdefault(pattern_id, _empty_entry())
+                for field in ("evaluations", "total_ms", "matches", "slow_evaluations", "timeouts"):
+                    s[field] += e[field]
+                if e["max_ms"] > s["max_ms"]:
+                    s["max_ms"] = e["max_ms"]
+                    s["worst_text_chars"] = e["worst_text_chars"]
+
+        patterns = []
+        for pattern_id, s in merged.items():
+            patterns.append({
+                "pattern_id": pattern_id,
+                **s,
+                "total_ms": round(s["total_ms"], 3),
+                "max_ms": round(s["max_ms"], 3),
+                "mean_ms": round(s["total_ms"] / s["evaluations"], 4) if s["evaluations"] else None,
+                "decisive_share": round(s["decisive"] / s["requests_matched"], 4) if s["requests_matched"] else None,
+                "backtracking_suspect": s["slow_evaluations"] > 0 or s["timeouts"] > 0,
+            })
+
+        patterns.sort(key=lambda p: p["total_ms"], reverse=True)
+        return {
+            "requests": requests,
+            "attribution_sample": self.attribution_sample,
+            "slow_eval_threshold_ms": SLOW_EVAL_MS,
+            "patterns": patterns,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.requests = 0
+            for shard in self._shards:
+                shard.clear()
+
+
+pattern_stats = PatternStats()
@@ -0,0 +1,112 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.profiler import profiler
+
+# Executors for the async gateway pipeline.
+# Network calls are awaited on the event loop; everything CPU-bound
+# (Presidio / spaCy, anonymizer, hashing) runs on a dedicated, sized pool
+# so a slow request can never stall the loop.
+
+CPU_WORKERS = int(os.getenv("PRIVGUARD_CPU_WORKERS", str(os.cpu_count() or 4)))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="privguard-cpu")
+
+# Single writer: the audit hash chain must be appended in order
+audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="privguard-audit")
+
+# Best-effort work no request waits for (sampled pattern attribution); one
+# thread, so it never competes with request stages for more than one core
+background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="privguard-background")
+
+
+class RequestTrace:
+    """Per-request stage timings (ms, incl. executor queueing), cache hit flags and degraded stages, for the audit event."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.cache: dict[str, bool] = {}
+        self.degraded: list[dict] = []
+
+    def add(self, stage: str, ms: float):
+        self.stages[stage] = round(self.stages.get(stage, 0.0) + ms, 2)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+
+_trace: contextvars.ContextVar[RequestTrace | None] = contextvars.ContextVar("privguard_trace", default=None)
+
+
+def start_trace() -> RequestTrace:
+    """Starts timing the current request; stages run via this module (and timed()) are recorded on it."""
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def timed(stage: str, awaited: bool = True):
+    """
+    Times a stage into the current request's trace. Awaited (network) stages
+    are also reported to the profiler, which cannot sample them from a thread.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed * 1000)
+        if awaited:
+            profiler.record_wait(stage, elapsed)
+
+
+def note_cache(name: str, hit: bool):
+    """Records a cache lookup outcome on the current request's trace (any thread)."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.cache[name] = hit
+
+
+def note_degraded(stage: str, reason: str, mode: str):
+    """Records that `stage` was skipped (timeout / error) and the failure mode applied."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.degraded.append({"stage": stage, "reason": reason, "mode": mode})
+
+
+async def _offload(executor, stage: str, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Copy the context so profiler tags (and the request trace) follow the work into the worker thread
+    ctx = contextvars.copy_context()
+
+    def call():
+        with profiler.stage(stage):
+            return fn(*args, **kwargs)
+
+    # The worker thread is tagged and sampled; only the trace needs the time
+    with timed(stage, awaited=False):
+        return await loop.run_in_executor(executor, ctx.run, call)
+
+
+async def run_cpu(stage: str, fn, *args, **kwargs):
+    """Runs a CPU-bound pipeline stage on the dedicated executor."""
+    return await _offload(cpu_executor, stage, fn, *args, **kwargs)
+
+
+async def run_audit(fn, *args, **kwargs):
+    """Runs an audit write on the single-writer audit executor."""
+    return await _offload(audit_executor, "audit", fn, *args, **kwargs)
+
+
+def shutdown():
+    cpu_executor.shutdown(wait=False, cancel_futures=True)
+    background_executor.shutdown(wait=False, cancel_futures=True)
+    audit_executor.shutdown(wait=True)
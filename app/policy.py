@@ -1,6 +1,9 @@
 import json
 import os
-from typing import List, Dict
+from typing import List
+
+from app.keyword_automaton import KeywordAutomaton
+from app.pattern_registry import RISK_WEIGHT, Detection
 
 def load_policy_file():
     """
@@ -27,26 +30,105 @@ def load_policy_file():
 
 POLICY = load_policy_file()
 
-# Risk Weights (used only for scoring)
-RISK_WEIGHT = {
-    "CRITICAL": 100,
-    "HIGH": 75,
-    "MEDIUM": 40,
-    "LOW": 10,
-    "UNKNOWN": 0,
+# Entities that always hard-block (injection / policy bypass)
+ATTACK_ENTITIES = [
+    "PROMPT_INJECTION",
+    "DATA_EXFILTRATION",
+    "POLICY_BYPASS",
+    "SYSTEM_PROMPT_ACCESS"
+]
+
+
+# What to do when an external check (Azure Content Safety, Alpine) times out or
+# fails, per role (role_policies.on_upstream_failure; see app/deadline.py)
+FAIL_CLOSED, LOCAL_ONLY, FAIL_OPEN = "fail_closed", "local_only", "fail_open"
+FAILURE_MODES = (FAIL_CLOSED, LOCAL_ONLY, FAIL_OPEN)
+
+# Data sovereignty markers (policy.json "sovereignty"); matched in the prompt text
+DEFAULT_SOVEREIGNTY = {
+    "markers": ["internal", "confidential", "embargo", "do not share"],
+    "whole_words": True,
 }
 
+# Highest risk levels that a sovereignty marker turns into local processing (REDACT / SAFE_MODE)
+SOVEREIGN_LEVELS = ("HIGH", "MEDIUM")
+
 
 class PolicyEngine:
 
-    def __init__(self):
-        self.risk_policies = POLICY.get("risk_policies", {})
-        self.role_policies = POLICY.get("role_policies", {})
-        self.routing_rules = POLICY.get("routing_rules", {})
-        self.redaction_policy = POLICY.get("redaction_policy", {})
+    def __init__(self, policy: dict = None):
+        policy = POLICY if policy is None else policy
+        self.risk_policies = policy.get("risk_policies", {})
+        self.role_policies = policy.get("role_policies", {})
+        self.routing_rules = policy.get("routing_rules", {})
+        self.redaction_policy = policy.get("redaction_policy", {})
+
+        # Built once per engine (per tenant); one pass over the prompt per request
+        sovereignty = {**DEFAULT_SOVEREIGNTY, **policy.get("sovereignty", {})}
+        self.sovereignty_markers = KeywordAutomaton(sovereignty["markers"], sovereignty["whole_words"])
+
+    def failure_mode(self, role: str) -> str:
+        """Degradation mode for `role` when an upstream check is unavailable (default: fail-closed)."""
+        role = (role or "student").lower()
+        role_policy = self.role_policies.get(role, self.role_policies.get("student", {}))
+        mode = role_policy.get("on_upstream_failure", FAIL_CLOSED)
+        return mode if mode in FAILURE_MODES else FAIL_CLOSED
+
+    def degrade(self, decision: dict, mode: str, stage: str) -> dict:
+        """Applies a failure mode to a decision made without `stage`'s verdict."""
+        if decision["action"] == "BLOCK" or mode == FAIL_OPEN:
+            return decision
+        if mode == LOCAL_ONLY:
+            if decision.get("route") == "SAFE_MODE":
+                return decision
+            return {
+                **decision,
+                "route": "SAFE_MODE",
+                "reason": f"{stage} unavailable — local-only processing (SAFE_MODE)",
+            }
+        return {
+            **decision,
+            "action": "BLOCK",
+            "route": "NONE",
+            "reason": f"{stage} unavailable — request blocked (fail-closed)",
+        }
+
+    def find_markers(self, text: str) -> set:
+        """Sovereignty markers / codenames present in the prompt text."""
+        return self.sovereignty_markers.find(text)
+
+    # Early-exit check for detection: True once `detections` alone guarantee a BLOCK,
+    # i.e. further detections could not change the outcome of evaluate().
+    # `markers` must be the same find_markers(prompt) result evaluate() will get.
+    def block_certain(self, role: str, detections: List[Detection], markers: set = frozenset()) -> bool:
+
+        role = (role or "student").lower()
+        role_policy = self.role_policies.get(role, self.role_policies.get("student", {}))
+        max_allowed = RISK_WEIGHT[role_policy.get("max_allowed_risk", "LOW")]
+
+        def blocks(lvl):
+            # The sovereignty override replaces any BLOCK at these levels
+            if markers and lvl in SOVEREIGN_LEVELS:
+                return False
+            return (
+                RISK_WEIGHT[lvl] > max_allowed
+                or self.risk_policies.get(lvl, {}).get("action") == "BLOCK"
+            )
+
+        for d in detections:
+            if d.entity_type in ATTACK_ENTITIES:
+                return True
+
+            # A higher level found later becomes the deciding one, so every
+            # level at or above this one must block as well
+            if all(blocks(lvl) for lvl, w in RISK_WEIGHT.items() if w >= d.weight):
+                return True
+
+        return False
 
     # Main Policy Decision Engine
-    def evaluate(self, role: str, detections: List[Dict], azure_severity: int):
+    # `markers`: result of find_markers(prompt) — computed once per request by the caller
+    def evaluate(self, role: str, detections: List[Detection], azure_severity: int, markers: set = frozenset()):
 
         role = (role or "student").lower()
         role_policy = self.role_policies.get(role, self.role_policies.get("student", {}))
@@ -56,12 +138,9 @@ class PolicyEngine:
         highest_score = 0
 
         for d in detections:
-            lvl = d.get("risk_level", "LOW")
-            score = RISK_WEIGHT.get(lvl, 0)
-
-            if score > highest_score:
-                highest_score = score
-                highest_level = lvl
+            if d.weight > highest_score:
+                highest_score = d.weight
+                highest_level = d.risk_level
 
         # Azure Safety Override
         if azure_severity >= 4:
@@ -76,16 +155,9 @@ class PolicyEngine:
 
         # --- Injection / Policy Bypass Hard Block ---
 
-        attack_entities = [
-            "PROMPT_INJECTION",
-            "DATA_EXFILTRATION",
-            "POLICY_BYPASS",
-            "SYSTEM_PROMPT_ACCESS"
-        ]
-
-        detected_ids = [d.get("entity_type", "") for d in detections]
+        detected_ids = {d.entity_type for d in detections}
 
-        if any(a in detected_ids for a in attack_entities):
+        if any(a in detected_ids for a in ATTACK_ENTITIES):
             return {
                 "action": "BLOCK",
                 "route": "NONE",
@@ -123,12 +195,10 @@ class PolicyEngine:
 
         # Data Sovereignty Override
         # (Internal / Confidential data → Local processing)
+        # `markers` come from the keyword automaton over the prompt text
 
-        sovereignty_markers = ["internal", "confidential", "embargo", "do not share"]
-        text_blob = str(detections).lower()
-
-        if any(m in text_blob for m in sovereignty_markers):
-            if highest_level in ["HIGH", "MEDIUM"]:
+        if markers:
+            if highest_level in SOVEREIGN_LEVELS:
                 route = "SAFE_MODE"
                 action = "REDACT"
                 reason = "Data Sovereignty Policy — processed locally (SAFE_MODE)"
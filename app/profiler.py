@@ -0,0 +1,186 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Opt-in sampling profiler for the gateway hot path.
+# Samples the stacks of threads currently serving a *sampled* request and
+# tags every sample with "<endpoint>;<pipeline stage>" so the output shows
+# whether Presidio, spaCy, the anonymizer or the audit logger dominates.
+# Awaited upstream stages (content_safety, ocr, privacy_scan, local_infer) run
+# on the event loop, not on a tagged thread: their wall time is added as
+# "<endpoint>;<stage>;(awaiting upstream)" with one sample per interval waited.
+# Output is the collapsed-stack format used by flamegraph.pl / speedscope.
+
+DEFAULT_INTERVAL_S = float(os.getenv("PRIVGUARD_PROFILE_INTERVAL_MS", "5")) / 1000
+MAX_PROFILE_SECONDS = 300
+
+# Endpoint of the sampled request being served in the current context (None = not sampled)
+_sampled_request: ContextVar[str | None] = ContextVar("privguard_sampled_request", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval_s: float = DEFAULT_INTERVAL_S):
+        self.interval_s = interval_s
+        self._running = False
+        self._one_in = 1
+        self._request_counter = itertools.count()
+        self._tags: dict[int, str] = {}  # thread id -> "endpoint;stage"
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+
+    # --- Control ---
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, seconds: float, sample_one_in: int = 1) -> bool:
+        """
+        Start sampling for `seconds`.
+        With sample_one_in=K only every K-th request is profiled.
+        Returns False if a session is already running.
+        """
+        with self._lock:
+            if self._running:
+                return False
+            self._one_in = max(1, int(sample_one_in))
+            self._request_counter = itertools.count()
+            self._counts = Counter()
+            self._stop.clear()
+            self._started_at = time.time()
+            self._finished_at = None
+            self._running = True
+
+        seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+        self._thread = threading.Thread(
+            target=self._sample_loop, args=(seconds,), name="privguard-profiler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _sample_loop(self, seconds: float):
+        deadline = time.monotonic() + seconds
+        own_id = threading.get_ident()
+
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            tags = dict(self._tags)
+            if tags:
+                samples = []
+                frames = sys._current_frames()
+                for thread_id, tag in tags.items():
+                    if thread_id == own_id:
+                        continue
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.reverse()
+
+                    samples.append(f"{tag};{';'.join(stack)}")
+
+                # record_wait() writes from request threads; readers copy under the same lock
+                with self._lock:
+                    self._counts.update(samples)
+
+            self._stop.wait(self.interval_s)
+
+        self._running = False
+        self._finished_at = time.time()
+
+    # --- Instrumentation (cheap no-ops while the profiler is off) ---
+
+    @contextmanager
+    def request(self, endpoint: str):
+        """Marks the current request; decides whether it is sampled."""
+        if not self._running or next(self._request_counter) % self._one_in:
+            yield
+            return
+
+        # Only the context is marked here; threads are tagged by stage(), which
+        # runs inside the executor workers that carry the copied context.
+        token = _sampled_request.set(endpoint)
+        try:
+            yield
+        finally:
+            _sampled_request.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Tags the current thread with a pipeline stage while inside the block."""
+        endpoint = _sampled_request.get()
+        if endpoint is None:
+            yield
+            return
+
+        thread_id = threading.get_ident()
+        previous = self._tags.get(thread_id)
+        self._tags[thread_id] = f"{endpoint};{name}"
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._tags.pop(thread_id, None)
+            else:
+                self._tags[thread_id] = previous
+
+    def record_wait(self, stage: str, seconds: float):
+        """Attributes an awaited (non-thread) stage of a sampled request, in sample units."""
+        endpoint = _sampled_request.get()
+        if endpoint is None or not self._running:
+            return
+        samples = round(seconds / self.interval_s)
+        if samples:
+            with self._lock:
+                self._counts[f"{endpoint};{stage};(awaiting upstream)"] += samples
+
+    # --- Output ---
+
+    def _snapshot(self) -> Counter:
+        with self._lock:
+            return self._counts.copy()
+
+    def collapsed(self) -> str:
+        """Flamegraph-compatible collapsed stacks: 'frame;frame;frame count' per line."""
+        return "\n".join(f"{stack} {count}" for stack, count in self._snapshot().most_common())
+
+    def status(self) -> dict:
+        counts = self._snapshot()
+        return {
+            "running": self._running,
+            "sample_one_in": self._one_in,
+            "interval_ms": self.interval_s * 1000,
+            "samples": sum(counts.values()),
+            "started_at": self._started_at,
+            "finished_at": self._finished_at,
+        }
+
+
+profiler = SamplingProfiler()
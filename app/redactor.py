@@ -13,28 +13,38 @@ REDACTION_MAP = {
     "URL": "[REDACTED:URL]"
 }
 
+# replacement token → OperatorConfig, built once per token
+# (keyed by token, not entity type: tenants may map the same pattern id to different tokens)
+_operators = {}
+
+
+def _operator_for(d):
+    token = (d.spec and d.spec.redaction_token) or REDACTION_MAP.get(d.entity_type, "[REDACTED]")
+    op = _operators.get(token)
+    if op is None:
+        op = _operators[token] = OperatorConfig(
+            operator_name = "replace",
+            params = {"new_value": token}
+        )
+    return op
+
+
 def redact_text(text: str, entities: list):
-    # 1. Convert our dict-based entities -> RecognizerResult objects
-    # (Presidio requires these specific objects, not just dicts)
+    # 1. Convert Detection objects -> RecognizerResult objects
+    # (Presidio requires these specific objects)
     recognizer_results = [
         RecognizerResult(
-            entity_type = e["entity_type"],
-            start = e["start"],
-            end = e["end"],
-            score = e["score"]
+            entity_type = e.entity_type,
+            start = e.start,
+            end = e.end,
+            score = e.score
         )
         for e in entities
     ]
 
-    # 2. Define the Operators using OperatorConfig
-    # We map "PERSON" -> OperatorConfig("replace", {"new_value": "[REDACTED:PERSON]"})
-    operators = {}
-    for e in recognizer_results:
-        if e.entity_type not in operators:
-            operators[e.entity_type] = OperatorConfig(
-                operator_name = "replace",
-                params = {"new_value": REDACTION_MAP.get(e.entity_type, "[REDACTED]")}
-            )
+    # 2. Operators per entity type, e.g. "PERSON" -> replace with "[REDACTED:PERSON]"
+    # (custom patterns may set their own "redaction_token" in patterns.json)
+    operators = {e.entity_type: _operator_for(e) for e in entities}
 
     # 3. Anonymize
     result = anonymizer.anonymize(
@@ -0,0 +1,287 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from Security import iter_events
+from Security.audit_logger import add_listener
+
+# Pre-aggregated time-series for the SOC dashboard.
+# Every audit event is folded into a per-minute and a per-hour bucket as it is
+# written (audit logger listener), so charts never rescan the log. Latency
+# percentiles come from a mergeable log-bucketed sketch (DDSketch-style).
+# Buckets are snapshotted to disk; on startup only events newer than the
+# snapshot are replayed.
+
+ROLLUP_PATH = Path(__file__).resolve().parent.parent / "Security" / "audit_rollups.json"
+
+MINUTE_RETENTION = timedelta(hours=int(os.getenv("PRIVGUARD_ROLLUP_MINUTE_HOURS", "48")))
+HOUR_RETENTION = timedelta(days=int(os.getenv("PRIVGUARD_ROLLUP_HOUR_DAYS", "90")))
+SNAPSHOT_EVERY = 500  # events between snapshots
+
+# Event fields folded into a bucket (replay decodes only these)
+EVENT_FIELDS = (
+    "timestamp_utc", "policy_action", "routing_decision", "detected_risk_level",
+    "user_role", "endpoint", "matched_pattern_ids", "processing_latency_ms",
+)
+MAX_POINTS = 5000
+
+SOVEREIGN_ROUTES = ("SAFE_MODE", "LOCAL")
+
+
+class LatencySketch:
+    """Log-bucketed quantile sketch with ~1% relative error; mergeable across buckets."""
+
+    RELATIVE_ACCURACY = 0.01
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self, bins: dict | None = None, zeros: int = 0):
+        self.bins = Counter({int(k): v for k, v in (bins or {}).items()})
+        self.zeros = zeros
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.bins.values())
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.bins[math.ceil(math.log(value) / self.LOG_GAMMA)] += 1
+
+    def merge(self, other: "LatencySketch"):
+        self.bins.update(other.bins)
+        self.zeros += other.zeros
+
+    def quantile(self, q: float) -> float | None:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return round(2 * self.GAMMA ** key / (self.GAMMA + 1), 2)
+        return None
+
+    def to_dict(self) -> dict:
+        return {"bins": dict(self.bins), "zeros": self.zeros}
+
+
+class Bucket:
+
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.requests = data.get("requests", 0)
+        self.blocked = data.get("blocked", 0)
+        self.sovereign = data.get("sovereign", 0)
+        self.risk = Counter(data.get("risk", {}))
+        self.roles = Counter(data.get("roles", {}))
+        self.endpoints = Counter(data.get("endpoints", {}))
+        self.patterns = Counter(data.get("patterns", {}))
+        self.latency = LatencySketch(**data.get("latency", {}))
+
+    def add(self, event: dict):
+        self.requests += 1
+        self.blocked += int(event.get("policy_action") == "BLOCK")
+        self.sovereign += int(event.get("routing_decision") in SOVEREIGN_ROUTES)
+        self.risk[(event.get("detected_risk_level") or "UNKNOWN").upper()] += 1
+        self.roles[event.get("user_role") or "unknown"] += 1
+        # Events written before the field existed all came from /proxy
+        self.endpoints[event.get("endpoint") or "/proxy"] += 1
+        self.patterns.update(event.get("matched_pattern_ids") or [])
+        if event.get("processing_latency_ms") is not None:
+            self.latency.add(float(event["processing_latency_ms"]))
+
+    def merge(self, other: "Bucket"):
+        self.requests += other.requests
+        self.blocked += other.blocked
+        self.sovereign += other.sovereign
+        self.risk.update(other.risk)
+        self.roles.update(other.roles)
+        self.endpoints.update(other.endpoints)
+        self.patterns.update(other.patterns)
+        self.latency.merge(other.latency)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "sovereign": self.sovereign,
+            "risk": dict(self.risk),
+            "roles": dict(self.roles),
+            "endpoints": dict(self.endpoints),
+            "patterns": dict(self.patterns),
+            "latency": self.latency.to_dict(),
+        }
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "blocked_count": self.blocked,
+            "sovereign_count": self.sovereign,
+            "risk_distribution": dict(self.risk),
+            "roles": dict(self.roles),
+            "endpoints": dict(self.endpoints),
+            "patterns": dict(self.patterns.most_common(20)),
+            "latency_ms": {
+                "p50": self.latency.quantile(0.50),
+                "p95": self.latency.quantile(0.95),
+                "p99": self.latency.quantile(0.99),
+            },
+        }
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(value.rstrip("Z")).replace(tzinfo=timezone.utc)
+
+
+def _floor(ts: datetime, step: timedelta) -> datetime:
+    epoch = int(ts.timestamp())
+    seconds = int(step.total_seconds())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+_DURATION = re.compile(r"^(\d+)([smhd])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_duration(value: str) -> timedelta:
+    """'15m', '24h', '7d' → timedelta"""
+    match = _DURATION.match((value or "").strip().lower())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}' (expected e.g. 15m, 24h, 7d)")
+    return timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class RollupStore:
+
+    RESOLUTIONS = {
+        "minute": (timedelta(minutes=1), MINUTE_RETENTION),
+        "hour": (timedelta(hours=1), HOUR_RETENTION),
+    }
+
+    def __init__(self, path: Path = ROLLUP_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._buckets: dict[str, dict[int, Bucket]] = {name: {} for name in self.RESOLUTIONS}
+        self._last_timestamp: str | None = None
+        self._since_snapshot = 0
+
+    # --- Write path ---
+
+    def add(self, event: dict):
+        ts = event.get("timestamp_utc")
+        if not ts:
+            return
+        when = _parse_ts(ts)
+
+        with self._lock:
+            for name, (step, _) in self.RESOLUTIONS.items():
+                key = int(_floor(when, step).timestamp())
+                self._buckets[name].setdefault(key, Bucket()).add(event)
+            self._last_timestamp = max(ts, self._last_timestamp or ts)
+            self._since_snapshot += 1
+            due = self._since_snapshot >= SNAPSHOT_EVERY
+
+        if due:
+            self.save()
+
+    def _prune(self, now: datetime):
+        for name, (_, retention) in self.RESOLUTIONS.items():
+            cutoff = (now - retention).timestamp()
+            for key in [k for k in self._buckets[name] if k < cutoff]:
+                del self._buckets[name][key]
+
+    # --- Persistence ---
+
+    def save(self):
+        with self._lock:
+            self._prune(datetime.now(timezone.utc))
+            data = {
+                "last_timestamp_utc": self._last_timestamp,
+                "buckets": {
+                    name: {str(k): b.to_dict() for k, b in buckets.items()}
+                    for name, buckets in self._buckets.items()
+                },
+            }
+            self._since_snapshot = 0
+
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        """Loads the snapshot, then replays only audit events written after it."""
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self._last_timestamp = data.get("last_timestamp_utc")
+                for name, buckets in data.get("buckets", {}).items():
+                    if name in self._buckets:
+                        self._buckets[name] = {int(k): Bucket(v) for k, v in buckets.items()}
+            except (OSError, json.JSONDecodeError, ValueError) as e:
+                print(f"⚠️ Rollup snapshot unreadable, rebuilding: {e}")
+                self._buckets = {name: {} for name in self.RESOLUTIONS}
+                self._last_timestamp = None
+
+        oldest = (datetime.now(timezone.utc) - HOUR_RETENTION).isoformat().replace("+00:00", "Z")
+        replay_from = self._last_timestamp or oldest
+        for event in iter_events(since=replay_from, fields=EVENT_FIELDS):
+            if self._last_timestamp and event.get("timestamp_utc", "") <= self._last_timestamp:
+                continue
+            self.add(event)
+
+        with self._lock:
+            self._prune(datetime.now(timezone.utc))
+
+    # --- Read path ---
+
+    def timeseries(self, window: timedelta, step: timedelta) -> list[dict]:
+        resolution = "hour" if step >= timedelta(hours=1) and step.total_seconds() % 3600 == 0 else "minute"
+        base_step, _ = self.RESOLUTIONS[resolution]
+        step = max(step, base_step)
+        if window / step > MAX_POINTS:
+            raise ValueError(f"window/step yields more than {MAX_POINTS} points")
+
+        now = datetime.now(timezone.utc)
+        start = _floor(now - window, step)
+        end = now.timestamp()
+        step_s = int(step.total_seconds())
+
+        points: dict[int, Bucket] = {}
+        with self._lock:
+            for key, bucket in self._buckets[resolution].items():
+                if start.timestamp() <= key <= end:
+                    slot = key - (key - int(start.timestamp())) % step_s
+                    points.setdefault(slot, Bucket()).merge(bucket)
+
+        series = []
+        slot = int(start.timestamp())
+        while slot <= end:
+            bucket = points.get(slot, Bucket())
+            series.append({
+                "t": datetime.fromtimestamp(slot, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+                **bucket.summary(),
+            })
+            slot += step_s
+        return series
+
+
+rollups = RollupStore()
+
+
+def attach():
+    """Builds the rollups from snapshot + recent events and subscribes to new ones."""
+    rollups.load()
+    add_listener(rollups.add)
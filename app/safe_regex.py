@@ -0,0 +1,297 @@
+import functools
+import os
+import time
+import re._parser as sre_parse
+import re._constants as sre_constants
+
+import regex
+
+try:
+    import re2  # google-re2: linear-time matching, no backtracking
+except ImportError:
+    re2 = None
+
+# Safe compilation for the custom patterns in Security/patterns.json.
+# 1. Static vetting: flags constructs known to backtrack catastrophically
+#    (unbounded repeats nested in large repeats, overlapping alternatives
+#    under a repeat) and constructs a linear-time engine cannot run
+#    (backreferences, lookarounds).
+# 2. Engine: RE2 when installed and the pattern means the same there, otherwise
+#    the `regex` module. RE2's \d, \s and \w are ASCII-only while `regex` (like
+#    Presidio) matches Unicode, so they are rewritten to the exact Unicode sets
+#    first; \b / \B have no RE2 equivalent and keep a pattern on `regex`.
+# 3. Time budget: backtracking matches run with a timeout proportional to the
+#    text length. On timeout the rest of the text is rescanned in small
+#    windows with their own budget; once the fallback budget is spent the
+#    remainder is skipped for that pattern. One pathological rule or prompt
+#    costs a bounded amount of CPU instead of pinning a worker.
+
+# Same global flags Presidio applies to PatternRecognizer regexes
+REGEX_FLAGS = regex.DOTALL | regex.MULTILINE | regex.IGNORECASE
+RE2_FLAGS = "(?ims)"
+
+MATCH_BUDGET_MS = float(os.getenv("PRIVGUARD_PATTERN_BUDGET_MS", "100"))
+BUDGET_SCALE_CHARS = 65536  # budget applies per this many characters of input
+FALLBACK_WINDOW_CHARS = 4096
+FALLBACK_WINDOW_OVERLAP = 256
+FALLBACK_BUDGET_FACTOR = 2  # total fallback time, as a multiple of the match budget
+
+# Shorthand classes RE2 would match as ASCII only
+_UNICODE_ESCAPES = "dDsSwW"
+_MAX_CODE_POINT = 0x10FFFF
+_SURROGATES = (0xD800, 0xDFFF)
+
+# Outer repeats with at most this many iterations are treated as bounded
+NESTED_REPEAT_LIMIT = 32
+
+# Reject patterns that fail vetting instead of loading them with a budget
+STRICT = os.getenv("PRIVGUARD_REGEX_STRICT", "false").lower() == "true"
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_NON_LINEAR = {
+    sre_constants.GROUPREF: "backreference",
+    sre_constants.GROUPREF_EXISTS: "conditional group",
+    sre_constants.ASSERT: "lookaround",
+    sre_constants.ASSERT_NOT: "lookaround",
+}
+DANGEROUS = ("nested quantifier", "overlapping alternation")
+
+
+class UnsafePatternError(ValueError):
+    pass
+
+
+# --- Static vetting ---
+
+def _first_chars(items) -> set | None:
+    '''Lowercased characters a branch can start with; None = unknown / any.'''
+    for op, av in items:
+        if op == sre_constants.AT:
+            continue
+        if op == sre_constants.LITERAL:
+            return {chr(av).lower()}
+        if op == sre_constants.SUBPATTERN:
+            return _first_chars(av[-1])
+        if op in _REPEATS and av[0] > 0:
+            return _first_chars(av[2])
+        return None
+    return None
+
+
+def _branches_overlap(branches) -> bool:
+    firsts = [_first_chars(b) for b in branches]
+    if any(f is None for f in firsts):
+        return True
+    seen = set()
+    for f in firsts:
+        if seen & f:
+            return True
+        seen |= f
+    return False
+
+
+def _walk(items, findings: set, in_repeat: bool):
+    for op, av in items:
+        if op in _REPEATS:
+            lo, hi, sub = av
+            unbounded = hi == sre_constants.MAXREPEAT
+            if unbounded and in_repeat:
+                findings.add("nested quantifier")
+            _walk(sub, findings, in_repeat or unbounded or hi > NESTED_REPEAT_LIMIT)
+        elif op == sre_constants.POSSESSIVE_REPEAT:
+            # Possessive / atomic constructs never backtrack into themselves
+            _walk(av[2], findings, False)
+        elif op == sre_constants.ATOMIC_GROUP:
+            _walk(av, findings, False)
+        elif op == sre_constants.SUBPATTERN:
+            _walk(av[-1], findings, in_repeat)
+        elif op == sre_constants.BRANCH:
+            if in_repeat and _branches_overlap(av[1]):
+                findings.add("overlapping alternation")
+            for branch in av[1]:
+                _walk(branch, findings, in_repeat)
+        elif op in _NON_LINEAR:
+            findings.add(_NON_LINEAR[op])
+            if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                _walk(av[1], findings, in_repeat)
+
+
+def vet(source: str) -> list[str]:
+    '''
+    Static checks on a pattern. Returns a list of findings (empty = clean).
+    Patterns using `regex`-only syntax cannot be parsed here; they are
+    reported as unverified and rely on the time budget alone.
+    '''
+    try:
+        parsed = sre_parse.parse(source, sre_constants.SRE_FLAG_IGNORECASE)
+    except Exception as e:
+        return [f"unverified ({e})"]
+
+    findings: set = set()
+    _walk(parsed, findings, False)
+    return sorted(findings)
+
+
+def is_dangerous(findings: list[str]) -> bool:
+    return any(f.startswith(DANGEROUS) for f in findings)
+
+
+# --- RE2 translation ---
+
+@functools.lru_cache(maxsize=None)
+def _code_point_ranges(escape: str) -> tuple[tuple[int, int], ...]:
+    '''Code point ranges the `regex` engine matches with \\<escape> (d / s / w), found by scanning every code point.'''
+    run = regex.compile("\\" + escape + "+", flags=REGEX_FLAGS)
+    ranges = []
+    for first, last in ((0, _SURROGATES[0] - 1), (_SURROGATES[1] + 1, _MAX_CODE_POINT)):
+        chars = "".join(map(chr, range(first, last + 1)))
+        ranges.extend((first + m.start(), first + m.end() - 1) for m in run.finditer(chars))
+    return tuple(ranges)
+
+
+def _complement(ranges) -> list[tuple[int, int]]:
+    out, start = [], 0
+    for lo, hi in list(ranges) + [(_SURROGATES[0], _SURROGATES[1]), (_MAX_CODE_POINT + 1, _MAX_CODE_POINT + 1)]:
+        if lo > start:
+            out.append((start, lo - 1))
+        start = max(start, hi + 1)
+    return out
+
+
+def _re2_class_items(escape: str) -> str:
+    '''Contents of an RE2 character class matching what `regex` matches with \\<escape>.'''
+    # Derived from `regex` itself rather than RE2's \p{..} tables, which may follow another Unicode version
+    ranges = _code_point_ranges(escape.lower())
+    if escape.isupper():
+        ranges = _complement(sorted(ranges))
+    return "".join(
+        f"\\x{{{lo:X}}}" if lo == hi else f"\\x{{{lo:X}}}-\\x{{{hi:X}}}" for lo, hi in ranges
+    )
+
+
+def re2_source(source: str) -> str | None:
+    '''
+    `source` rewritten so RE2 matches exactly what the `regex` engine matches,
+    or None if RE2 cannot (\\b / \\B, POSIX classes).
+    '''
+    out = []
+    in_class = False
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c == "\\" and i + 1 < len(source):
+            escape = source[i + 1]
+            if escape in "bB":
+                return None
+            if escape in _UNICODE_ESCAPES:
+                items = _re2_class_items(escape)
+                out.append(items if in_class else f"[{items}]")
+            else:
+                out.append(source[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            if source.startswith("[:", i):
+                return None
+            in_class = c != "]"
+        elif c == "[":
+            # A leading "]" (after an optional "^") is a literal, not the end of the class
+            in_class = True
+            out.append(c)
+            i += 1
+            if source.startswith("^", i):
+                out.append("^")
+                i += 1
+            if source.startswith("]", i):
+                out.append(r"\]")
+                i += 1
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+# --- Compiled pattern ---
+
+class SafePattern:
+    '''
+    A compiled custom pattern. `spans(text)` returns the non-empty match spans
+    and whether the time budget was hit (results may then be incomplete).
+    '''
+
+    def __init__(self, pattern_id: str, source: str, budget_ms: float = MATCH_BUDGET_MS):
+        self.pattern_id = pattern_id
+        self.source = source
+        self.budget_s = budget_ms / 1000
+        self.findings = vet(source)
+
+        if STRICT and is_dangerous(self.findings):
+            raise UnsafePatternError(f"{pattern_id}: {', '.join(self.findings)}")
+
+        self._re2 = None
+        translated = re2_source(source) if re2 is not None else None
+        if translated is not None:
+            try:
+                self._re2 = re2.compile(RE2_FLAGS + translated)
+            except Exception:
+                self._re2 = None
+        self._compiled = None if self._re2 else regex.compile(source, flags=REGEX_FLAGS)
+
+    @property
+    def engine(self) -> str:
+        return "re2" if self._re2 else "regex"
+
+    def _scan(self, text: str, pos: int, endpos: int, timeout: float, out: list) -> int | None:
+        '''Appends spans found in text[pos:endpos]. Returns None, or the offset reached on timeout.'''
+        reached = pos
+        try:
+            for m in self._compiled.finditer(text, pos, endpos, concurrent=True, timeout=timeout):
+                if m.end() > m.start():
+                    out.append(m.span())
+                reached = m.end()
+        except TimeoutError:
+            return reached
+        return None
+
+    def spans(self, text: str) -> tuple[list[tuple[int, int]], bool]:
+        if self._re2:
+            return [m.span() for m in self._re2.finditer(text) if m.end() > m.start()], False
+
+        budget = self.budget_s * max(1.0, len(text) / BUDGET_SCALE_CHARS)
+        out: list[tuple[int, int]] = []
+        stopped_at = self._scan(text, 0, len(text), budget, out)
+        if stopped_at is None:
+            return out, False
+
+        # Budget exceeded: rescan the rest in bounded windows until the fallback budget is spent
+        seen = set(out)
+        deadline = time.perf_counter() + budget * FALLBACK_BUDGET_FACTOR
+        for start in range(stopped_at, len(text), FALLBACK_WINDOW_CHARS):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            window: list = []
+            end = min(len(text), start + FALLBACK_WINDOW_CHARS + FALLBACK_WINDOW_OVERLAP)
+            self._scan(text, start, end, min(self.budget_s, remaining), window)
+            for span in window:
+                if span not in seen:
+                    seen.add(span)
+                    out.append(span)
+        out.sort()
+        return out, True
+
+    def describe(self) -> dict:
+        return {
+            "pattern_id": self.pattern_id,
+            "engine": self.engine,
+            "findings": self.findings,
+            "budget_ms": self.budget_s * 1000,
+        }
+
+
+def compile_pattern(pattern_id: str, source: str) -> SafePattern:
+    safe = SafePattern(pattern_id, source)
+    if is_dangerous(safe.findings) and safe.engine == "regex":
+        print(f"⚠️ Pattern {pattern_id} may backtrack catastrophically ({', '.join(safe.findings)}); "
+              f"running with a {MATCH_BUDGET_MS:.0f} ms budget")
+    return safe
@@ -0,0 +1,88 @@
+from typing import List
+
+from app.pattern_registry import Detection
+from app.policy import POLICY
+
+# Span resolution between detection and policy / redaction / audit.
+# Presidio's built-in recognizers and the custom patterns often report the
+# same text (PII_EMAIL + EMAIL_ADDRESS, PII_PHONE + PHONE_NUMBER, URL twice).
+# Detections are sorted once and swept left to right; each run of overlapping
+# spans collapses into one detection covering their union, labelled by the
+# highest-precedence member. O(n log n) in the number of detections.
+
+DEFAULT_SPAN_RESOLUTION = {
+    "enabled": True,
+    # Compared in order when overlapping detections compete for a span
+    "precedence": ["attack", "custom", "risk", "score", "length"],
+}
+
+# Precedence keys → rank component (higher wins)
+RANK_KEYS = {
+    "attack": lambda d: d.spec is not None and d.spec.category == "Attack",  # never hide an attack marker
+    "custom": lambda d: d.spec is not None,                                  # patterns.json over Presidio built-ins
+    "risk": lambda d: d.weight,
+    "score": lambda d: d.score,
+    "length": lambda d: d.end - d.start,
+}
+
+
+def load_config(policy: dict = POLICY) -> dict:
+    config = {**DEFAULT_SPAN_RESOLUTION, **policy.get("span_resolution", {})}
+    unknown = [k for k in config["precedence"] if k not in RANK_KEYS]
+    if unknown:
+        print(f"⚠️ span_resolution: ignoring unknown precedence keys {unknown}")
+        config["precedence"] = [k for k in config["precedence"] if k in RANK_KEYS]
+    return config
+
+
+CONFIG = load_config()
+
+
+def _rank_fn(precedence: List[str]):
+    keys = [RANK_KEYS[k] for k in precedence]
+    return lambda d: tuple(k(d) for k in keys)
+
+
+def resolve_spans(detections: List[Detection], config: dict = CONFIG) -> List[Detection]:
+    '''
+    Merges overlapping / duplicate detections. Touching spans (end == start)
+    are kept apart. Returns detections ordered by start offset.
+    '''
+    if not config["enabled"] or len(detections) < 2:
+        return detections
+
+    rank = _rank_fn(config["precedence"])
+    ordered = sorted(detections, key=lambda d: (d.start, -d.end))
+
+    resolved = []
+    winner = ordered[0]
+    cluster_start, cluster_end = winner.start, winner.end
+
+    def close():
+        if winner.start == cluster_start and winner.end == cluster_end:
+            resolved.append(winner)
+        else:
+            resolved.append(Detection(
+                winner.entity_type,
+                cluster_start,
+                cluster_end,
+                winner.score,
+                winner.risk_level,
+                partial=winner.partial,
+                spec=winner.spec,
+            ))
+
+    winner_rank = rank(winner)
+    for d in ordered[1:]:
+        if d.start < cluster_end:
+            cluster_end = max(cluster_end, d.end)
+            d_rank = rank(d)
+            if d_rank > winner_rank:
+                winner, winner_rank = d, d_rank
+            continue
+        close()
+        winner, winner_rank = d, rank(d)
+        cluster_start, cluster_end = d.start, d.end
+
+    close()
+    return resolved
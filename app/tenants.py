@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from app.detector import PatternDetector, default_detector, load_patterns_from_json, DEFAULT_PATTERN_PATH
+from app.policy import POLICY, PolicyEngine
+from app.span_resolver import load_config as load_span_config
+
+# Tenant-scoped policy and pattern sets.
+# A tenant is a directory under Security/tenants/<tenant_id>/ holding an
+# optional policy.json and/or patterns.json:
+# - policy.json: top-level sections override the global policy.json ones
+# - patterns.json: replaces the global pattern set, or extends it (patterns
+#   with the same id override) when it sets "inherit": true
+# Requests pick a tenant with the X-Tenant-ID header; no header means the
+# global configuration. Each tenant's PolicyEngine + PatternDetector is
+# compiled on first use and kept in a bounded LRU, all sharing one NLP model.
+
+TENANT_DIR = Path(os.getenv("PRIVGUARD_TENANT_DIR", Path(__file__).resolve().parent.parent / "Security" / "tenants"))
+MAX_CACHED_TENANTS = int(os.getenv("PRIVGUARD_TENANT_CACHE", "16"))
+DEFAULT_TENANT = "default"
+
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+class UnknownTenantError(LookupError):
+    pass
+
+
+class Tenant:
+
+    def __init__(self, tenant_id: str, policy: PolicyEngine, detector: PatternDetector):
+        self.tenant_id = tenant_id
+        self.policy = policy
+        self.detector = detector
+
+
+def _read_json(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _compile_tenant(tenant_id: str) -> Tenant:
+    tenant_dir = TENANT_DIR / tenant_id
+    if not tenant_dir.is_dir():
+        raise UnknownTenantError(tenant_id)
+
+    policy_overrides = _read_json(tenant_dir / "policy.json") or {}
+    policy = {**POLICY, **policy_overrides}
+
+    pattern_file = _read_json(tenant_dir / "patterns.json")
+    span_config = load_span_config(policy)
+
+    if pattern_file is None and "span_resolution" not in policy_overrides:
+        # Same patterns and span rules as the global set: share the default detector
+        detector = default_detector
+    else:
+        if pattern_file is None:
+            patterns = load_patterns_from_json(DEFAULT_PATTERN_PATH)
+        elif pattern_file.get("inherit"):
+            merged = {p["id"]: p for p in load_patterns_from_json(DEFAULT_PATTERN_PATH)}
+            merged.update({p["id"]: p for p in pattern_file.get("patterns", [])})
+            patterns = list(merged.values())
+        else:
+            patterns = pattern_file.get("patterns", [])
+        detector = PatternDetector(patterns, span_config)
+
+    print(f"✅ Tenant '{tenant_id}': compiled policy + {len(detector.pattern_registry)} patterns")
+    return Tenant(tenant_id, PolicyEngine(policy), detector)
+
+
+class TenantRegistry:
+    """Bounded LRU of compiled tenants, loaded lazily (one build per tenant at a time)."""
+
+    def __init__(self, max_cached: int = MAX_CACHED_TENANTS):
+        self.max_cached = max_cached
+        self.default = Tenant(DEFAULT_TENANT, PolicyEngine(), default_detector)
+        self._cache: OrderedDict[str, Tenant] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(tenant_id: str | None) -> str:
+        tenant_id = (tenant_id or DEFAULT_TENANT).strip().lower()
+        if not _TENANT_ID.match(tenant_id):
+            raise ValueError(f"Invalid tenant id '{tenant_id}'")
+        return tenant_id
+
+    def peek(self, tenant_id: str | None) -> Tenant | None:
+        """Cached tenant (or the default) without loading; None on a cache miss."""
+        tenant_id = self.normalize(tenant_id)
+        if tenant_id == DEFAULT_TENANT:
+            return self.default
+        with self._lock:
+            tenant = self._cache.get(tenant_id)
+            if tenant is not None:
+                self._cache.move_to_end(tenant_id)
+                self.hits += 1
+            return tenant
+
+    def get(self, tenant_id: str | None) -> Tenant:
+        """Returns the compiled tenant, building it on first use. Blocking (CPU-heavy on a miss)."""
+        tenant = self.peek(tenant_id)
+        if tenant is not None:
+            return tenant
+
+        tenant_id = self.normalize(tenant_id)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+
+        with load_lock:
+            # Another request may have finished the build while we waited
+            with self._lock:
+                tenant = self._cache.get(tenant_id)
+                if tenant is not None:
+                    self._cache.move_to_end(tenant_id)
+                    self.hits += 1
+                    return tenant
+                self.misses += 1
+
+            tenant = _compile_tenant(tenant_id)
+
+            with self._lock:
+                self._cache[tenant_id] = tenant
+                self._load_locks.pop(tenant_id, None)
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+            return tenant
+
+    def invalidate(self, tenant_id: str | None = None):
+        """Drops one tenant (or all) so the next request recompiles from disk."""
+        with self._lock:
+            if tenant_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self.normalize(tenant_id), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached": list(self._cache.keys()),
+                "max_cached": self.max_cached,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+tenants = TenantRegistry()
@@ -0,0 +1,199 @@
+import hashlib
+import io
+import mmap
+import os
+import re
+import tempfile
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Streaming multipart uploads for /upload_scan.
+# The request body is parsed as it arrives instead of being buffered by the
+# framework: the file part is written to a spool that stays in memory up to
+# SPOOL_MEMORY_BYTES and spills to a temp file above it, its SHA-256 is
+# computed chunk by chunk, and the size limit is enforced on the stream, so an
+# oversized upload is rejected after max_bytes, not after it is fully received.
+# Spilled uploads are read back through mmap.
+
+SPOOL_MEMORY_BYTES = int(os.getenv("PRIVGUARD_UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+MAX_FIELD_BYTES = 64 * 1024          # non-file form fields (policy_mode, ...)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # boundaries + part headers allowed on top of the file limit
+
+# PDF page objects, and page-tree counts (used when the page objects sit in compressed object streams)
+PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+PDF_COUNT_RE = re.compile(rb"/Count\s+(\d+)")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    """An uploaded file: spooled bytes, size, SHA-256, filename and content type."""
+
+    def __init__(self, max_bytes: int | None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self._sha = hashlib.sha256()
+        self._buffer: io.BytesIO | None = io.BytesIO()
+        self._file = None
+        self._mmap = None
+
+    @property
+    def sha256(self) -> str:
+        return self._sha.hexdigest()
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadTooLarge()
+        self._sha.update(data)
+
+        if self._file is None and self.size > SPOOL_MEMORY_BYTES:
+            # Spill: move what is buffered so far to a temp file
+            self._file = tempfile.NamedTemporaryFile(prefix="privguard-upload-", delete=True)
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+
+        (self._file or self._buffer).write(data)
+
+    def path(self) -> str:
+        """Filesystem path of the upload (spills an in-memory upload first)."""
+        if self._file is None:
+            self._file = tempfile.NamedTemporaryFile(prefix="privguard-upload-", delete=True)
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        self._file.flush()
+        return self._file.name
+
+    def view(self):
+        """Zero-copy read access: memoryview of the buffer, or an mmap of the spill file."""
+        if self._file is None:
+            return self._buffer.getbuffer()
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        return self._mmap
+
+    def page_count(self) -> int | None:
+        """Pages in a PDF (scanned without copying), 1 for an image, None if unknown."""
+        view = self.view()
+        if bytes(view[:5]) == b"%PDF-":
+            pages = sum(1 for _ in PDF_PAGE_RE.finditer(view))
+            if not pages:
+                # The root of the page tree carries the largest /Count
+                pages = max((int(m.group(1)) for m in PDF_COUNT_RE.finditer(view)), default=0)
+            return pages or None
+        if (self.content_type or "").startswith("image/"):
+            return 1
+        return None
+
+    def read_bytes(self) -> bytes:
+        """One contiguous copy, for APIs that only take bytes."""
+        return bytes(self.view())
+
+    def close(self):
+        if self._mmap is not None and not isinstance(self._mmap, bytes):
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        self._buffer = None
+
+
+async def receive_upload(request: Request, max_bytes: int | None, file_field: str = "file") -> tuple[SpooledUpload, dict]:
+    """
+    Streams a multipart/form-data body. Returns the spooled `file_field` part and
+    the other (small) form fields. Raises 400 / 413 HTTPExceptions.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES if max_bytes else None
+    declared = request.headers.get("content-length")
+    if body_limit and declared and declared.isdigit() and int(declared) > body_limit:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+
+    upload = SpooledUpload(max_bytes)
+    fields: dict[str, str] = {}
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "name": None, "target": None, "seen_file": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["name"] = None
+        state["target"] = None
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        state["name"] = name
+        if name == file_field:
+            upload.filename = disposition.get(b"filename", b"").decode("utf-8", "replace") or None
+            upload.content_type = state["headers"].get(b"content-type", b"").decode("latin-1") or None
+            state["target"] = upload
+            state["seen_file"] = True
+        else:
+            state["target"] = bytearray()
+
+    def on_part_data(data, start, end):
+        target = state["target"]
+        if target is upload:
+            upload.write(data[start:end])
+        else:
+            if len(target) + (end - start) > MAX_FIELD_BYTES:
+                raise UploadTooLarge()
+            target.extend(data[start:end])
+
+    def on_part_end():
+        if state["target"] is not upload and state["name"]:
+            fields[state["name"]] = state["target"].decode("utf-8", "replace")
+
+    parser = MultipartParser(boundary, callbacks={
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if body_limit and received > body_limit:
+                raise UploadTooLarge()
+            parser.write(chunk)
+        parser.finalize()
+    except UploadTooLarge:
+        upload.close()
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+    except Exception as e:
+        upload.close()
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+
+    if not state["seen_file"]:
+        upload.close()
+        raise HTTPException(status_code=400, detail=f"Missing '{file_field}' file part")
+
+    return upload, fields
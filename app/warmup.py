@@ -0,0 +1,138 @@
+import asyncio
+import csv
+import os
+import time
+from pathlib import Path
+
+from app import pipeline
+from app.pattern_stats import pattern_stats
+from app.redactor import redact_text
+from app.tenants import tenants
+
+# Deploy-time warm-up.
+# The first requests after startup otherwise pay for lazy work: Presidio
+# recognizer regex compilation, spaCy vocabulary and pipeline loads, the
+# anonymizer's first run, CPU executor threads, and TLS/connection setup to
+# Azure Content Safety, Alpine and Gemini. On startup a representative corpus
+# (Security/attacks.csv by default) is run through detection, policy
+# evaluation and redaction for every configured tenant, and the upstream
+# connection pools are opened. GET /ready returns 503 until this finishes, so
+# the pod only receives traffic once warm. Timings are logged and reported by
+# /ready. Warm-up writes no audit events, pattern stats or cache entries.
+
+ENABLED = os.getenv("PRIVGUARD_WARMUP", "1").lower() not in ("0", "false", "no")
+CORPUS_PATH = Path(os.getenv(
+    "PRIVGUARD_WARMUP_CORPUS", Path(__file__).resolve().parent.parent / "Security" / "attacks.csv"
+))
+TENANTS = [t.strip() for t in os.getenv("PRIVGUARD_WARMUP_TENANTS", "").split(",") if t.strip()]
+UPSTREAMS = os.getenv("PRIVGUARD_WARMUP_UPSTREAMS", "1").lower() not in ("0", "false", "no")
+UPSTREAM_TIMEOUT_S = float(os.getenv("PRIVGUARD_WARMUP_UPSTREAM_TIMEOUT_S", "5"))
+
+FALLBACK_CORPUS = [
+    ("student", "Here is my email john.doe@university.edu and phone +919876543210, summarize it"),
+    ("researcher", "This is an unpublished draft paper under embargo, improve the abstract"),
+    ("admin", "Here is our API key: sk-test-123456789, store it safely"),
+]
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[tuple[str, str]]:
+    """(role, prompt) pairs from a CSV with `role` and `prompt` columns (attacks.csv layout)."""
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            corpus = [(row.get("role") or "student", row["prompt"]) for row in csv.DictReader(f) if row.get("prompt")]
+    except (OSError, KeyError) as e:
+        print(f"[Warm-up] Corpus {path} unavailable ({e}), using the built-in prompts")
+        return list(FALLBACK_CORPUS)
+    return corpus or list(FALLBACK_CORPUS)
+
+
+def _warm_prompt(tenant, role: str, prompt: str):
+    # Uncached, so the analyzer itself runs even when a shared cache already holds these prompts;
+    # cold evaluation times are kept out of /patterns/stats
+    with pattern_stats.paused():
+        detections = tenant.detector.analyze_text(prompt, use_cache=False)
+    tenant.policy.evaluate(role=role, detections=detections, azure_severity=0,
+                           markers=tenant.policy.find_markers(prompt))
+    redact_text(prompt, detections)
+
+
+class WarmUp:
+
+    def __init__(self):
+        self.state = "pending"  # pending -> running -> ready (or "disabled")
+        self.started_at: float | None = None
+        self.timings_ms: dict[str, float] = {}
+        self.upstreams: dict[str, str] = {}
+        self.prompts = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "disabled")
+
+    async def _step(self, name: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            print(f"[Warm-up] {name}: {self.timings_ms[name]} ms")
+
+    async def run(self, upstreams: dict | None = None):
+        """
+        Warms the local pipeline, then opens the `upstreams` pools
+        ({name: coroutine function}, each bounded by UPSTREAM_TIMEOUT_S).
+        Failures are reported, never raised: a cold gateway still serves.
+        """
+        if not ENABLED:
+            self.state = "disabled"
+            return
+        self.state = "running"
+        self.started_at = time.time()
+        started = time.perf_counter()
+
+        corpus = await asyncio.to_thread(load_corpus)
+        self.prompts = len(corpus)
+        for tenant_id in [None] + TENANTS:
+            try:
+                tenant = tenants.default
+                if tenant_id:
+                    tenant = await self._step(f"tenant_load:{tenant_id}",
+                                              pipeline.run_cpu("tenant_load", tenants.get, tenant_id))
+                # Fanned out so every CPU executor thread is started too
+                await self._step(f"pipeline:{tenant.tenant_id}", asyncio.gather(*(
+                    pipeline.run_cpu("warmup", _warm_prompt, tenant, role, prompt) for role, prompt in corpus
+                )))
+            except Exception as e:
+                print(f"[Warm-up] Tenant '{tenant_id or 'default'}' failed: {e}")
+
+        if UPSTREAMS and upstreams:
+            results = await asyncio.gather(*(
+                self._step(f"upstream:{name}", self._open_upstream(open_pool)) for name, open_pool in upstreams.items()
+            ))
+            self.upstreams = dict(zip(upstreams, results))
+
+        self.timings_ms["total"] = round((time.perf_counter() - started) * 1000, 2)
+        self.state = "ready"
+        print(f"[Warm-up] Ready after {self.timings_ms['total']} ms ({self.prompts} prompts)")
+
+    async def _open_upstream(self, open_pool) -> str:
+        try:
+            connected = await asyncio.wait_for(open_pool(), timeout=UPSTREAM_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as e:
+            return f"error: {e}"
+        return "connected" if connected else "not configured"
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "started_at": self.started_at,
+            "prompts": self.prompts,
+            "timings_ms": self.timings_ms,
+            "upstreams": self.upstreams,
+        }
+
+
+warmup = WarmUp()
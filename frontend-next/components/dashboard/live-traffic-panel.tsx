@@ -1,33 +1,12 @@
 "use client"
 
-import { useEffect, useState } from "react"
 import { Activity, TrendingUp } from "lucide-react"
-
-type Stats = {
-  total_requests: number
-  blocked_count: number
-  sovereign_count: number
-  risk_distribution: Record<string, number>
-}
+import { useAuditStream } from "@/lib/audit-stream"
 
 export function LiveTrafficPanel() {
-  const [stats, setStats] = useState<Stats | null>(null)
-  const [loading, setLoading] = useState(true)
-  const [error, setError] = useState<string | null>(null)
-
-  useEffect(() => {
-    fetch("http://localhost:8000/stats")
-      .then((res) => res.json())
-      .then((data) => {
-        setStats(data)
-        setError(null)
-      })
-      .catch((err) => {
-        setError(err.message || "Failed to load stats")
-        setStats(null)
-      })
-      .finally(() => setLoading(false))
-  }, [])
+  // Snapshot + live deltas from the shared /events stream
+  const { stats, error } = useAuditStream()
+  const loading = stats === null && error === null
 
   if (loading) {
     return (
@@ -146,7 +125,7 @@ export function LiveTrafficPanel() {
       <div className="flex items-center gap-2 rounded-lg border border-primary/20 bg-primary/5 px-4 py-3">
         <TrendingUp className="h-4 w-4 text-primary" />
         <span className="font-mono text-xs text-muted-foreground">
-          Metrics from audit log. Refresh to update.
+          Metrics from audit log. Updated live.
         </span>
       </div>
     </div>
@@ -1,16 +1,7 @@
 "use client"
 
-import { useEffect, useState } from "react"
 import { cn } from "@/lib/utils"
-
-type AuditLogEntry = {
-  event_id: string
-  timestamp_utc: string
-  user_role: string
-  policy_action: string
-  routing_decision: string
-  detected_risk_level: string
-}
+import { useAuditStream } from "@/lib/audit-stream"
 
 function formatTimestamp(iso: string): string {
   try {
@@ -53,23 +44,9 @@ function getDestination(routing_decision: string): string {
 }
 
 export function LogsTable() {
-  const [logs, setLogs] = useState<AuditLogEntry[]>([])
-  const [loading, setLoading] = useState(true)
-  const [error, setError] = useState<string | null>(null)
-
-  useEffect(() => {
-    fetch("http://localhost:8000/logs")
-      .then((res) => res.json())
-      .then((data) => {
-        setLogs(data.logs ?? [])
-        setError(null)
-      })
-      .catch((err) => {
-        setError(err.message || "Failed to load logs")
-        setLogs([])
-      })
-      .finally(() => setLoading(false))
-  }, [])
+  // Latest 50 entries (snapshot), newest first, then live from the shared /events stream
+  const { stats, logs, error } = useAuditStream()
+  const loading = stats === null && error === null
 
   if (loading) {
     return (
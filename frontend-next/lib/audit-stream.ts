@@ -0,0 +1,95 @@
+"use client"
+
+import { useSyncExternalStore } from "react"
+
+// One shared /events connection for every dashboard component.
+// The `stats` snapshot (counters + latest logs) is taken server-side after the
+// subscription starts, so live `log` / `stats_delta` events continue it
+// without gaps or double counting. On reconnect a fresh snapshot replaces the
+// state.
+
+const EVENTS_URL = "http://localhost:8000/events?snapshot=true"
+const MAX_LOGS = 50
+
+export type Stats = {
+  total_requests: number
+  blocked_count: number
+  sovereign_count: number
+  risk_distribution: Record<string, number>
+}
+
+export type AuditLogEntry = {
+  event_id: string
+  timestamp_utc: string
+  user_role: string
+  policy_action: string
+  routing_decision: string
+  detected_risk_level: string
+}
+
+type AuditStreamState = {
+  stats: Stats | null
+  logs: AuditLogEntry[]
+  error: string | null
+}
+
+const INITIAL: AuditStreamState = { stats: null, logs: [], error: null }
+
+let state = INITIAL
+let source: EventSource | null = null
+const listeners = new Set<() => void>()
+
+function applyDelta(stats: Stats, delta: Stats): Stats {
+  const risk = { ...stats.risk_distribution }
+  for (const [level, n] of Object.entries(delta.risk_distribution ?? {})) {
+    risk[level] = (risk[level] ?? 0) + n
+  }
+  return {
+    total_requests: stats.total_requests + delta.total_requests,
+    blocked_count: stats.blocked_count + delta.blocked_count,
+    sovereign_count: stats.sovereign_count + delta.sovereign_count,
+    risk_distribution: risk,
+  }
+}
+
+function update(next: Partial<AuditStreamState>) {
+  state = { ...state, ...next }
+  listeners.forEach((listener) => listener())
+}
+
+function open() {
+  source = new EventSource(EVENTS_URL)
+  source.addEventListener("stats", (e) => {
+    const { logs, ...stats } = JSON.parse((e as MessageEvent).data)
+    update({ stats: stats as Stats, logs: (logs ?? []).slice(0, MAX_LOGS), error: null })
+  })
+  source.addEventListener("log", (e) => {
+    const entry = JSON.parse((e as MessageEvent).data) as AuditLogEntry
+    update({ logs: [entry, ...state.logs].slice(0, MAX_LOGS) })
+  })
+  source.addEventListener("stats_delta", (e) => {
+    const delta = JSON.parse((e as MessageEvent).data) as Stats
+    if (state.stats) update({ stats: applyDelta(state.stats, delta) })
+  })
+  // EventSource reconnects by itself; only report an error before the first snapshot
+  source.onerror = () => {
+    if (!state.stats) update({ error: "Failed to connect to the gateway event stream" })
+  }
+}
+
+function subscribe(listener: () => void) {
+  listeners.add(listener)
+  if (!source) open()
+  return () => {
+    listeners.delete(listener)
+    if (listeners.size === 0) {
+      source?.close()
+      source = null
+      state = INITIAL
+    }
+  }
+}
+
+export function useAuditStream(): AuditStreamState {
+  return useSyncExternalStore(subscribe, () => state, () => INITIAL)
+}
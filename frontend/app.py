@@ -4,8 +4,13 @@ import pandas as pd
 import plotly.express as px
 import json
 import os
+import sys
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Make the project root importable (streamlit only adds frontend/ to the path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Security.audit_store import iter_events
 
 
 API_URL = "http://127.0.0.1:8000"
@@ -216,15 +221,15 @@ with tab3:
     if st.button("🔄 Refresh Logs"):
         st.rerun()
 
+    # Only the audit segments overlapping this window are opened
+    days = st.selectbox("Time window", [1, 7, 30, 90], index=1, format_func=lambda d: f"Last {d} days")
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+
     if os.path.exists(LOG_FILE):
 
-        # Read JSONL file line by line
         log_data = []
-        try:    
-            with open(LOG_FILE, "r") as f:
-                for line in f:
-                    if line.strip():
-                        log_data.append(json.loads(line))
+        try:
+            log_data = list(iter_events(since=since))
 
         except Exception as e:
             st.error(f"Error reading logs: {e}")
@@ -0,0 +1,31 @@
+import pytest
+
+from Security import audit_logger, audit_store
+
+
+@pytest.fixture
+def audit_dir(tmp_path, monkeypatch):
+    """Points the audit log, its segments and index at an empty temporary directory."""
+    segments = tmp_path / "audit_segments"
+    log_path = tmp_path / "audit_log.jsonl"
+    monkeypatch.setattr(audit_store, "LOG_PATH", log_path)
+    monkeypatch.setattr(audit_store, "SEGMENT_DIR", segments)
+    monkeypatch.setattr(audit_store, "INDEX_PATH", segments / "index.json")
+    monkeypatch.setattr(audit_logger, "LOG_PATH", log_path)
+    monkeypatch.setattr(audit_logger, "_chain_head", None)
+    monkeypatch.setattr(audit_logger, "_backend", audit_logger.FileAuditBackend())
+    monkeypatch.setattr(audit_logger, "_listeners", [])
+    return tmp_path
+
+
+def log(n: int, role: str = "student", action: str = "ALLOW", risk: str = "LOW"):
+    """Writes `n` audit events through the real logger."""
+    for _ in range(n):
+        audit_logger.log_event(
+            user_role=role,
+            detected_risk=risk,
+            matched_patterns=[],
+            action_taken=action,
+            routing_decision="CLOUD_LLM",
+            request_hash="0" * 64,
+        )
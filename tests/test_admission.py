@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.admission import AdmissionController
+
+
+def _controller(queue_timeout_s=0.2, **admission) -> AdmissionController:
+    return AdmissionController({
+        "admission_control": {
+            "queue_timeout_s": queue_timeout_s,
+            "endpoints": {"/upload_scan": {"max_concurrent": 2}, "/proxy": {"max_concurrent": 4}},
+            **admission,
+        },
+        "role_policies": {
+            "researcher": {"max_concurrent_requests": 1},
+            "student": {"max_concurrent_requests": 4},
+            "employee": {},
+        },
+    })
+
+
+def test_excess_requests_are_rejected_with_retry_after():
+    controller = _controller(queue_timeout_s=0.05)
+
+    async def scenario():
+        async with controller.admit("/proxy", "researcher"):
+            with pytest.raises(HTTPException) as e:
+                async with controller.admit("/proxy", "researcher"):
+                    pass
+        return e.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers == {"Retry-After": "2"}
+    stats = controller.stats()["roles"]["researcher"]
+    assert (stats["admitted"], stats["rejected"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_saturated_role_does_not_hold_endpoint_slots():
+    controller = _controller(queue_timeout_s=0.5)
+    endpoint = controller.endpoint_limits["/upload_scan"]
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def researcher_upload():
+            async with controller.admit("/upload_scan", "researcher"):
+                await release.wait()
+
+        # One researcher upload runs; the rest queue behind the researcher's role limit
+        tasks = [asyncio.create_task(researcher_upload()) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        assert endpoint.in_flight == 1
+
+        # Another role still gets the remaining /upload_scan slot immediately
+        async with controller.admit("/upload_scan", "student"):
+            assert endpoint.in_flight == 2
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert endpoint.rejected == 0
+
+
+def test_roles_without_a_limit_get_the_default():
+    controller = _controller(default_role_max_concurrent=3)
+
+    assert controller.role_limiter("employee").max_concurrent == 3
+    assert controller.role_limiter("Student").max_concurrent == 4
+    assert controller.role_limiter(None) is controller.role_limits["student"]
+
+    # Role names not in role_policies share one limiter
+    assert controller.role_limiter("intern") is controller.role_limiter("contractor")
+    assert controller.role_limiter("intern").max_concurrent == 3
+    assert "default" in controller.stats()["roles"]
+
+
+def test_prompt_size_limit():
+    controller = _controller(max_prompt_chars=10)
+    controller.check_prompt_size("x" * 10)
+    with pytest.raises(HTTPException) as e:
+        controller.check_prompt_size("x" * 11)
+    assert e.value.status_code == 413
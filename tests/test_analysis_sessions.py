@@ -0,0 +1,112 @@
+import random
+import re
+
+import pytest
+
+from app.analysis_sessions import AnalysisSession, EditError, SessionStore, apply_edits, split_windows
+from app.pattern_registry import Detection
+
+PATTERNS = {
+    "PII_EMAIL": re.compile(r"\b[\w.]+@\w+\.com\b"),
+    "PERSON_TITLE": re.compile(r"\bDr\.\s+\w+"),  # spans a sentence-window boundary ("Dr. " ends a window)
+}
+
+
+class RegexDetector:
+    """Stand-in for PatternDetector: regex matches, counting how much text it was given."""
+
+    def __init__(self, fingerprint="rules-v1"):
+        self.fingerprint = fingerprint
+        self.analyzed_chars = 0
+
+    def analyze_text(self, text):
+        self.analyzed_chars += len(text)
+        return [
+            Detection(entity, m.start(), m.end(), 0.9, "MEDIUM")
+            for entity, pattern in PATTERNS.items()
+            for m in pattern.finditer(text)
+        ]
+
+
+def _spans(detections):
+    return sorted((d.entity_type, d.start, d.end) for d in detections)
+
+
+SENTENCES = [
+    "Mail jane.doe@example.com today.",
+    "Ask Dr. Rivera about it!",
+    "Nothing to see here.",
+    "Line one\nline two mentions bob@corp.com",
+    "Is this fine?",
+]
+
+
+def test_split_windows_tiles_the_text():
+    text = "One. Two!  Three?\nFour\n\nfive"
+    windows = split_windows(text)
+    assert [text[s:e] for s, e in windows] == ["One. ", "Two!  ", "Three?\n", "Four\n\n", "five"]
+    assert split_windows("") == []
+    assert split_windows("No boundary at the end. ") == [(0, 24)]
+
+
+def test_apply_edits_in_order():
+    assert apply_edits("hello world", [(0, 5, "goodbye"), (8, 13, "moon")]) == "goodbye moon"
+    with pytest.raises(EditError):
+        apply_edits("short", [(3, 10, "x")])
+
+
+def test_incremental_results_match_a_full_analysis():
+    rng = random.Random(3)
+    detector = RegexDetector()
+    session = AnalysisSession(tenant_id=None)
+    text = " ".join(SENTENCES)
+    session.analyze(detector, text)
+
+    for _ in range(40):
+        start = rng.randrange(len(text) + 1)
+        end = min(len(text), start + rng.randrange(6))
+        text = apply_edits(text, [(start, end, rng.choice(["", "x", ". ", "Dr. ", "a@b.com ", "\n", "Dr"]))])
+        session.analyze(detector, text)
+        assert _spans(session.detections) == _spans(RegexDetector().analyze_text(text)), text
+
+
+def test_unchanged_windows_are_reused():
+    detector = RegexDetector()
+    session = AnalysisSession(tenant_id=None)
+    text = " ".join(SENTENCES + [f"Filler sentence number {i}." for i in range(10)])
+    session.analyze(detector, text)
+
+    edited = text.replace("number 5", "number five")
+    detector.analyzed_chars = 0
+    stats = session.analyze(detector, edited)
+    # Only the edited window and its two neighbours are analyzed again
+    assert stats["reused_windows"] == stats["windows"] - 3
+    assert detector.analyzed_chars < len(edited) / 2
+    # The match across the "Dr. " boundary survives reuse
+    assert ("PERSON_TITLE", edited.index("Dr."), edited.index("Rivera") + len("Rivera")) in _spans(session.detections)
+    assert session.version == 2
+
+
+def test_pattern_set_change_reanalyzes_everything():
+    session = AnalysisSession(tenant_id=None)
+    text = " ".join(SENTENCES)
+    session.analyze(RegexDetector("rules-v1"), text)
+    stats = session.analyze(RegexDetector("rules-v2"), text)
+    assert stats["reused_windows"] == 0 and stats["reanalyzed_chars"] == len(text)
+
+
+def test_store_scopes_sessions_to_tenants_and_evicts():
+    store = SessionStore(max_sessions=2, ttl_s=60)
+    a = store.create("tenant-a")
+    assert store.get(a.id, "tenant-a") is a
+    assert store.get(a.id, "tenant-b") is None
+    assert not store.delete(a.id, "tenant-b")
+
+    b = store.create("tenant-a")
+    store.get(a.id, "tenant-a")  # a is now the most recently used
+    store.create("tenant-a")
+    assert store.get(b.id, "tenant-a") is None and store.get(a.id, "tenant-a") is a
+    assert store.evicted == 1
+
+    store.ttl_s = 0
+    assert store.get(a.id, "tenant-a") is None
@@ -0,0 +1,56 @@
+import json
+import math
+
+import pytest
+
+from Security import audit_codec
+
+EVENT = {
+    "event_id": "e1",
+    "user_role": "researcher",
+    "matched_pattern_ids": ["PII_EMAIL"],
+    "note": "café ✓",
+    "processing_latency_ms": 12.5,
+    "previous_log_hash": "0" * 64,
+}
+
+
+def test_sealed_line_extends_the_canonical_form():
+    canonical = audit_codec.canonical(EVENT)
+    assert canonical == json.dumps(EVENT, sort_keys=True)
+    assert canonical.isascii()
+
+    line = audit_codec.sealed_line(canonical, "a" * 64)
+    entry = json.loads(line)
+    assert entry == {**EVENT, "current_log_hash": "a" * 64}
+    assert list(entry)[-1] == "current_log_hash"
+    # The verifier re-hashes exactly what was hashed on write
+    del entry["current_log_hash"]
+    assert audit_codec.canonical(entry) == canonical
+
+
+@pytest.mark.parametrize("line", [
+    json.dumps(EVENT),
+    '{"event_id": "e2", "processing_latency_ms": NaN, "user_role": "student"}',
+    '{"event_id": "e3", "note": "\\ud800", "user_role": "admin"}',
+])
+def test_loads_and_project_match_stdlib(line):
+    expected = json.loads(line)
+    decoded = audit_codec.loads(line)
+    assert decoded.keys() == expected.keys()
+    assert decoded["event_id"] == expected["event_id"]
+    if "processing_latency_ms" in expected and math.isnan(expected["processing_latency_ms"]):
+        assert math.isnan(decoded["processing_latency_ms"])
+
+    fields = ("event_id", "user_role", "missing")
+    projected = audit_codec.project(fields)(line)
+    assert projected == {f: expected[f] for f in fields if f in expected}
+
+
+@pytest.mark.parametrize("line", ["{not json", "[1, 2]"])
+def test_malformed_lines_raise_decode_error(line):
+    with pytest.raises(audit_codec.DecodeError):
+        audit_codec.project(("event_id",))(line)
+    if line.startswith("{"):
+        with pytest.raises(audit_codec.DecodeError):
+            audit_codec.loads(line)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from Security import audit_columnar, audit_logger, audit_store
+from tests.conftest import log
+
+
+@pytest.fixture
+def columnar(audit_dir, monkeypatch):
+    monkeypatch.setattr(audit_store, "SEGMENT_MAX_BYTES", 1000)
+    monkeypatch.setattr(audit_columnar, "COLUMNAR_DIR", audit_dir / "audit_columnar")
+    monkeypatch.setattr(audit_columnar, "EXPORTED_PATH", audit_dir / "audit_columnar" / "_exported.json")
+    log(6, role="student", action="BLOCK", risk="HIGH")
+    log(4, role="admin", action="ALLOW", risk="LOW")
+    return audit_dir
+
+
+@pytest.mark.parametrize("value", [
+    "2026-03-01T12:30:00Z",
+    "2026-03-01T12:30:00.000000Z",
+    "2026-03-01T12:30:00",
+    "2026-03-01T14:30:00+02:00",
+])
+def test_parse_ts_normalizes_to_utc(value):
+    assert audit_columnar.parse_ts(value) == datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("value", ["yesterday", "2026-13-01", "2026-03-01T25:00:00Z", ""])
+def test_parse_ts_rejects_malformed_values(value):
+    with pytest.raises(ValueError):
+        audit_columnar.parse_ts(value)
+
+
+def test_query_covers_exported_and_active_segments(columnar):
+    result = audit_columnar.query()
+    assert result["total"] == 10
+    assert [r["event_id"] for r in result["rows"]] == [e["event_id"] for e in reversed(list(audit_store.iter_events()))]
+
+    # Sealed segments were exported once; a second export has nothing to do
+    sealed = {m["index"] for m in audit_store.sealed_segments()}
+    assert sealed and audit_columnar._load_exported() == sealed
+    assert audit_columnar.export_sealed_segments() == 0
+
+
+def test_filters_and_grouping(columnar):
+    assert audit_columnar.query(filters={"role": "admin"})["total"] == 4
+
+    grouped = audit_columnar.query(group_by=["role", "action"])
+    assert grouped["total"] == 10
+    assert {(g["user_role"], g["policy_action"], g["count"]) for g in grouped["groups"]} == {
+        ("student", "BLOCK", 6),
+        ("admin", "ALLOW", 4),
+    }
+
+
+def test_time_range_with_offsets(columnar):
+    events = list(audit_store.iter_events())
+    middle = audit_columnar.parse_ts(events[5]["timestamp_utc"])
+
+    # The same instant, written with a +05:30 offset
+    start = middle.astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat()
+    after = audit_columnar.query(start=start, columns=["event_id"])
+    assert {r["event_id"] for r in after["rows"]} == {
+        e["event_id"] for e in events if audit_columnar.parse_ts(e["timestamp_utc"]) >= middle
+    }
+
+    assert audit_columnar.query(end="2000-01-01T00:00:00Z")["total"] == 0
+
+
+def test_endpoint_and_document_columns(columnar):
+    audit_logger.log_event(
+        user_role="researcher",
+        detected_risk="MEDIUM",
+        matched_patterns=[],
+        action_taken="REDACT",
+        routing_decision="LOCAL_ONLY",
+        request_hash="f" * 64,
+        endpoint="/upload_scan",
+        document={"size_bytes": 20480, "pages": 3, "content_type": "application/pdf"},
+    )
+
+    uploads = audit_columnar.query(filters={"endpoint": "/upload_scan"})
+    assert uploads["total"] == 1
+    assert (uploads["rows"][0]["document_bytes"], uploads["rows"][0]["document_pages"]) == (20480, 3)
+
+    # Events without the fields read them as null
+    grouped = audit_columnar.query(group_by=["endpoint"])
+    assert {g["endpoint"]: g["count"] for g in grouped["groups"]} == {None: 10, "/upload_scan": 1}
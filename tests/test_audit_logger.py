@@ -0,0 +1,46 @@
+from Security import audit_logger, audit_store
+from Security.audit_verifier import verify_segment
+from tests.conftest import log
+
+
+def _log_upload(**fields):
+    audit_logger.log_event(
+        user_role="researcher",
+        detected_risk="MEDIUM",
+        matched_patterns=["PII_EMAIL"],
+        action_taken="REDACT",
+        routing_decision="LOCAL_ONLY",
+        request_hash="f" * 64,
+        **fields,
+    )
+
+
+def test_entry_point_fields_are_written_and_chained(audit_dir):
+    log(1)
+    _log_upload(
+        processing_latency_ms=812,
+        endpoint="/upload_scan",
+        stage_latency_ms={"ocr": 640.5, "detect": 120.25},
+        cache_hits={"detection": False, "ocr_text": True},
+        document={"size_bytes": 20480, "pages": 3, "content_type": "application/pdf"},
+    )
+
+    proxy, upload = audit_store.iter_events()
+    for field in ("endpoint", "stage_latency_ms", "cache_hits", "document", "processing_latency_ms"):
+        assert field not in proxy
+    assert upload["endpoint"] == "/upload_scan"
+    assert upload["processing_latency_ms"] == 812
+    assert upload["stage_latency_ms"] == {"ocr": 640.5, "detect": 120.25}
+    assert upload["cache_hits"] == {"detection": False, "ocr_text": True}
+    assert upload["document"]["pages"] == 3
+
+    # The optional fields are covered by the hash chain like any other
+    verified = verify_segment(str(audit_store.LOG_PATH))
+    assert (verified["count"], verified["broken"]) == (2, None)
+
+
+def test_empty_timings_and_cache_flags_are_omitted(audit_dir):
+    _log_upload(endpoint="/redact", stage_latency_ms={}, cache_hits={})
+    (event,) = audit_store.iter_events()
+    assert event["endpoint"] == "/redact"
+    assert "stage_latency_ms" not in event and "cache_hits" not in event
@@ -0,0 +1,69 @@
+import gzip
+
+import pytest
+
+from Security import audit_codec, audit_logger, audit_store
+from tests.conftest import log
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "gzip"])
+def rotating(audit_dir, monkeypatch, request):
+    """Seals the active segment roughly every three events."""
+    monkeypatch.setattr(audit_store, "SEGMENT_MAX_BYTES", 1000)
+    monkeypatch.setattr(audit_store, "COMPRESS_SEALED", request.param)
+    return audit_dir
+
+
+def _events(path):
+    return [e for e in map(audit_codec.loads, audit_store.iter_segment_lines(path)) if not audit_store.is_header(e)]
+
+
+def test_rotation_keeps_one_continuous_chain(rotating):
+    log(20)
+    segments = audit_store.sealed_segments()
+    assert len(segments) >= 3
+
+    previous = audit_logger._hash("GENESIS")
+    for meta in segments:
+        events = _events(audit_store.segment_path(meta))
+        assert meta["event_count"] == len(events)
+        assert meta["previous_segment_final_hash"] == previous
+        assert events[0]["previous_log_hash"] == previous
+        assert meta["final_hash"] == events[-1]["current_log_hash"]
+        previous = meta["final_hash"]
+
+    header = audit_store.active_header()
+    assert header["segment_index"] == segments[-1]["index"] + 1
+    assert header["previous_segment_final_hash"] == previous
+    assert _events(audit_store.LOG_PATH)[0]["previous_log_hash"] == previous
+
+
+def test_sealed_segments_are_compressed_when_configured(rotating):
+    log(10)
+    meta = audit_store.sealed_segments()[0]
+    path = audit_store.segment_path(meta)
+    assert path.name.endswith(".gz") == meta["compressed"] == audit_store.COMPRESS_SEALED
+    if meta["compressed"]:
+        with gzip.open(path, "rt") as f:
+            assert f.readline()
+
+
+def test_readers_span_sealed_and_active_segments(rotating):
+    for role in ("student", "admin") * 5:
+        log(1, role=role)
+
+    events = list(audit_store.iter_events())
+    assert [e["user_role"] for e in events] == ["student", "admin"] * 5
+
+    recent = audit_store.read_recent(limit=4, fields=("user_role",))
+    assert recent == [{"user_role": r} for r in ("admin", "student", "admin", "student")]
+
+    since = events[6]["timestamp_utc"]
+    assert list(audit_store.iter_events(since=since)) == [e for e in events if e["timestamp_utc"] >= since]
+
+
+def test_chain_head_survives_a_restart(rotating, monkeypatch):
+    log(7)
+    head = audit_logger.chain_head()
+    monkeypatch.setattr(audit_logger, "_chain_head", None)
+    assert audit_logger.chain_head() == head
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from Security import audit_store, audit_verifier
+from tests.conftest import log
+
+
+@pytest.fixture
+def chain(audit_dir, monkeypatch):
+    """A rotating, uncompressed audit log with a checkpoint key."""
+    monkeypatch.setattr(audit_store, "SEGMENT_MAX_BYTES", 1000)
+    monkeypatch.setattr(audit_store, "COMPRESS_SEALED", False)
+    monkeypatch.setattr(audit_verifier, "CHECKPOINT_PATH", audit_dir / "audit_segments" / "checkpoint.json")
+    monkeypatch.setenv("PRIVGUARD_CHECKPOINT_KEY", "test-key")
+    log(12)
+    return audit_dir
+
+
+def _tamper(path, old: str, new: str):
+    text = path.read_text()
+    assert old in text
+    path.write_text(text.replace(old, new, 1))
+
+
+def test_full_verification(chain):
+    report = audit_verifier.verify_chain(full=True, workers=2)
+    assert report["ok"]
+    assert report["verified_events"] == 12
+    assert report["chain_starts_at_genesis"]
+    assert report["segments"] == len(audit_store.sealed_segments()) + 1
+    assert report["checkpoint_written"]
+
+
+def test_incremental_run_only_verifies_new_events(chain):
+    audit_verifier.verify_chain(workers=2)
+    log(2)
+    report = audit_verifier.verify_chain(workers=2)
+    assert report["ok"]
+    assert report["verified_events"] + report["checkpointed_events"] == 14
+    assert report["verified_events"] < 14
+
+
+def test_tampered_active_event_is_detected(chain):
+    _tamper(audit_store.LOG_PATH, '"student"', '"admin"')
+    report = audit_verifier.verify_chain(full=True, workers=2)
+    assert not report["ok"]
+    assert report["first_broken"]["reason"] == "current_log_hash does not match entry contents"
+
+
+def test_tampered_sealed_segment_is_detected_despite_checkpoint(chain):
+    assert audit_verifier.verify_chain(workers=2)["ok"]
+
+    # Edit a sealed segment but leave index.json alone
+    sealed = audit_store.segment_path(audit_store.sealed_segments()[0])
+    _tamper(sealed, '"student"', '"admin"')
+
+    report = audit_verifier.verify_chain(workers=2)
+    assert not report["ok"]
+    assert report["first_broken"]["segment"] == str(sealed)
+
+
+def test_checkpoint_requires_a_valid_signature(chain, monkeypatch):
+    audit_verifier.verify_chain(workers=2)
+    stored = json.loads(audit_verifier.CHECKPOINT_PATH.read_text())
+    assert audit_verifier.load_checkpoint() == stored["checkpoint"]
+
+    monkeypatch.setenv("PRIVGUARD_CHECKPOINT_KEY", "another-key")
+    assert audit_verifier.load_checkpoint() is None
+
+    monkeypatch.delenv("PRIVGUARD_CHECKPOINT_KEY")
+    assert audit_verifier.load_checkpoint() is None
+    assert audit_verifier.verify_chain(workers=2)["checkpoint_written"] is False
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app import deadline
+from app.deadline import Deadline, StageUnavailable
+from app.policy import FAIL_CLOSED, FAIL_OPEN, LOCAL_ONLY, PolicyEngine
+
+
+def test_endpoint_budget_can_only_be_tightened(monkeypatch):
+    monkeypatch.setitem(deadline.CONFIG, "budget_ms", {"/proxy": 3000})
+    monkeypatch.setitem(deadline.CONFIG, "default_budget_ms", 10_000)
+    assert Deadline.for_endpoint("/proxy").budget_ms == 3000
+    assert Deadline.for_endpoint("/proxy", requested_ms=500).budget_ms == 500
+    assert Deadline.for_endpoint("/proxy", requested_ms=60_000).budget_ms == 3000
+    assert Deadline.for_endpoint("/redact", requested_ms=0).budget_ms == 10_000
+
+
+def test_stages_share_one_budget():
+    async def scenario():
+        budget = Deadline(150)
+        assert await budget.run("content_safety", asyncio.sleep(0.01, result="ok")) == "ok"
+        with pytest.raises(StageUnavailable) as timeout:
+            await budget.run("alpine", asyncio.sleep(1))
+        # The timed-out stage used up the budget: the next stage is not even started
+        never_awaited = asyncio.sleep(0)
+        with pytest.raises(StageUnavailable) as exhausted:
+            await budget.run("gemini", never_awaited)
+        return timeout.value, exhausted.value, never_awaited
+
+    timeout, exhausted, never_awaited = asyncio.run(scenario())
+    assert (timeout.stage, timeout.reason) == ("alpine", "timeout")
+    assert (exhausted.stage, exhausted.reason) == ("gemini", "deadline exhausted")
+    assert never_awaited.cr_frame is None  # closed, so no "never awaited" warning
+
+
+def test_stage_errors_are_reported_as_unavailable():
+    async def failing():
+        raise ConnectionError("connection reset")
+
+    with pytest.raises(StageUnavailable, match=r"content_safety unavailable \(error: connection reset\)"):
+        asyncio.run(Deadline(1000).run("content_safety", failing()))
+
+
+@pytest.mark.parametrize("mode, action, route", [
+    (FAIL_OPEN, "ALLOW", "CLOUD_LLM"),
+    (LOCAL_ONLY, "ALLOW", "SAFE_MODE"),
+    (FAIL_CLOSED, "BLOCK", "NONE"),
+])
+def test_degrade_modes(mode, action, route):
+    decision = {"action": "ALLOW", "route": "CLOUD_LLM", "reason": "No sensitive data"}
+    degraded = PolicyEngine().degrade(decision, mode, "content_safety")
+    assert (degraded["action"], degraded["route"]) == (action, route)
+
+    blocked = {"action": "BLOCK", "route": "NONE", "reason": "Risk too high"}
+    assert PolicyEngine().degrade(blocked, mode, "content_safety") == blocked
+
+
+def test_failure_mode_per_role():
+    engine = PolicyEngine()
+    assert engine.failure_mode("student") == FAIL_CLOSED
+    assert engine.failure_mode("Researcher") == LOCAL_ONLY
+    assert engine.failure_mode("visitor") == FAIL_CLOSED  # unknown roles get the student policy
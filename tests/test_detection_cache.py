@@ -0,0 +1,50 @@
+import time
+
+from app.detection_cache import DetectionCache, LocalCache, RedisCache
+
+DETECTIONS = [{"entity_type": "PII_EMAIL", "start": 0, "end": 5, "score": 0.6, "risk_level": "MEDIUM"}]
+
+
+def test_results_are_namespaced_by_pattern_set():
+    cache = DetectionCache(LocalCache())
+    cache.set("rules-v1", "hello", DETECTIONS)
+    assert cache.get("rules-v1", "hello") == DETECTIONS
+    assert cache.get("rules-v2", "hello") is None
+    assert cache.get("rules-v1", "hello!") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_local_cache_lru_and_ttl():
+    cache = LocalCache(max_entries=2, ttl_s=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")  # evicts b, the least recently used
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+    expiring = LocalCache(ttl_s=0)
+    expiring.set("a", "1")
+    time.sleep(0.001)
+    assert expiring.get("a") is None
+
+
+def test_disabled_cache():
+    cache = DetectionCache(None)
+    cache.set("rules", "hello", DETECTIONS)
+    assert not cache.enabled
+    assert cache.get("rules", "hello") is None
+
+
+def test_document_text_is_opt_in():
+    assert DetectionCache(LocalCache()).get_document_text("abc") is None
+
+    cache = DetectionCache(LocalCache(), document_backend=LocalCache(max_entries=1))
+    cache.set_document_text("abc", "scanned text")
+    assert cache.documents_enabled
+    assert cache.get_document_text("abc") == "scanned text"
+
+
+def test_redis_outage_reads_as_a_miss():
+    cache = DetectionCache(RedisCache("redis://127.0.0.1:1/0"))
+    cache.set("rules", "hello", DETECTIONS)
+    assert cache.get("rules", "hello") is None
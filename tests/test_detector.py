@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("presidio_analyzer")
+pytest.importorskip("en_core_web_md")
+
+from app import detector  # noqa: E402
+from app.policy import PolicyEngine  # noqa: E402
+
+PHONE = "+919876543210"
+EMAIL = "jane.doe@example.com"
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return PolicyEngine()
+
+
+def _large_prompt(head: str) -> str:
+    filler = "The quarterly figures are summarized below. " * (detector.EARLY_EXIT_MIN_CHARS // 40)
+    return f"{head} Call me on {PHONE}. {filler} Reply to {EMAIL} please."
+
+
+def _detect(engine, role: str, text: str):
+    markers = engine.find_markers(text)
+    detections, partial = detector.default_detector.analyze_text_with_early_exit(
+        text, stop_when=lambda found: engine.block_certain(role, found, markers)
+    )
+    return detections, partial, engine.evaluate(role, detections, 0, markers)
+
+
+def test_large_prompt_stops_early_on_a_certain_block(engine):
+    detections, partial, decision = _detect(engine, "student", _large_prompt("Quick question."))
+    assert partial
+    assert decision["action"] == "BLOCK"
+    assert all(d.partial for d in detections)
+
+
+def test_large_prompt_with_marker_is_fully_detected(engine):
+    # The marker turns the student's BLOCK into local redaction, so every segment must be scanned
+    text = _large_prompt("This is an internal memo.")
+    detections, partial, decision = _detect(engine, "student", text)
+    assert not partial
+    assert (decision["action"], decision["route"]) == ("REDACT", "SAFE_MODE")
+
+    found = {text[d.start:d.end] for d in detections}
+    assert PHONE in found
+    assert EMAIL in found
+
+
+def test_early_exit_full_pass_matches_analyze_text(engine):
+    text = _large_prompt("This is an internal memo.")
+    detections, _, _ = _detect(engine, "admin", text)
+    expected = detector.default_detector.analyze_text(text, use_cache=False)
+    key = lambda d: (d.start, d.end, d.entity_type)  # noqa: E731
+    assert sorted(map(key, detections)) == sorted(map(key, expected))
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+from app import events
+from app.events import EventBroker, stats_delta
+from tests.conftest import log
+
+
+def _parse(chunk: str) -> tuple[str, dict]:
+    kind, data = chunk.strip().split("\n")
+    return kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_stats_delta():
+    event = {"policy_action": "BLOCK", "routing_decision": "SAFE_MODE", "detected_risk_level": "high"}
+    assert stats_delta(event) == {
+        "total_requests": 1,
+        "blocked_count": 1,
+        "sovereign_count": 1,
+        "risk_distribution": {"HIGH": 1},
+    }
+    assert stats_delta({"detected_risk_level": "SAFETY"})["risk_distribution"] == {}
+
+
+def test_audit_events_reach_subscribers(audit_dir):
+    broker = EventBroker()
+
+    async def scenario():
+        broker.attach(asyncio.get_running_loop())
+        sub = broker.subscribe()
+        stream = broker.stream(sub)
+        await asyncio.to_thread(log, 1, "admin", "BLOCK", "CRITICAL")
+        received = [_parse(await anext(stream)) for _ in range(2)]
+        await stream.aclose()
+        return received
+
+    (kind, event), (delta_kind, delta) = asyncio.run(scenario())
+    assert (kind, event["user_role"], event["policy_action"]) == ("log", "admin", "BLOCK")
+    assert (delta_kind, delta["blocked_count"]) == ("stats_delta", 1)
+    assert broker.subscriber_count == 0
+
+
+def test_snapshot_skips_events_it_already_counted():
+    broker = EventBroker()
+
+    async def scenario():
+        sub = broker.subscribe()
+        # Written between subscribing and reading the snapshot: queued, and in the snapshot
+        broker._fanout({"event_id": "a", "policy_action": "ALLOW"})
+        broker._fanout({"event_id": "b", "policy_action": "BLOCK"})
+        seen = {"log": {"a"}, "stats_delta": {"a"}}
+        stream = broker.stream(sub, snapshot={"total_requests": 1}, seen=seen)
+        received = [_parse(await anext(stream)) for _ in range(3)]
+        await stream.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+    assert received[0] == ("stats", {"total_requests": 1})
+    assert [(kind, data.get("event_id")) for kind, data in received[1:]] == [("log", "b"), ("stats_delta", None)]
+    assert received[2][1]["blocked_count"] == 1
+
+
+def test_slow_subscriber_is_dropped(monkeypatch):
+    monkeypatch.setattr(events, "SUBSCRIBER_BUFFER", 4)
+    broker = EventBroker()
+
+    async def scenario():
+        slow = broker.subscribe()
+        for i in range(3):
+            broker._fanout({"event_id": str(i)})
+        assert slow.dropped and broker.subscriber_count == 0
+        return [_parse(chunk)[0] async for chunk in broker.stream(slow)]
+
+    assert asyncio.run(scenario()) == ["log", "stats_delta", "log", "stats_delta", "dropped"]
+    assert broker.dropped_total == 1
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from app.jobs import CANCELLED, FAILED, SUCCEEDED, JobQueue, QueueFull
+
+
+def _result(value):
+    async def run():
+        return value
+    return run
+
+
+async def _wait(job):
+    while not job.finished:
+        await asyncio.sleep(0.001)
+    return job
+
+
+def test_priority_order_and_results():
+    async def scenario():
+        queue = JobQueue(workers=1)
+        queue.start()
+        order = []
+
+        def record(name):
+            async def run():
+                order.append(name)
+                return name
+            return run
+
+        blocker = asyncio.Event()
+
+        async def hold():
+            await blocker.wait()
+
+        queue.submit("scan", hold)
+        await asyncio.sleep(0)  # the single worker picks up the blocking job
+        low, _ = queue.submit("scan", record("low"), priority="low")
+        normal, _ = queue.submit("scan", record("normal"))
+        high, _ = queue.submit("scan", record("high"), priority="high")
+        blocker.set()
+        await _wait(low)
+        await queue.stop()
+        return order, high
+
+    order, high = asyncio.run(scenario())
+    assert order == ["high", "normal", "low"]
+    assert high.status == SUCCEEDED and high.to_dict()["result"] == "high"
+
+
+def test_dedup_key_and_owner_scoping():
+    async def scenario():
+        queue = JobQueue(workers=1)
+        queue.start()
+        cleaned = []
+        first, created = queue.submit("scan", _result(1), key="doc:strict:student", owner="student")
+        again, created_again = queue.submit("scan", _result(2), key="doc:strict:student", owner="student",
+                                            cleanup=lambda: cleaned.append(True))
+        other, created_other = queue.submit("scan", _result(3), key="doc:strict:admin", owner="admin")
+        await _wait(first)
+        await _wait(other)
+        await queue.stop()
+        return queue, first, again, other, created, created_again, created_other, cleaned
+
+    queue, first, again, other, created, created_again, created_other, cleaned = asyncio.run(scenario())
+    assert created and not created_again and created_other
+    assert again is first and cleaned == [True]
+    assert other is not first and other.result == 3
+    assert queue.get(first.id, "student") is first
+    assert queue.get(first.id, "admin") is None
+
+
+def test_cancel_queued_and_running_jobs():
+    async def scenario():
+        queue = JobQueue(workers=1)
+        queue.start()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(60)
+
+        running, _ = queue.submit("scan", slow)
+        queued, _ = queue.submit("scan", _result(1))
+        await started.wait()
+        queue.cancel(queued.id)
+        queue.cancel(running.id)
+        await _wait(running)
+        await queue.stop()
+        return queue, running, queued
+
+    queue, running, queued = asyncio.run(scenario())
+    assert running.status == CANCELLED and queued.status == CANCELLED
+    assert queue.cancelled == 2
+
+
+def test_failures_limits_and_expiry():
+    async def scenario():
+        queue = JobQueue(workers=1, max_pending=1, result_ttl_s=0)
+        queue.start()
+
+        async def boom():
+            raise RuntimeError("scan failed")
+
+        failed, _ = queue.submit("scan", boom, key="doc")
+        with pytest.raises(QueueFull):
+            queue.submit("scan", _result(1))
+        with pytest.raises(ValueError):
+            queue.submit("scan", _result(1), priority="urgent")
+        await _wait(failed)
+        # A failed job is not reused for its key
+        retry, created = queue.submit("scan", _result(1), key="doc")
+        await _wait(retry)
+        await queue.stop()
+        return queue, failed, retry, created
+
+    queue, failed, retry, created = asyncio.run(scenario())
+    assert failed.status == FAILED and failed.to_dict()["error"] == "scan failed"
+    assert created and retry is not failed
+    assert queue.expire() == 2
+    assert queue.get(retry.id) is None
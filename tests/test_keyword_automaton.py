@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from app import keyword_automaton
+from app.keyword_automaton import KeywordAutomaton
+
+MARKERS = ["internal", "confidential", "embargo", "do not share", "atlas", "atlas-2"]
+
+
+@pytest.fixture(params=["pyahocorasick", "python"])
+def engine(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(keyword_automaton, "ahocorasick", None)
+    elif keyword_automaton.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("This is INTERNAL, do not share.", {"internal", "do not share"}),
+    ("International confidentiality", set()),
+    ("under embargo until Monday", {"embargo"}),
+    ("project Atlas-2 kickoff", {"atlas", "atlas-2"}),
+    ("", set()),
+])
+def test_whole_word_markers(engine, text, expected):
+    automaton = KeywordAutomaton(MARKERS)
+    assert automaton.engine == engine
+    assert automaton.find(text) == expected
+
+
+def test_substring_matching(engine):
+    assert KeywordAutomaton(MARKERS, whole_words=False).find("Internalized") == {"internal"}
+
+
+def test_empty_marker_list(engine):
+    automaton = KeywordAutomaton(["", "  "])
+    assert automaton.engine == "none"
+    assert automaton.find("internal") == set()
+
+
+def _naive(text: str) -> set:
+    found = set()
+    for marker in MARKERS:
+        start = text.find(marker)
+        while start != -1:
+            end = start + len(marker)
+            if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                found.add(marker)
+                break
+            start = text.find(marker, start + 1)
+    return found
+
+
+def test_matches_a_naive_scan(engine):
+    rng = random.Random(3)
+    words = ["inter", "internal", "nal", "atlas", "atlas-2", "x", "do", "not", "share", "embargoed"]
+    automaton = KeywordAutomaton(MARKERS)
+    for _ in range(300):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+        assert automaton.find(text) == _naive(text), text
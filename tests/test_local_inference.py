@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.local_inference import (
+    BatchingBackend, LocalBackendError, LocalQueueFull, StepModel, StubModel, stream_sse,
+)
+
+
+class CountdownModel(StepModel):
+    """Emits "<prompt>:<i> " until the prompt's count (its integer value) is reached; records batch sizes."""
+    name = "countdown"
+
+    def __init__(self, fail_at_step: int | None = None):
+        self.batches = []
+        self.fail_at_step = fail_at_step
+
+    def prefill(self, prompts):
+        return [{"prompt": p, "left": int(p), "i": 0} for p in prompts]
+
+    def step(self, states):
+        if self.fail_at_step is not None and len(self.batches) == self.fail_at_step:
+            self.fail_at_step = None
+            raise RuntimeError("device lost")
+        self.batches.append(len(states))
+        out = []
+        for s in states:
+            if s["left"] == 0:
+                out.append(None)
+                continue
+            s["left"] -= 1
+            s["i"] += 1
+            out.append(f"{s['prompt']}:{s['i']} ")
+        return out
+
+
+def test_step_model_is_abstract():
+    class PrefillOnly(StepModel):
+        def prefill(self, prompts):
+            return prompts
+
+    with pytest.raises(TypeError):
+        PrefillOnly()
+    assert isinstance(StubModel(step_ms=0), StepModel)
+
+
+def test_sequences_join_and_leave_the_running_batch():
+    async def scenario():
+        model = CountdownModel()
+        backend = BatchingBackend(model, max_batch=2)
+        short, long_, late = backend.submit("1"), backend.submit("5"), backend.submit("2")
+        texts = await asyncio.gather(short.text(), long_.text(), late.text())
+        await backend.aclose()
+        return model, backend, texts
+
+    model, backend, texts = asyncio.run(scenario())
+    assert texts == ["1:1 ", "5:1 5:2 5:3 5:4 5:5 ", "2:1 2:2 "]
+    # The late request takes the short one's slot while the long one keeps decoding
+    assert model.batches == [2, 2, 2, 2, 2, 1]
+    assert backend.completed == 3
+
+
+def test_streaming_cancellation_and_queue_limit():
+    async def scenario():
+        backend = BatchingBackend(CountdownModel(), max_batch=1, max_queue=1)
+        gen = backend.submit("50")
+        with pytest.raises(LocalQueueFull):
+            backend.submit("1")
+        first = [token async for token in _take(gen, 2)]
+        await asyncio.sleep(0.01)
+        await backend.aclose()
+        return gen, first
+
+    gen, first = asyncio.run(scenario())
+    assert first == ["50:1 ", "50:2 "]
+    assert gen.cancelled and gen.generated < 50
+
+
+async def _take(gen, n):
+    async for token in gen:
+        yield token
+        n -= 1
+        if n == 0:
+            return
+
+
+def test_model_failure_ends_every_active_sequence():
+    async def scenario():
+        backend = BatchingBackend(CountdownModel(fail_at_step=1))
+        gens = [backend.submit("3"), backend.submit("3")]
+        results = await asyncio.gather(*(g.text() for g in gens), return_exceptions=True)
+        events = [e async for e in stream_sse(backend.submit("3"), {"action": "ALLOW"})]
+        await backend.aclose()
+        return results, events
+
+    results, events = asyncio.run(scenario())
+    assert all(isinstance(r, LocalBackendError) for r in results)
+    assert events[0].startswith("event: decision")
+    # The failure was transient: the next request decodes to the end
+    assert events[-1].startswith("event: done")
@@ -0,0 +1,38 @@
+import pytest
+
+from app.pattern_registry import Detection, build_registry, to_dicts
+
+PATTERNS = [
+    {"id": "API_KEY", "regex": "sk-[a-z0-9]+", "risk_level": "CRITICAL", "category": "Credentials", "redaction_token": "[KEY]"},
+    {"id": "PII_EMAIL", "regex": "\\S+@\\S+"},
+]
+
+
+def test_registry_specs():
+    registry = build_registry(PATTERNS)
+    assert list(registry) == ["API_KEY", "PII_EMAIL"]
+
+    key, email = registry["API_KEY"], registry["PII_EMAIL"]
+    assert (key.weight, key.confidence, key.redaction_token) == (100, 0.95, "[KEY]")
+    assert (email.risk_level, email.weight, email.redaction_token) == ("MEDIUM", 40, None)
+
+
+def test_detection_round_trip():
+    registry = build_registry(PATTERNS)
+    detections = [
+        Detection.from_spec(registry["API_KEY"], 0, 12, partial=True),
+        Detection("PERSON", 20, 28, 0.85),
+    ]
+    restored = [Detection.from_dict(d, registry) for d in to_dicts(detections)]
+
+    assert [(d.entity_type, d.start, d.end, d.score, d.risk_level, d.weight, d.partial) for d in restored] == [
+        ("API_KEY", 0, 12, 0.95, "CRITICAL", 100, True),
+        ("PERSON", 20, 28, 0.85, "UNKNOWN", 0, False),
+    ]
+    assert restored[0].spec is registry["API_KEY"]
+    assert "partial" not in to_dicts(detections)[1]
+
+
+def test_detections_have_no_instance_dict():
+    with pytest.raises(AttributeError):
+        Detection("PERSON", 0, 1, 0.5).extra = True
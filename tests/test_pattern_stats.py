@@ -0,0 +1,68 @@
+import threading
+
+from app.pattern_registry import Detection
+from app.pattern_stats import PatternStats
+from app.policy import PolicyEngine
+
+
+def _by_id(stats: PatternStats) -> dict:
+    return {p["pattern_id"]: p for p in stats.snapshot()["patterns"]}
+
+
+def test_per_thread_counters_merge_exactly():
+    stats = PatternStats()
+
+    def evaluate():
+        for _ in range(5000):
+            stats.record_eval("PII_EMAIL", 0.01, 1, 100)
+
+    threads = [threading.Thread(target=evaluate) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    entry = _by_id(stats)["PII_EMAIL"]
+    assert (entry["evaluations"], entry["matches"]) == (40000, 40000)
+    assert entry["total_ms"] == round(40000 * 0.01, 3)
+
+
+def test_slow_and_timed_out_evaluations_flag_backtracking():
+    stats = PatternStats()
+    stats.record_eval("FAST", 0.1, 0, 10)
+    stats.record_eval("SLOW", 500, 0, 90_000, timed_out=True)
+
+    patterns = _by_id(stats)
+    assert not patterns["FAST"]["backtracking_suspect"]
+    assert patterns["SLOW"]["backtracking_suspect"]
+    assert (patterns["SLOW"]["timeouts"], patterns["SLOW"]["worst_text_chars"]) == (1, 90_000)
+
+
+def test_paused_evaluations_are_not_recorded():
+    stats = PatternStats()
+    with stats.paused():
+        stats.record_eval("PII_EMAIL", 1.0, 1, 10)
+    assert stats.snapshot()["patterns"] == []
+
+
+def test_attribution_sampling():
+    assert not any(PatternStats(attribution_sample=0).sample_outcome() for _ in range(10))
+    sampled = PatternStats(attribution_sample=4)
+    assert [sampled.sample_outcome() for _ in range(8)] == [True, False, False, False] * 2
+
+
+def test_decisive_patterns():
+    engine = PolicyEngine()
+    detections = [
+        Detection("API_KEY", 0, 10, 0.9, "CRITICAL"),
+        Detection("PII_EMAIL", 20, 30, 0.9, "MEDIUM"),
+    ]
+    decision = engine.evaluate("admin", detections, azure_severity=0)
+    stats = PatternStats()
+    stats.record_outcome(engine, "admin", detections, decision, azure_severity=0)
+
+    patterns = _by_id(stats)
+    # Without the API key the admin's request would be redacted instead of blocked
+    assert patterns["API_KEY"]["decisive_share"] == 1.0
+    assert patterns["PII_EMAIL"]["decisive_share"] == 0.0
+    assert stats.snapshot()["requests"] == 1
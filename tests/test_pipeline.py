@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from app import pipeline
+
+
+def test_cpu_stage_runs_off_the_event_loop_and_is_traced():
+    async def scenario():
+        trace = pipeline.start_trace()
+        loop_thread = threading.get_ident()
+
+        def detect():
+            pipeline.note_cache("detection", False)
+            time.sleep(0.05)
+            return threading.get_ident()
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        worker_thread = await pipeline.run_cpu("detect", detect)
+        tick_task.cancel()
+        return trace, loop_thread, worker_thread, ticks
+
+    trace, loop_thread, worker_thread, ticks = asyncio.run(scenario())
+    assert worker_thread != loop_thread
+    assert ticks > 2  # the loop kept running while the stage did
+    assert trace.stages["detect"] >= 50
+    assert trace.cache == {"detection": False}
+
+
+def test_timed_accumulates_repeated_stages():
+    async def scenario():
+        trace = pipeline.start_trace()
+        for _ in range(2):
+            with pipeline.timed("content_safety"):
+                await asyncio.sleep(0.01)
+        pipeline.note_degraded("content_safety", "timeout", "fail_closed")
+        return trace
+
+    trace = asyncio.run(scenario())
+    assert trace.stages["content_safety"] >= 20
+    assert trace.degraded == [{"stage": "content_safety", "reason": "timeout", "mode": "fail_closed"}]
+
+
+def test_audit_writes_keep_submission_order():
+    written = []
+
+    def write(i):
+        time.sleep(0.001 * (5 - i))
+        written.append(i)
+
+    async def scenario():
+        await asyncio.gather(*(pipeline.run_audit(write, i) for i in range(5)))
+
+    asyncio.run(scenario())
+    assert written == [0, 1, 2, 3, 4]
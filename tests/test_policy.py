@@ -0,0 +1,56 @@
+from itertools import combinations_with_replacement
+
+import pytest
+
+from app.pattern_registry import RISK_WEIGHT, Detection
+from app.policy import PolicyEngine
+
+ROLES = ["student", "researcher", "employee", "admin", "unknown"]
+LEVELS = [lvl for lvl in RISK_WEIGHT if lvl != "UNKNOWN"]
+
+
+def _detections(*levels, entity="PII_PHONE"):
+    return [Detection(entity, i * 10, i * 10 + 5, 0.9, lvl) for i, lvl in enumerate(levels)]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return PolicyEngine()
+
+
+def test_sovereignty_marker_keeps_high_risk_local(engine):
+    markers = engine.find_markers("This is an INTERNAL draft")
+    assert markers
+
+    decision = engine.evaluate("student", _detections("HIGH"), azure_severity=0, markers=markers)
+    assert (decision["action"], decision["route"]) == ("REDACT", "SAFE_MODE")
+    assert not engine.block_certain("student", _detections("HIGH"), markers)
+    assert engine.block_certain("student", _detections("HIGH"))
+
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize("with_markers", [False, True])
+def test_block_certain_never_contradicts_evaluate(engine, role, with_markers):
+    # Early exit is only sound if no later detection can turn the BLOCK into anything else
+    markers = {"internal"} if with_markers else frozenset()
+    for found in (1, 2):
+        for prefix in combinations_with_replacement(LEVELS, found):
+            if not engine.block_certain(role, _detections(*prefix), markers):
+                continue
+            for extra in range(3):
+                for rest in combinations_with_replacement(LEVELS, extra):
+                    decision = engine.evaluate(role, _detections(*prefix, *rest), 0, markers)
+                    assert decision["action"] == "BLOCK", (role, prefix, rest, markers)
+
+
+def test_attack_entities_always_block(engine):
+    attack = [Detection("PROMPT_INJECTION", 0, 5, 0.9, "LOW")]
+    assert engine.block_certain("admin", attack, {"internal"})
+    assert engine.evaluate("admin", attack, 0, {"internal"})["action"] == "BLOCK"
+
+
+def test_failure_modes(engine):
+    allowed = {"action": "ALLOW", "route": "CLOUD_LLM", "reason": "ok"}
+    assert engine.degrade(allowed, "fail_closed", "content_safety")["action"] == "BLOCK"
+    assert engine.degrade(allowed, "local_only", "content_safety")["route"] == "SAFE_MODE"
+    assert engine.degrade(allowed, "fail_open", "content_safety") is allowed
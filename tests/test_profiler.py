@@ -0,0 +1,78 @@
+import threading
+import time
+
+from app.profiler import SamplingProfiler
+
+
+def _busy(seconds: float):
+    until = time.monotonic() + seconds
+    while time.monotonic() < until:
+        pass
+
+
+def test_samples_are_tagged_with_endpoint_and_stage():
+    profiler = SamplingProfiler(interval_s=0.001)
+    assert profiler.start(seconds=5)
+
+    with profiler.request("/proxy"):
+        with profiler.stage("detect"):
+            _busy(0.1)
+        profiler.record_wait("content_safety", 0.01)
+
+    profiler.stop()
+    collapsed = profiler.collapsed()
+    assert "/proxy;detect;" in collapsed
+    assert "/proxy;content_safety;(awaiting upstream) 10" in collapsed.splitlines()
+    assert not profiler.running
+
+
+def test_unsampled_requests_are_not_recorded():
+    profiler = SamplingProfiler(interval_s=0.001)
+    profiler.start(seconds=5, sample_one_in=2)
+
+    with profiler.request("/proxy"):  # request 0 is sampled
+        pass
+    with profiler.request("/analyze"):  # request 1 is not
+        profiler.record_wait("ocr", 1.0)
+
+    profiler.stop()
+    assert profiler.collapsed() == ""
+
+
+def test_reading_while_sampling_and_recording_waits():
+    profiler = SamplingProfiler(interval_s=0.0005)
+    profiler.start(seconds=5)
+    done = threading.Event()
+    errors = []
+    waits = [0] * 4
+
+    def request(i: int):
+        with profiler.request(f"/endpoint{i}"):
+            while not done.is_set():
+                with profiler.stage(f"stage{i}"):
+                    _busy(0.002)
+                profiler.record_wait(f"upstream{i}", 0.001)  # 2 samples
+                waits[i] += 2
+
+    def read():
+        try:
+            while not done.is_set():
+                profiler.collapsed()
+                profiler.status()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)] + [threading.Thread(target=read)]
+    for t in threads:
+        t.start()
+    time.sleep(0.3)
+    done.set()
+    for t in threads:
+        t.join()
+    profiler.stop()
+
+    assert errors == []
+    recorded = sum(
+        int(line.rsplit(" ", 1)[1]) for line in profiler.collapsed().splitlines() if "(awaiting upstream)" in line
+    )
+    assert recorded == sum(waits)
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("presidio_anonymizer")
+
+from app.pattern_registry import Detection, PatternSpec  # noqa: E402
+from app.redactor import redact_text  # noqa: E402
+
+TEXT = "mail jane@example.com now"
+SPAN = (5, 21)
+
+
+def _email(token: str | None) -> Detection:
+    spec = PatternSpec({"id": "PII_EMAIL", "regex": ".", "risk_level": "MEDIUM", "redaction_token": token})
+    return Detection.from_spec(spec, *SPAN)
+
+
+def test_default_tokens():
+    assert redact_text(TEXT, [_email(None)]) == "mail [REDACTED:EMAIL] now"
+    assert redact_text(TEXT, [Detection("CUSTOM", *SPAN, 0.9)]) == "mail [REDACTED] now"
+
+
+def test_tenant_tokens_for_the_same_pattern_id_do_not_leak():
+    assert redact_text(TEXT, [_email("<tenant-a>")]) == "mail <tenant-a> now"
+    assert redact_text(TEXT, [_email("<tenant-b>")]) == "mail <tenant-b> now"
+    # A changed token (patterns.json edited, tenant reloaded) takes effect immediately
+    assert redact_text(TEXT, [_email("<tenant-a:v2>")]) == "mail <tenant-a:v2> now"
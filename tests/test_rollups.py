@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.rollups import LatencySketch, RollupStore, parse_duration
+from tests.conftest import log
+
+
+def _event(minutes_ago: float, **fields) -> dict:
+    ts = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return {"timestamp_utc": ts.isoformat().replace("+00:00", "Z"), "policy_action": "ALLOW", **fields}
+
+
+def test_latency_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(3, 1) for _ in range(5000))
+    sketch = LatencySketch()
+    for v in values:
+        sketch.add(v)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+
+    # Merging two halves gives the same sketch as adding everything once
+    left, right = LatencySketch(), LatencySketch()
+    for i, v in enumerate(values):
+        (left if i % 2 else right).add(v)
+    left.merge(right)
+    assert left.to_dict() == sketch.to_dict()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("15m", timedelta(minutes=15)), ("24h", timedelta(hours=24)), ("7d", timedelta(days=7)), (" 30S ", timedelta(seconds=30)),
+])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "15", "1w", "-5m"])
+def test_parse_duration_rejects(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_timeseries_buckets_events(tmp_path):
+    store = RollupStore(tmp_path / "rollups.json")
+    store.add(_event(0, policy_action="BLOCK", processing_latency_ms=120))
+    store.add(_event(0, routing_decision="SAFE_MODE", processing_latency_ms=80))
+    store.add(_event(30, user_role="admin", endpoint="/analyze"))
+
+    series = store.timeseries(timedelta(hours=1), timedelta(minutes=15))
+    assert 4 <= len(series) <= 5
+    assert sum(p["requests"] for p in series) == 3
+    last = series[-1]
+    assert (last["requests"], last["blocked_count"], last["sovereign_count"]) == (2, 1, 1)
+    assert last["latency_ms"]["p50"] == pytest.approx(80, rel=0.02)
+
+    with pytest.raises(ValueError):
+        store.timeseries(timedelta(days=30), timedelta(minutes=1))
+
+
+def test_snapshot_then_replay_counts_each_event_once(audit_dir):
+    path = audit_dir / "rollups.json"
+    log(3)
+    first = RollupStore(path)
+    first.load()
+    first.save()
+
+    log(2)
+    restarted = RollupStore(path)
+    restarted.load()
+    series = restarted.timeseries(timedelta(hours=1), timedelta(hours=1))
+    assert sum(p["requests"] for p in series) == 5
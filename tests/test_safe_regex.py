@@ -0,0 +1,109 @@
+import json
+import random
+import time
+import zlib
+from pathlib import Path
+
+import pytest
+import regex
+
+from app import safe_regex
+from app.safe_regex import REGEX_FLAGS, SafePattern, is_dangerous, re2_source, vet
+
+PATTERNS = json.loads((Path(__file__).resolve().parent.parent / "Security" / "patterns.json").read_text())["patterns"]
+
+EXTRA = [
+    r"[^\W_]+",
+    r"\S+@\S+",
+    r"[\d\s]{6,}",
+    r"\D\d\D",
+    r"[^\s\d]+",
+    r"[]x]+\w",
+    r"(?:\w+\s){2}\w+",
+]
+
+# Text mixing ASCII with Unicode digits, letters and spaces that RE2's ASCII classes would miss
+ALPHABET = (
+    "abcXYZ_019 -+@.]\n\t"
+    "０１９"       # fullwidth digits
+    "٠٣٩"         # Arabic-Indic digits
+    "۴५"          # extended Arabic-Indic, Devanagari digits
+    "éßÇжДλ中"     # letters
+    "  　​\u001c"  # NBSP, em space, ideographic space, zero-width space, file separator
+    "́K"  # combining acute, Kelvin sign
+)
+
+
+def _reference_spans(source: str, text: str) -> list[tuple[int, int]]:
+    compiled = regex.compile(source, flags=REGEX_FLAGS)
+    return [m.span() for m in compiled.finditer(text) if m.end() > m.start()]
+
+
+# Digit-heavy text, so phone / card / ID patterns get runs long enough to match
+NUMERIC = "0123456789 -+０１９٠٣٩۴५　"
+
+
+def _texts(seed: int, count: int = 200):
+    rng = random.Random(seed)
+    for i in range(count):
+        alphabet = NUMERIC if i % 2 else ALPHABET
+        yield "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+
+
+@pytest.mark.parametrize("source", [p["regex"] for p in PATTERNS] + EXTRA)
+def test_re2_matches_like_the_regex_engine(source):
+    pattern = SafePattern("p", source)
+    for text in _texts(seed=zlib.crc32(source.encode())):
+        assert pattern.spans(text)[0] == _reference_spans(source, text), (pattern.engine, text)
+
+
+@pytest.mark.parametrize("text", [
+    "call +٩١ ٩٨٧٦٥٤٣٢١٠ today",     # Arabic-Indic digits
+    "call ０９８７６５４３２１０ today",  # fullwidth digits
+])
+def test_unicode_phone_numbers_are_detected(text):
+    phone = next(p["regex"] for p in PATTERNS if p["id"] == "PII_PHONE")
+    spans, _ = SafePattern("PII_PHONE", phone).spans(text)
+    assert spans and spans == _reference_spans(phone, text)
+
+
+@pytest.mark.skipif(safe_regex.re2 is None, reason="google-re2 not installed")
+def test_engine_selection():
+    assert SafePattern("p", r"\d{4}").engine == "re2"
+    assert SafePattern("p", r"[\w.]+@\w+").engine == "re2"
+    # No RE2 equivalent for Unicode word boundaries or backreferences
+    assert SafePattern("p", r"\bkey\b").engine == "regex"
+    assert SafePattern("p", r"(a)\1").engine == "regex"
+
+
+def test_re2_source_rewrites_only_outside_literals():
+    assert re2_source(r"a\.b\\d") == r"a\.b\\d"
+    assert re2_source(r"[]a]") == r"[\]a]"
+    assert re2_source(r"\bword") is None
+    assert re2_source(r"[[:alpha:]]") is None
+    assert "\\x{" in re2_source(r"\s")
+
+
+@pytest.mark.parametrize("source, finding", [
+    (r"(a+)+$", "nested quantifier"),
+    (r"(a|ab)*c", "overlapping alternation"),
+    (r"(?<=x)y", "lookaround"),
+])
+def test_vetting_flags_backtracking_constructs(source, finding):
+    assert finding in vet(source)
+
+
+def test_vetting_accepts_linear_patterns():
+    assert vet(r"[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}") == []
+    assert not is_dangerous(vet(r"(?:\d{4}[ -]?){4}"))
+
+
+def test_budget_bounds_catastrophic_backtracking(monkeypatch):
+    monkeypatch.setattr(safe_regex, "re2", None)
+    pattern = SafePattern("evil", r"(a+)+$", budget_ms=20)
+    assert pattern.engine == "regex"
+    started = time.perf_counter()
+    _, timed_out = pattern.spans("a" * 5000 + "!")
+    assert timed_out
+    # Match budget plus the fallback budget, with slack for a loaded machine
+    assert time.perf_counter() - started < 0.02 * (1 + safe_regex.FALLBACK_BUDGET_FACTOR) + 0.5
@@ -0,0 +1,47 @@
+from app.pattern_registry import Detection, PatternSpec
+from app.span_resolver import load_config, resolve_spans
+
+EMAIL = PatternSpec({"id": "PII_EMAIL", "regex": ".", "risk_level": "MEDIUM"})
+KEY = PatternSpec({"id": "API_KEY", "regex": ".", "risk_level": "CRITICAL"})
+INJECTION = PatternSpec({"id": "PROMPT_INJECTION", "regex": ".", "risk_level": "LOW", "category": "Attack"})
+
+
+def _spans(detections):
+    return [(d.entity_type, d.start, d.end) for d in detections]
+
+
+def test_custom_pattern_wins_over_builtin_duplicate():
+    resolved = resolve_spans([
+        Detection("EMAIL_ADDRESS", 5, 21, 1.0),
+        Detection.from_spec(EMAIL, 5, 21),
+    ])
+    assert _spans(resolved) == [("PII_EMAIL", 5, 21)]
+    assert resolved[0].spec is EMAIL
+
+
+def test_overlapping_run_covers_the_union():
+    resolved = resolve_spans([
+        Detection.from_spec(EMAIL, 10, 30),
+        Detection.from_spec(KEY, 25, 40),
+        Detection("URL", 38, 45, 0.9),
+    ])
+    assert _spans(resolved) == [("API_KEY", 10, 45)]
+
+
+def test_attack_markers_are_never_hidden():
+    resolved = resolve_spans([Detection.from_spec(KEY, 0, 20), Detection.from_spec(INJECTION, 5, 10)])
+    assert _spans(resolved) == [("PROMPT_INJECTION", 0, 20)]
+
+
+def test_touching_spans_stay_apart_and_sorted():
+    resolved = resolve_spans([Detection.from_spec(KEY, 10, 20), Detection.from_spec(EMAIL, 0, 10)])
+    assert _spans(resolved) == [("PII_EMAIL", 0, 10), ("API_KEY", 10, 20)]
+
+
+def test_config():
+    config = load_config({"span_resolution": {"precedence": ["score", "bogus"]}})
+    assert config["precedence"] == ["score"]
+
+    detections = [Detection.from_spec(EMAIL, 0, 10), Detection("URL", 0, 10, 0.9)]
+    assert resolve_spans(detections, {**config, "enabled": False}) is detections
+    assert _spans(resolve_spans(detections, config)) == [("URL", 0, 10)]
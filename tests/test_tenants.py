@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+pytest.importorskip("presidio_analyzer")
+pytest.importorskip("en_core_web_md")
+
+from app import tenants as tenants_module  # noqa: E402
+from app.tenants import TenantRegistry, UnknownTenantError  # noqa: E402
+
+CODENAME = {"id": "PROJECT_ATLAS", "regex": "atlas-[0-9]{4}", "risk_level": "HIGH", "redaction_token": "[ATLAS]"}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenants_module, "TENANT_DIR", tmp_path)
+
+    (tmp_path / "acme").mkdir()
+    (tmp_path / "acme" / "policy.json").write_text(json.dumps({
+        "role_policies": {"student": {"max_allowed_risk": "HIGH", "allowed_routes": ["SAFE_MODE"]}},
+    }))
+    (tmp_path / "acme" / "patterns.json").write_text(json.dumps({"inherit": True, "patterns": [CODENAME]}))
+
+    (tmp_path / "policy-only").mkdir()
+    (tmp_path / "policy-only" / "policy.json").write_text(json.dumps({"sovereignty": {"markers": ["atlas"]}}))
+    return TenantRegistry(max_cached=1)
+
+
+def test_tenant_overrides_policy_and_extends_patterns(registry):
+    acme = registry.get("ACME")
+    assert acme.tenant_id == "acme"
+    assert "PROJECT_ATLAS" in acme.detector.pattern_registry
+    assert "PII_EMAIL" in acme.detector.pattern_registry  # inherited
+    assert acme.policy.role_policies["student"]["max_allowed_risk"] == "HIGH"
+
+    # The global configuration is untouched
+    assert "PROJECT_ATLAS" not in registry.default.detector.pattern_registry
+    assert registry.default.policy.role_policies["student"]["max_allowed_risk"] == "LOW"
+
+
+def test_policy_only_tenant_shares_the_default_detector(registry):
+    tenant = registry.get("policy-only")
+    assert tenant.detector is registry.default.detector
+    assert tenant.policy.find_markers("the atlas launch")
+
+
+def test_lru_cache_and_invalidation(registry):
+    first = registry.get("acme")
+    assert registry.get("acme") is first
+    registry.get("policy-only")  # evicts acme (max_cached=1)
+    assert registry.get("acme") is not first
+
+    registry.invalidate("acme")
+    assert registry.peek("acme") is None
+    stats = registry.stats()
+    assert (stats["hits"], stats["evictions"]) == (1, 2)
+
+
+def test_unknown_and_invalid_tenants(registry):
+    assert registry.get(None) is registry.default
+    with pytest.raises(UnknownTenantError):
+        registry.get("nobody")
+    with pytest.raises(ValueError):
+        registry.get("../etc")
@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import uploads
+from app.uploads import receive_upload
+
+MAX_BYTES = 4096
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    spooled, fields = await receive_upload(request, MAX_BYTES)
+    try:
+        return {
+            "filename": spooled.filename,
+            "content_type": spooled.content_type,
+            "size": spooled.size,
+            "sha256": spooled.sha256,
+            "read_sha256": hashlib.sha256(spooled.read_bytes()).hexdigest(),
+            "on_disk": spooled.on_disk,
+            "pages": spooled.page_count(),
+            "fields": fields,
+        }
+    finally:
+        spooled.close()
+
+
+client = TestClient(app)
+
+PDF = b"%PDF-1.4\n1 0 obj << /Type /Pages /Count 2 >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type /Page >>\n%%EOF"
+
+
+def _post(content: bytes, **data):
+    return client.post("/upload", files={"file": ("doc.pdf", content, "application/pdf")}, data=data)
+
+
+def test_file_part_and_fields():
+    body = _post(PDF, policy_mode="strict").json()
+    assert body["filename"] == "doc.pdf"
+    assert body["content_type"] == "application/pdf"
+    assert body["size"] == len(PDF)
+    assert body["sha256"] == body["read_sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert body["pages"] == 2
+    assert body["fields"] == {"policy_mode": "strict"}
+    assert not body["on_disk"]
+
+
+def test_large_upload_spills_to_disk(monkeypatch):
+    monkeypatch.setattr(uploads, "SPOOL_MEMORY_BYTES", 100)
+    content = bytes(range(256)) * 10
+    body = _post(content).json()
+    assert body["on_disk"]
+    assert body["size"] == len(content)
+    assert body["sha256"] == body["read_sha256"] == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.parametrize("content, data, status", [
+    (b"x" * (MAX_BYTES + 1), {}, 413),
+    (b"x", {"note": "y" * (uploads.MAX_FIELD_BYTES + 1)}, 413),
+])
+def test_limits(content, data, status):
+    assert _post(content, **data).status_code == status
+
+
+def test_rejects_non_multipart_and_missing_file():
+    assert client.post("/upload", json={"file": "x"}).status_code == 400
+    response = client.post("/upload", data={"policy_mode": "strict"}, files={"other": ("a.txt", b"a")})
+    assert response.status_code == 400
+    assert "'file'" in response.json()["detail"]
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("presidio_analyzer")
+pytest.importorskip("presidio_anonymizer")
+pytest.importorskip("en_core_web_md")
+
+from app import warmup as warmup_module  # noqa: E402
+from app.warmup import FALLBACK_CORPUS, WarmUp, load_corpus  # noqa: E402
+
+
+def test_load_corpus(tmp_path):
+    corpus = tmp_path / "attacks.csv"
+    corpus.write_text("role,prompt\nadmin,Here is our API key\n,No role given\nstudent,\n", encoding="utf-8")
+    assert load_corpus(corpus) == [("admin", "Here is our API key"), ("student", "No role given")]
+
+    assert load_corpus(tmp_path / "missing.csv") == FALLBACK_CORPUS
+    (tmp_path / "no_prompt.csv").write_text("role,text\nadmin,hello\n", encoding="utf-8")
+    assert load_corpus(tmp_path / "no_prompt.csv") == FALLBACK_CORPUS
+
+
+def test_run_warms_every_prompt_and_reports_upstreams(monkeypatch):
+    warmed = []
+    monkeypatch.setattr(warmup_module, "ENABLED", True)
+    monkeypatch.setattr(warmup_module, "TENANTS", [])
+    monkeypatch.setattr(warmup_module, "UPSTREAM_TIMEOUT_S", 0.05)
+    monkeypatch.setattr(warmup_module, "load_corpus", lambda: list(FALLBACK_CORPUS))
+    monkeypatch.setattr(warmup_module, "tenants", SimpleNamespace(default=SimpleNamespace(tenant_id="default")))
+    monkeypatch.setattr(warmup_module, "_warm_prompt", lambda tenant, role, prompt: warmed.append(role))
+
+    async def connected():
+        return True
+
+    async def not_configured():
+        return False
+
+    async def hangs():
+        await asyncio.sleep(1)
+
+    async def refused():
+        raise ConnectionError("refused")
+
+    state = WarmUp()
+    assert not state.ready
+    asyncio.run(state.run({"azure": connected, "alpine": not_configured, "gemini": hangs, "other": refused}))
+
+    assert state.ready and state.prompts == len(FALLBACK_CORPUS)
+    assert sorted(warmed) == sorted(role for role, _ in FALLBACK_CORPUS)
+    assert state.upstreams == {
+        "azure": "connected", "alpine": "not configured", "gemini": "timeout", "other": "error: refused",
+    }
+    assert {"pipeline:default", "upstream:azure", "total"} <= state.timings_ms.keys()
+
+
+def test_disabled_warmup_is_ready_at_once(monkeypatch):
+    monkeypatch.setattr(warmup_module, "ENABLED", False)
+    state = WarmUp()
+    asyncio.run(state.run())
+    assert state.status()["state"] == "disabled" and state.ready